@@ -0,0 +1,209 @@
+# Multi-process ASGI serving mode for the music generator
+# An asyncio front end accepts requests and hands model generation to a pool of
+# worker processes, each holding its own warm copy of the model, so CPU-bound
+# decoding scales with cores instead of running under one GIL. When the pool
+# queue is saturated (or a request times out) the front end answers with the
+# fast model-free create_direct_midi fallback instead of piling up work.
+#
+# Run with:  uvicorn asgi_app:app --host 0.0.0.0 --port 5000
+import asyncio
+import importlib
+import json
+import multiprocessing
+import os
+import secrets
+from concurrent.futures import ProcessPoolExecutor
+from urllib.parse import parse_qsl
+
+ASGI_WORKERS = int(os.environ.get("ASGI_WORKERS", str(os.cpu_count() or 1)))
+ASGI_MAX_QUEUE = int(os.environ.get("ASGI_MAX_QUEUE", str(2 * ASGI_WORKERS)))
+ASGI_TIMEOUT = float(os.environ.get("ASGI_TIMEOUT", "30"))
+
+import asgi_worker
+
+# Backend the workers load; the front end itself never runs the model
+WORKER_BACKEND = os.environ.get("MUSIC_MODEL_BACKEND", "numpy").lower()
+sample_code = None
+WORKER_MODEL_VERSION = None
+
+
+def load_front_end():
+    """Import sample_code for the front end: no weights, no warm pool
+
+    The environment overrides only last for the import, so neither importing
+    this module nor starting the app changes os.environ.
+    """
+    global sample_code, WORKER_MODEL_VERSION
+    if sample_code is not None:
+        return
+    overrides = {"MUSIC_MODEL_BACKEND": "none", "WARM_POOL_SIZE": "0"}
+    saved = {name: os.environ.get(name) for name in overrides}
+    os.environ.update(overrides)
+    try:
+        module = importlib.import_module("sample_code")
+    finally:
+        for name, value in saved.items():
+            if value is None:
+                os.environ.pop(name, None)
+            else:
+                os.environ[name] = value
+
+    # Same version string the workers' sample_code computes, so cache keys match
+    try:
+        WORKER_MODEL_VERSION = f"{WORKER_BACKEND}:{module.file_digest(module.MODEL_PATH)}"
+    except OSError:
+        WORKER_MODEL_VERSION = f"{WORKER_BACKEND}:{module.MODEL_PATH}"
+    sample_code = module
+
+
+class MusicASGIApp:
+    def __init__(self, workers=ASGI_WORKERS, max_queue=ASGI_MAX_QUEUE, timeout=ASGI_TIMEOUT):
+        self.workers = workers
+        self.max_in_flight = workers + max_queue
+        self.timeout = timeout
+        self.executor = None
+        self.in_flight = 0
+        self.counters = {"model": 0, "direct": 0, "saturated": 0, "timeouts": 0, "errors": 0}
+
+    def start(self):
+        load_front_end()
+        if self.executor is None:
+            # spawn: workers import sample_code fresh (with the real backend)
+            # instead of inheriting the model-less front end
+            self.executor = ProcessPoolExecutor(
+                max_workers=self.workers,
+                mp_context=multiprocessing.get_context("spawn"),
+                initializer=asgi_worker.init_worker,
+                initargs=(WORKER_BACKEND,),
+            )
+            for _ in range(self.workers):
+                self.executor.submit(asgi_worker.ping)
+
+    def shutdown(self):
+        if self.executor is not None:
+            self.executor.shutdown(wait=False, cancel_futures=True)
+            self.executor = None
+
+    async def __call__(self, scope, receive, send):
+        if scope["type"] == "lifespan":
+            await self._lifespan(receive, send)
+        elif scope["type"] == "http":
+            load_front_end()
+            if scope["method"] == "HEAD":
+                send = self._headers_only(send)
+            await self._http(scope, send)
+
+    @staticmethod
+    def _headers_only(send):
+        """HEAD: the GET response's headers, content-length included, but no body"""
+        async def send_headers(message):
+            if message["type"] == "http.response.body":
+                message = dict(message, body=b"")
+            await send(message)
+        return send_headers
+
+    async def _lifespan(self, receive, send):
+        while True:
+            message = await receive()
+            if message["type"] == "lifespan.startup":
+                self.start()
+                await send({"type": "lifespan.startup.complete"})
+            elif message["type"] == "lifespan.shutdown":
+                self.shutdown()
+                await send({"type": "lifespan.shutdown.complete"})
+                return
+
+    async def _send(self, send, status, body, content_type, headers=None):
+        raw_headers = [(b"content-type", content_type.encode()),
+                       (b"content-length", str(len(body)).encode())]
+        for name, value in (headers or {}).items():
+            raw_headers.append((name.lower().encode(), str(value).encode()))
+        await send({"type": "http.response.start", "status": status, "headers": raw_headers})
+        await send({"type": "http.response.body", "body": body})
+
+    async def _send_json(self, send, status, payload):
+        await self._send(send, status, json.dumps(payload).encode(), "application/json")
+
+    async def _send_midi(self, send, data, genre, headers):
+        headers = dict(headers)
+        headers["Content-Disposition"] = \
+            f'attachment; filename="{sample_code.safe_genre_name(genre)}_unique_music.mid"'
+        headers["Cache-Control"] = "no-store"
+        sample_code.archive_midi(data, genre)
+        await self._send(send, 200, data, "audio/midi", headers)
+
+    async def _http(self, scope, send):
+        path = scope["path"]
+        if path == "/health":
+            await self._send_json(send, 200, dict(self.counters, in_flight=self.in_flight,
+                                                  workers=self.workers,
+                                                  max_in_flight=self.max_in_flight))
+        elif path == "/generate_music" and scope["method"] in ("GET", "HEAD"):
+            await self._generate(scope, send)
+        else:
+            await self._send_json(send, 404, {"error": "Not found"})
+
+    def _release(self, _future):
+        self.in_flight -= 1
+
+    async def _generate(self, scope, send):
+        args = dict(parse_qsl(scope.get("query_string", b"").decode("latin-1")))
+        try:
+            params = sample_code.parse_generation_params(args)
+        except ValueError as e:
+            await self._send_json(send, 400, {"error": str(e)})
+            return
+        genre = params["genre"]
+        seeded = params["seed"] is not None
+        if not seeded:
+            params["seed"] = secrets.randbits(63)
+        headers = {"X-Seed": params["seed"]}
+
+        cache_key = sample_code.make_cache_key(params, WORKER_MODEL_VERSION)
+        if seeded:
+            cached = sample_code.midi_cache.get(cache_key)
+            if cached is not None:
+                headers["X-Cache"] = "hit"
+                await self._send_midi(send, cached, genre, headers)
+                return
+
+        # Backpressure: beyond workers + queue allowance, answer with the fallback
+        if self.executor is None:
+            self.start()
+        if self.in_flight >= self.max_in_flight:
+            self.counters["saturated"] += 1
+            headers["X-Fallback"] = "saturated"
+            await self._send_midi(send, sample_code.generate_fallback_midi(params), genre, headers)
+            return
+
+        loop = asyncio.get_running_loop()
+        self.in_flight += 1
+        future = loop.run_in_executor(self.executor, asgi_worker.generate, params)
+        # Count the slot as busy until the worker really finishes, even after a timeout
+        future.add_done_callback(self._release)
+        try:
+            data, source = await asyncio.wait_for(asyncio.shield(future), self.timeout)
+        except asyncio.TimeoutError:
+            self.counters["timeouts"] += 1
+            headers["X-Fallback"] = "timeout"
+            await self._send_midi(send, sample_code.generate_fallback_midi(params), genre, headers)
+            return
+        except Exception as e:
+            print(f"Worker generation failed: {e}")
+            self.counters["errors"] += 1
+            headers["X-Fallback"] = "error"
+            await self._send_midi(send, sample_code.generate_fallback_midi(params), genre, headers)
+            return
+
+        self.counters[source] += 1
+        if seeded and source == "model":
+            sample_code.midi_cache.put(cache_key, data)
+            headers["X-Cache"] = "miss"
+        await self._send_midi(send, data, genre, headers)
+
+
+app = MusicASGIApp()
+
+if __name__ == "__main__":
+    import uvicorn
+    uvicorn.run(app, host="0.0.0.0", port=int(os.environ.get("PORT", "5000")))
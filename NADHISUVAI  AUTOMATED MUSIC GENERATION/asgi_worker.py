@@ -0,0 +1,30 @@
+# Worker-process side of the ASGI serving mode
+# Kept separate from asgi_app so that spawned workers can import these
+# functions without running the front end's model-less setup.
+import importlib
+import os
+import sys
+
+
+def init_worker(backend):
+    """Load the model once per worker process"""
+    os.environ["MUSIC_MODEL_BACKEND"] = backend
+    os.environ["WARM_POOL_SIZE"] = "0"
+    module = sys.modules.get("sample_code")
+    if module is not None and module.MODEL_BACKEND != backend:
+        # Already imported as the model-less front end (e.g. re-run __main__)
+        importlib.reload(module)
+    else:
+        importlib.import_module("sample_code")
+
+
+def ping():
+    return os.getpid()
+
+
+def generate(params):
+    """Generate one piece; model path if loaded, direct otherwise"""
+    import sample_code
+    if sample_code.model is not None:
+        return sample_code.generate_model_midi(params), "model"
+    return sample_code.generate_fallback_midi(params), "direct"
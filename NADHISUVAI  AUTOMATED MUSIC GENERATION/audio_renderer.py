@@ -0,0 +1,266 @@
+# Wavetable audio rendering for generated pieces
+# Turns the note arrays from track_builder into 16-bit mono PCM / WAV for
+# clients that cannot play MIDI. Each General MIDI program used for the Indian
+# instruments gets a cached single-cycle wavetable, an envelope and an optional
+# noise burst (for the drums and plucked attacks). All notes of a voice are
+# synthesized together as flat NumPy arrays and scatter-added with
+# np.bincount, so there is no per-note Python loop.
+import struct
+from functools import lru_cache
+from typing import NamedTuple
+
+import numpy as np
+
+from track_builder import make_track
+
+TABLE_BITS = 13
+TABLE_SIZE = 1 << TABLE_BITS
+# Top bits of the 32-bit phase accumulator index the wavetable
+PHASE_SHIFT = 32 - TABLE_BITS
+NOISE_SIZE = 1 << 15
+DEFAULT_SAMPLE_RATE = 44100
+# Note samples synthesized per vectorized batch: bounds peak memory and keeps
+# the working arrays cache-sized
+MAX_BATCH_SAMPLES = 1 << 18
+MASTER_GAIN = 0.35
+# Release tails are cut after this many time constants (about -35 dB)
+TAIL_CONSTANTS = 4
+
+
+class Voice(NamedTuple):
+    """Timbre and envelope for one MIDI program"""
+    harmonics: tuple      # amplitude of harmonic 1, 2, 3, ...
+    attack: float         # seconds to full level
+    decay: float          # time constant of the decay towards sustain
+    sustain: float        # level held while the note is on (0 = percussive)
+    release: float        # time constant after note off
+    noise: float = 0.0    # level of the attack noise burst
+    noise_decay: float = 0.01
+    gain: float = 1.0
+
+
+def _plucked(n, rolloff):
+    return tuple(1.0 / k ** rolloff for k in range(1, n + 1))
+
+
+VOICES = {
+    104: Voice(_plucked(24, 0.7), 0.002, 0.6, 0.0, 0.15, noise=0.3, noise_decay=0.004),   # sitar
+    105: Voice(_plucked(16, 0.9), 0.002, 0.45, 0.0, 0.12, noise=0.2, noise_decay=0.004),  # sarod
+    73: Voice((1.0, 0.25, 0.08, 0.03), 0.06, 0.5, 0.8, 0.08, noise=0.05, noise_decay=0.05),  # bansuri
+    111: Voice((1.0, 0.8, 0.7, 0.5, 0.45, 0.3, 0.2, 0.15), 0.03, 0.4, 0.75, 0.06, gain=0.7),  # shehnai
+    116: Voice((1.0, 0.5, 0.15), 0.001, 0.09, 0.0, 0.05, noise=0.6, noise_decay=0.015, gain=1.3),  # tabla
+    15: Voice(_plucked(12, 1.1), 0.001, 0.8, 0.0, 0.3, noise=0.25, noise_decay=0.003),    # santoor
+    110: Voice(_plucked(14, 0.8), 0.08, 0.6, 0.7, 0.12, noise=0.03, noise_decay=0.1, gain=0.8),  # sarangi
+    106: Voice(_plucked(30, 0.6), 0.01, 2.5, 0.0, 0.5, gain=0.6),                        # tanpura
+    117: Voice((1.0, 0.3, 0.1), 0.001, 0.14, 0.0, 0.07, noise=0.5, noise_decay=0.02, gain=1.2),  # mridangam
+    22: Voice((1.0, 0.6, 0.5, 0.35, 0.3, 0.2, 0.15, 0.1), 0.04, 0.3, 0.85, 0.08, gain=0.7),  # harmonium
+}
+DEFAULT_VOICE = Voice(_plucked(8, 1.0), 0.01, 0.5, 0.5, 0.1)
+
+
+def voice_for(program):
+    return VOICES.get(program, DEFAULT_VOICE)
+
+
+@lru_cache(maxsize=None)
+def wavetable(harmonics):
+    """Single-cycle table for a harmonic spectrum, normalized to peak 1"""
+    phase = np.arange(TABLE_SIZE) * (2 * np.pi / TABLE_SIZE)
+    table = sum(amp * np.sin(k * phase) for k, amp in enumerate(harmonics, start=1))
+    return (table / np.abs(table).max()).astype(np.float32)
+
+
+@lru_cache(maxsize=1)
+def _noise_table():
+    return np.random.default_rng(0).uniform(-1, 1, NOISE_SIZE).astype(np.float32)
+
+
+def _note_length(voice, duration):
+    """Seconds a note sounds for, including its release tail"""
+    if voice.sustain == 0.0:
+        duration = np.minimum(duration, TAIL_CONSTANTS * voice.decay)
+    return duration + TAIL_CONSTANTS * voice.release
+
+
+def _gather_notes(tracks):
+    """Group the notes of all tracks by voice: {voice: (pitch, velocity, start, duration, length)}"""
+    grouped = {}
+    for track in tracks:
+        if len(track):
+            grouped.setdefault(voice_for(track.program), []).append(track)
+    notes = {}
+    for voice, voice_tracks in grouped.items():
+        start = np.concatenate([t.start for t in voice_tracks])
+        # In start order, so each synthesis batch covers a short stretch of time
+        order = np.argsort(start, kind="stable")
+        start = start[order]
+        duration = np.maximum(np.concatenate([t.end for t in voice_tracks])[order] - start, 0.01)
+        notes[voice] = (np.concatenate([t.pitch for t in voice_tracks])[order],
+                        np.concatenate([t.velocity for t in voice_tracks])[order],
+                        start, duration, _note_length(voice, duration))
+    return notes
+
+
+def _end_time(notes):
+    return max(float((start + length).max()) for _, _, start, _, length in notes.values())
+
+
+def _batches(num_samples):
+    """Split consecutive notes into batches of at most MAX_BATCH_SAMPLES total samples"""
+    ends = np.cumsum(num_samples)
+    lo = 0
+    while lo < len(ends):
+        limit = (ends[lo - 1] if lo else 0) + MAX_BATCH_SAMPLES
+        hi = max(int(np.searchsorted(ends, limit, side="right")), lo + 1)
+        yield lo, hi
+        lo = hi
+
+
+def _mix_voice(out, voice, notes, sample_rate, offset_samples):
+    pitch, velocity, start, duration, length = notes
+    table = wavetable(voice.harmonics)
+
+    # 32-bit phase accumulator per note: wraps around exactly once per cycle
+    freq = 440.0 * 2.0 ** ((pitch - 69) / 12.0)
+    increment = np.round(freq * (2.0 ** 32 / sample_rate)).astype(np.uint32)
+    first_sample = np.round(start * sample_rate).astype(np.int64) - offset_samples
+    note_off = np.round(duration * sample_rate).astype(np.int32)
+    num_samples = np.ceil(length * sample_rate).astype(np.int64)
+    amplitude = (velocity * (voice.gain / 127.0)).astype(np.float32)
+
+    for lo, hi in _batches(num_samples):
+        counts = num_samples[lo:hi]
+        offsets = np.cumsum(counts) - counts
+        # Sample index within its note; per-note values are expanded with
+        # np.repeat, which is much cheaper than gathering through a note index
+        n = np.arange(offsets[-1] + counts[-1], dtype=np.uint32) - np.repeat(offsets.astype(np.uint32), counts)
+        signal = table[(n * np.repeat(increment[lo:hi], counts)) >> PHASE_SHIFT]
+
+        # Envelope and noise burst depend only on the sample index, so they
+        # are computed once per batch up to the longest note and looked up
+        t = np.arange(int(counts.max()), dtype=np.float32) / np.float32(sample_rate)
+        shape = np.minimum(t / np.float32(voice.attack), np.float32(1.0))
+        shape *= np.float32(voice.sustain) + np.float32(1.0 - voice.sustain) * \
+            np.exp(-t / np.float32(voice.decay))
+        release = np.exp(-t / np.float32(voice.release))
+        signal *= shape[n]
+        # Exponential release after note off
+        since_off = n.view(np.int32) - np.repeat(note_off[lo:hi], counts)
+        signal *= release[np.clip(since_off, 0, len(release) - 1)]
+        if voice.noise:
+            burst = _noise_table()[np.arange(len(t)) % NOISE_SIZE] * \
+                (np.float32(voice.noise) * np.exp(-t / np.float32(voice.noise_decay)))
+            signal += burst[n]
+        signal *= np.repeat(amplitude[lo:hi], counts)
+
+        # Scatter-add the batch into the stretch of `out` it covers
+        first = int(first_sample[lo:hi].min())
+        last = int((first_sample[lo:hi] + counts).max())
+        position = n + np.repeat(first_sample[lo:hi] - first, counts)
+        if first < 0 or last > len(out):
+            inside = (position >= -first) & (position < len(out) - first)
+            position, signal = position[inside], signal[inside]
+        mixed = np.bincount(position, weights=signal, minlength=last - first)
+        lo_out, hi_out = max(first, 0), min(last, len(out))
+        if hi_out > lo_out:
+            out[lo_out:hi_out] += mixed[lo_out - first:hi_out - first]
+
+
+def mix_notes(out, tracks, sample_rate, offset_samples=0):
+    """Add all notes of `tracks` into the float64 buffer `out`
+
+    Sample 0 of `out` is absolute sample `offset_samples`; samples falling
+    outside the buffer are dropped. Notes are synthesized one voice at a time,
+    all notes of a voice together.
+    """
+    for voice, notes in _gather_notes(tracks).items():
+        _mix_voice(out, voice, notes, sample_rate, offset_samples)
+    return out
+
+
+def clip_tracks(tracks, end_time):
+    """The tracks with only the notes that start before `end_time`"""
+    clipped = []
+    for track in tracks:
+        keep = track.start < end_time
+        clipped.append(make_track(track.name, track.program, track.pitch[keep], track.velocity[keep],
+                                  track.start[keep], track.end[keep]))
+    return clipped
+
+
+def to_pcm16(mix):
+    """Soft-clipped 16-bit little-endian PCM bytes"""
+    return (np.tanh(mix * MASTER_GAIN) * 32767).astype("<i2").tobytes()
+
+
+def wav_header(sample_rate, data_bytes=None):
+    """RIFF/WAVE header for 16-bit mono PCM; unknown length (streaming) uses the maximum size"""
+    data_bytes = 0xFFFFFFFF - 36 if data_bytes is None else data_bytes
+    return struct.pack("<4sI4s4sIHHIIHH4sI", b"RIFF", 36 + data_bytes, b"WAVE", b"fmt ", 16,
+                       1, 1, sample_rate, sample_rate * 2, 2, 16, b"data", data_bytes)
+
+
+def render_pcm(tracks, sample_rate=DEFAULT_SAMPLE_RATE):
+    """Render a whole piece to 16-bit mono PCM bytes"""
+    notes = _gather_notes(tracks)
+    if not notes:
+        return b""
+    total = int(np.ceil(_end_time(notes) * sample_rate))
+    return to_pcm16(mix_notes(np.zeros(total), tracks, sample_rate))
+
+
+def render_wav(tracks, sample_rate=DEFAULT_SAMPLE_RATE):
+    pcm = render_pcm(tracks, sample_rate)
+    return wav_header(sample_rate, len(pcm)) + pcm
+
+
+class AudioStream:
+    """Incremental renderer for streamed pieces
+
+    `add(tracks, watermark)` mixes a chunk of notes and returns the PCM for
+    everything before `watermark` (the stream guarantees later chunks start
+    no earlier). Only the ringing tails of recent notes are kept buffered.
+    """
+
+    def __init__(self, sample_rate=DEFAULT_SAMPLE_RATE):
+        self.sample_rate = sample_rate
+        self.emitted = 0
+        self.buffer = np.zeros(0)
+
+    def add(self, tracks, watermark):
+        notes = _gather_notes(tracks)
+        if notes:
+            end = int(np.ceil(_end_time(notes) * self.sample_rate)) - self.emitted
+            if end > len(self.buffer):
+                self.buffer = np.concatenate([self.buffer, np.zeros(end - len(self.buffer))])
+            mix_notes(self.buffer, tracks, self.sample_rate, self.emitted)
+        return self._pop(int(watermark * self.sample_rate) - self.emitted)
+
+    def _pop(self, count):
+        count = max(0, count)
+        if count > len(self.buffer):
+            self.buffer = np.concatenate([self.buffer, np.zeros(count - len(self.buffer))])
+        block, self.buffer = self.buffer[:count], self.buffer[count:]
+        self.emitted += count
+        return to_pcm16(block)
+
+    def flush(self):
+        return self._pop(len(self.buffer))
+
+
+def iter_wav_stream(chunks, sample_rate=DEFAULT_SAMPLE_RATE, end_time=None):
+    """WAV header then PCM blocks for (lanes, watermark) chunks
+
+    With `end_time`, notes starting at or after it are dropped (the others
+    ring out), so the PCM matches render_pcm of the clipped notes.
+    """
+    yield wav_header(sample_rate)
+    stream = AudioStream(sample_rate)
+    end_time = float("inf") if end_time is None else end_time
+    for lanes, watermark in chunks:
+        block = stream.add(clip_tracks(lanes.values(), end_time), min(watermark, end_time))
+        if block:
+            yield block
+    block = stream.flush()
+    if block:
+        yield block
@@ -0,0 +1,214 @@
+# Dynamic request batching for the music model
+# Concurrent /generate_music requests are merged into one batched decoder so
+# each timestep costs a single forward pass for every in-flight request.
+# Requests can join or leave the batch between any two timesteps.
+import queue
+import threading
+import time
+from concurrent.futures import Future
+
+import numpy as np
+
+from sampling import sample_batch
+
+
+class DynamicBatcher:
+    """Continuous batching scheduler in front of the stateful decoder
+
+    Each submitted session must expose `pattern` (its start window), `done`,
+    its sampling settings (`temp`, `top_k`, `top_p`, `rng`) and
+    `advance(note_index) -> token` and `result()`, so genre, temperature and raga
+    constraints stay per request while the LSTM step and sampling are shared.
+
+    A session with a `resume` attribute of (decoder row state, token) skips
+    priming: the saved row is restored and the pending token fed instead. A
+    session with `keep_state` set gets the same pair back as `final_state`
+    when it finishes, so it can be continued later.
+    """
+
+    def __init__(self, decoder_factory, max_batch_size=32, max_wait_ms=5.0):
+        self.decoder_factory = decoder_factory
+        self.max_batch_size = max_batch_size
+        self.max_wait = max_wait_ms / 1000.0
+        self._pending = queue.Queue()
+        self._thread = None
+        self._lock = threading.Lock()
+        self.steps = 0
+        self.rows_processed = 0
+
+    def start(self):
+        with self._lock:
+            if self._thread is None or not self._thread.is_alive():
+                self._thread = threading.Thread(target=self._run, name="music-batcher", daemon=True)
+                self._thread.start()
+
+    def submit(self, session):
+        """Queue a session and return a Future with its generated notes"""
+        future = Future()
+        self.start()
+        self._pending.put((session, future))
+        return future
+
+    def generate(self, session, timeout=None):
+        """Blocking helper used by the request handlers"""
+        return self.submit(session).result(timeout)
+
+    @property
+    def queue_depth(self):
+        return self._pending.qsize()
+
+    def stats(self):
+        mean_batch = self.rows_processed / self.steps if self.steps else 0.0
+        return {
+            "steps": self.steps,
+            "rows_processed": self.rows_processed,
+            "mean_batch_size": round(mean_batch, 2),
+            "queue_depth": self.queue_depth,
+        }
+
+    def _collect(self, capacity, block):
+        """Take up to `capacity` waiting requests
+
+        When the batch is idle we block for the first request and then hold the
+        wait window open so near-simultaneous requests share the batch. While a
+        batch is running, new arrivals are admitted without waiting.
+        """
+        items = []
+        try:
+            items.append(self._pending.get() if block else self._pending.get_nowait())
+        except queue.Empty:
+            return items
+        deadline = time.monotonic() + self.max_wait if block else 0
+        while len(items) < capacity:
+            try:
+                remaining = deadline - time.monotonic()
+                if remaining > 0:
+                    items.append(self._pending.get(timeout=remaining))
+                else:
+                    items.append(self._pending.get_nowait())
+            except queue.Empty:
+                break
+        return items
+
+    def _prime(self, items):
+        """Prime new sessions (grouped by start length) and return decoder rows + probabilities"""
+        groups = {}
+        for session, future in items:
+            if not future.set_running_or_notify_cancel():
+                continue
+            try:
+                if session.done:
+                    future.set_result(session.result())
+                    continue
+            except Exception as e:
+                future.set_exception(e)
+                continue
+            # Resumed sessions form their own group (key None)
+            key = None if getattr(session, "resume", None) is not None else len(session.pattern)
+            groups.setdefault(key, []).append((session, future))
+
+        primed = []
+        for key, group in groups.items():
+            decoder = self.decoder_factory()
+            try:
+                if key is None:
+                    decoder.restore([session.resume[0] for session, _ in group])
+                    probs = decoder.step([session.resume[1] for session, _ in group])
+                else:
+                    probs = decoder.prime([session.pattern for session, _ in group])
+            except Exception as e:
+                for _, future in group:
+                    future.set_exception(e)
+                continue
+            primed.append((decoder, probs, group))
+        return primed
+
+    @staticmethod
+    def _sample(probs, sessions):
+        """One vectorized sampling call with per-request settings"""
+        top_k = [session.top_k or 0 for session in sessions]
+        top_p = [1.0 if session.top_p is None else session.top_p for session in sessions]
+        return sample_batch(
+            probs,
+            [session.temp for session in sessions],
+            # None skips truncate_logits' argsort when no request truncates
+            top_k=top_k if any(top_k) else None,
+            top_p=top_p if any(p != 1.0 for p in top_p) else None,
+            rng=[session.rng for session in sessions]
+        )
+
+    def _sample_rows(self, probs, active):
+        """Sample row by row after a batched call failed, failing only the
+        sessions whose settings raise; their index is None"""
+        note_indices = []
+        for row, (session, future) in enumerate(active):
+            try:
+                note_indices.append(self._sample(probs[row:row + 1], [session])[0])
+            except Exception as e:
+                future.set_exception(e)
+                note_indices.append(None)
+        return note_indices
+
+    def _run(self):
+        decoder = None
+        probs = None
+        active = []
+        while True:
+            try:
+                capacity = self.max_batch_size - len(active)
+                if capacity > 0:
+                    for new_decoder, new_probs, group in self._prime(self._collect(capacity, block=not active)):
+                        if decoder is None:
+                            decoder, probs = new_decoder, new_probs
+                        else:
+                            decoder.append(new_decoder)
+                            probs = np.concatenate([probs, new_probs])
+                        active.extend(group)
+                if not active:
+                    continue
+
+                # Sample every row at once, then apply per-request constraints
+                # on each row of the batch. Bad settings raise before any noise
+                # is drawn, so the row-by-row retry makes the same draws.
+                try:
+                    note_indices = self._sample(probs, [session for session, _ in active])
+                except Exception:
+                    note_indices = self._sample_rows(probs, active)
+                keep = []
+                tokens = []
+                for row, (session, future) in enumerate(active):
+                    if note_indices[row] is None:
+                        continue
+                    try:
+                        token = session.advance(note_indices[row])
+                        if session.done:
+                            if getattr(session, "keep_state", False):
+                                # The last token has not been fed yet; it is fed on resume
+                                session.final_state = (decoder.row_state(row), token)
+                            future.set_result(session.result())
+                            continue
+                    except Exception as e:
+                        future.set_exception(e)
+                        continue
+                    keep.append(row)
+                    tokens.append(token)
+
+                if len(keep) < len(active):
+                    active = [active[row] for row in keep]
+                    if not active:
+                        decoder, probs = None, None
+                        continue
+                    decoder.select(keep)
+
+                # One forward pass for every in-flight request
+                probs = decoder.step(tokens)
+                self.steps += 1
+                self.rows_processed += len(active)
+            except Exception as e:
+                # Never let one bad batch kill the thread: fail the requests in
+                # it and keep serving the queue
+                print(f"Batch step failed: {e}")
+                for _, future in active:
+                    if not future.done():
+                        future.set_exception(e)
+                decoder, probs, active = None, None, []
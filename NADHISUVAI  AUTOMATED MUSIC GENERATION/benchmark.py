@@ -0,0 +1,207 @@
+# Reproducible benchmark of the generation pipeline, stage by stage
+# Runs the same stages as /generate_music (start sequence, LSTM prime and
+# steps, sampling, raga snapping, track synthesis, MIDI encoding) for every
+# genre in RAGAS and a range of note counts. A deterministic stub model with
+# the real input/output shapes stands in for the .h5 weights, so the suite runs
+# anywhere. Results are written as JSON; --compare flags stages that got slower
+# than a previous run.
+#
+# Example:
+#   python benchmark.py --sizes 100,1000,10000,100000 --output bench.json
+#   python benchmark.py --compare bench.json --threshold 1.25
+import argparse
+import io
+import json
+import os
+import platform
+import subprocess
+import sys
+import time
+from datetime import datetime, timezone
+
+import numpy as np
+
+from lstm_decoder import WindowedDecoder
+from numpy_backend import stub_model
+from sampling import sample_batch
+from smf_encoder import encode_smf
+from track_builder import build_model_tracks, tracks_to_pretty_midi
+
+STAGES = ("start_sequence", "prime", "step", "sample", "advance", "render", "tracks", "encode")
+
+
+def run_once(model, genre, num_notes, seed, decoder_kind, include_pretty_midi):
+    """Time one piece; returns ({stage: seconds}, midi_bytes)"""
+    import sample_code
+
+    timings = dict.fromkeys(STAGES, 0.0)
+    clock = time.perf_counter
+
+    t = clock()
+    rng = np.random.default_rng(seed)
+    start_sequence = sample_code.make_start_sequence(genre, rng)
+    session = sample_code.GenreNoteSession(start_sequence, num_notes, genre=genre,
+                                           temperature=sample_code.default_temperature(genre),
+                                           rng=rng)
+    timings["start_sequence"] = clock() - t
+
+    t = clock()
+    decoder = model.decoder() if decoder_kind == "stateful" else WindowedDecoder(model)
+    prediction = decoder.prime([session.pattern])
+    timings["prime"] = clock() - t
+
+    while not session.done:
+        t0 = clock()
+        note_index = sample_batch(prediction, session.temp, session.top_k, session.top_p,
+                                  rng=session.rng)[0]
+        t1 = clock()
+        token = session.advance(note_index)
+        t2 = clock()
+        timings["sample"] += t1 - t0
+        timings["advance"] += t2 - t1
+        if not session.done:
+            prediction = decoder.step([token])
+            timings["step"] += clock() - t2
+
+    t = clock()
+    notes = session.result()
+    timings["render"] = clock() - t
+
+    t = clock()
+    tracks = build_model_tracks(notes, session.profile, genre, rng=rng)
+    timings["tracks"] = clock() - t
+
+    t = clock()
+    data = encode_smf(tracks)
+    timings["encode"] = clock() - t
+
+    if include_pretty_midi:
+        # The previous object-based path, for comparison
+        t = clock()
+        buffer = io.BytesIO()
+        tracks_to_pretty_midi(tracks).write(buffer)
+        timings["pretty_midi"] = clock() - t
+    return timings, data
+
+
+def run_benchmark(args):
+    import sample_code
+
+    model = stub_model(args.hidden_size, args.layers, seed=args.seed)
+    genres = args.genres or list(sample_code.RAGAS)
+    # Warm-up so first-call costs (imports, BLAS init) are not charged to a genre
+    run_once(model, genres[0], 50, args.seed, args.decoder, args.pretty_midi)
+
+    results = []
+    for num_notes in args.sizes:
+        for genre in genres:
+            best = None
+            for _ in range(args.repeat):
+                timings, data = run_once(model, genre, num_notes, args.seed,
+                                         args.decoder, args.pretty_midi)
+                # Keep the fastest time per stage across repeats
+                best = timings if best is None else {k: min(v, timings[k]) for k, v in best.items()}
+            total = sum(v for k, v in best.items() if k != "pretty_midi")
+            results.append({
+                "genre": genre,
+                "num_notes": num_notes,
+                "midi_bytes": len(data),
+                "total_s": round(total, 6),
+                "stages": {
+                    stage: {"total_s": round(seconds, 6),
+                            "per_note_us": round(1e6 * seconds / num_notes, 3)}
+                    for stage, seconds in best.items()
+                },
+            })
+            print(f"{genre:<10} {num_notes:>7} notes  {1000 * total:9.1f} ms  "
+                  + "  ".join(f"{stage}={1000 * seconds:.1f}" for stage, seconds in best.items()),
+                  file=sys.stderr)
+    return {"meta": run_metadata(args), "results": results}
+
+
+def run_metadata(args):
+    try:
+        commit = subprocess.run(["git", "rev-parse", "HEAD"], capture_output=True, text=True,
+                                check=True).stdout.strip()
+    except (OSError, subprocess.CalledProcessError):
+        commit = None
+    return {
+        "timestamp": datetime.now(timezone.utc).isoformat(),
+        "commit": commit,
+        "python": platform.python_version(),
+        "numpy": np.__version__,
+        "platform": platform.platform(),
+        "processor": platform.processor(),
+        "decoder": args.decoder,
+        "stub_model": {"hidden_size": args.hidden_size, "layers": args.layers, "seed": args.seed},
+        "repeat": args.repeat,
+    }
+
+
+def compare(current, baseline, threshold, min_seconds=1e-3):
+    """Stages whose time grew by more than `threshold`x against the baseline"""
+    previous = {(r["genre"], r["num_notes"]): r for r in baseline["results"]}
+    regressions = []
+    for result in current["results"]:
+        old = previous.get((result["genre"], result["num_notes"]))
+        if old is None:
+            continue
+        for stage, timing in result["stages"].items():
+            old_seconds = old["stages"].get(stage, {}).get("total_s")
+            # Ignore stages too fast to time reliably
+            if not old_seconds or old_seconds < min_seconds:
+                continue
+            ratio = timing["total_s"] / old_seconds
+            if ratio > threshold:
+                regressions.append({"genre": result["genre"], "num_notes": result["num_notes"],
+                                    "stage": stage, "baseline_s": old_seconds,
+                                    "current_s": timing["total_s"], "ratio": round(ratio, 3)})
+    return regressions
+
+
+def main(argv=None):
+    parser = argparse.ArgumentParser(description="Benchmark the music generation pipeline")
+    parser.add_argument("--sizes", type=lambda s: [int(x) for x in s.split(",")],
+                        default=[100, 1000, 10000, 100000], help="comma-separated note counts")
+    parser.add_argument("--genres", type=lambda s: s.split(","), default=None,
+                        help="comma-separated genres (default: every genre in RAGAS)")
+    parser.add_argument("--repeat", type=int, default=3)
+    parser.add_argument("--seed", type=int, default=0)
+    parser.add_argument("--decoder", choices=["stateful", "windowed"], default="stateful",
+                        help="windowed re-runs predict on the whole window every step")
+    parser.add_argument("--hidden-size", type=int, default=256)
+    parser.add_argument("--layers", type=int, default=2)
+    parser.add_argument("--pretty-midi", action="store_true",
+                        help="also time building and writing a PrettyMIDI object")
+    parser.add_argument("--output", help="write the JSON report here instead of stdout")
+    parser.add_argument("--compare", help="baseline JSON report to check for regressions")
+    parser.add_argument("--threshold", type=float, default=1.25,
+                        help="slowdown ratio that counts as a regression")
+    args = parser.parse_args(argv)
+
+    # Benchmark the library code only: no weights, no warm pool threads. Set
+    # here rather than at import so importing this module changes nothing.
+    os.environ["MUSIC_MODEL_BACKEND"] = "none"
+    os.environ["WARM_POOL_SIZE"] = "0"
+    report = run_benchmark(args)
+    if args.compare:
+        with open(args.compare, encoding="utf-8") as f:
+            report["regressions"] = compare(report, json.load(f), args.threshold)
+
+    text = json.dumps(report, indent=2)
+    if args.output:
+        with open(args.output, "w", encoding="utf-8") as f:
+            f.write(text + "\n")
+    else:
+        print(text)
+
+    if report.get("regressions"):
+        for r in report["regressions"]:
+            print(f"REGRESSION {r['genre']} {r['num_notes']} notes {r['stage']}: "
+                  f"{r['baseline_s']:.4f}s -> {r['current_s']:.4f}s ({r['ratio']}x)", file=sys.stderr)
+        return 1
+    return 0
+
+
+if __name__ == "__main__":
+    sys.exit(main())
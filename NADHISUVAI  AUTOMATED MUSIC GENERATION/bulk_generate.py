@@ -0,0 +1,275 @@
+# Bulk corpus generation for offline backing-track batches
+# Spreads generation over a process pool (each worker loads the model once),
+# streams the pieces into zip/tar archive parts and records every piece in a
+# JSONL manifest. An archive part is only committed to the manifest once it is
+# closed, so a killed job resumes from the last closed part.
+#
+# Example:
+#   python bulk_generate.py --counts jazz=500,rock=500 --seed-start 1000 \
+#       --num-notes 200-400 --workers 8 --output-dir corpus --format zip
+import argparse
+import hashlib
+import io
+import json
+import os
+import sys
+import tarfile
+import time
+import zipfile
+from concurrent.futures import FIRST_COMPLETED, ProcessPoolExecutor, wait
+
+MANIFEST_NAME = "manifest.jsonl"
+
+
+def init_worker():
+    """Load the model once per worker process"""
+    os.environ["WARM_POOL_SIZE"] = "0"
+    import sample_code  # noqa: F401
+
+
+def generate_piece(job):
+    """Generate one piece in a worker, timing each stage
+
+    Mirrors generate_model_midi / generate_fallback_midi so the same
+    (genre, seed, params) produces the same piece as the HTTP service.
+    """
+    import numpy as np
+    import sample_code
+    from smf_encoder import encode_smf
+    from track_builder import build_direct_tracks, build_model_tracks
+
+    genre = job["genre"]
+    if job["temperature"] is None:
+        job = dict(job, temperature=sample_code.default_temperature(genre))
+    timings = {}
+    t0 = time.perf_counter()
+    rng = np.random.default_rng(job["seed"])
+    profile = sample_code.get_genre_profile(genre)
+
+    if sample_code.model is not None:
+        start_sequence = sample_code.make_start_sequence(genre, rng)
+        notes = sample_code.generate_notes_based_on_genre(
+            sample_code.model, start_sequence, job["num_notes"],
+            genre=genre, temperature=job["temperature"], rng=rng
+        )
+        t1 = time.perf_counter()
+        tracks = build_model_tracks(notes, profile, genre, rng=rng)
+        source = "model"
+    else:
+        t1 = time.perf_counter()
+        tracks = build_direct_tracks(profile, genre, rng=rng, num_notes=job["num_notes"])
+        source = "direct"
+    t2 = time.perf_counter()
+    data = encode_smf(tracks)
+    t3 = time.perf_counter()
+
+    timings["decode"] = t1 - t0
+    timings["tracks"] = t2 - t1
+    timings["encode"] = t3 - t2
+    return job, data, source, sample_code.MODEL_VERSION, timings
+
+
+def parse_counts(text):
+    """'jazz=100,rock=50' -> {'jazz': 100, 'rock': 50}"""
+    counts = {}
+    for item in text.split(","):
+        genre, _, count = item.partition("=")
+        if not genre.strip() or not count.strip():
+            raise argparse.ArgumentTypeError(f"Invalid genre count '{item}', expected genre=count")
+        counts[genre.strip().lower()] = int(count)
+    return counts
+
+
+def parse_range(text):
+    """'200' -> (200, 200), '200-400' -> (200, 400)"""
+    low, _, high = text.partition("-")
+    low = int(low)
+    high = int(high) if high else low
+    if high < low:
+        raise argparse.ArgumentTypeError(f"Invalid range '{text}'")
+    return low, high
+
+
+def job_key(job):
+    """Hash of every generation parameter; what resuming matches on"""
+    params = {name: job[name] for name in ("genre", "seed", "num_notes", "temperature")}
+    payload = json.dumps(params, sort_keys=True, separators=(",", ":"))
+    return hashlib.sha256(payload.encode("utf-8")).hexdigest()
+
+
+def build_jobs(counts, seed_start, num_notes_range, temperature):
+    low, high = num_notes_range
+    jobs = []
+    for genre, count in counts.items():
+        for seed in range(seed_start, seed_start + count):
+            job = {
+                "id": f"{genre}_{seed}",
+                "genre": genre,
+                "seed": seed,
+                # Deterministic note count per seed within the requested range
+                "num_notes": low + seed % (high - low + 1),
+                "temperature": temperature,
+            }
+            job["key"] = job_key(job)
+            jobs.append(job)
+    return jobs
+
+
+def read_manifest(output_dir):
+    """Completed piece keys and the highest committed part number"""
+    done, last_part = set(), 0
+    path = os.path.join(output_dir, MANIFEST_NAME)
+    if not os.path.exists(path):
+        return done, last_part
+    with open(path, encoding="utf-8") as f:
+        for line in f:
+            line = line.strip()
+            if not line:
+                continue
+            try:
+                record = json.loads(line)
+            except json.JSONDecodeError:
+                continue  # torn last line from a killed job
+            # Records without a key predate it and are regenerated
+            if "key" in record:
+                done.add(record["key"])
+            last_part = max(last_part, record["part"])
+    return done, last_part
+
+
+class ArchivePart:
+    """One zip or tar archive part that pieces are streamed into"""
+
+    def __init__(self, path, archive_format):
+        self.path = path
+        self.format = archive_format
+        self.records = []
+        if archive_format == "zip":
+            self.archive = zipfile.ZipFile(path, "w", compression=zipfile.ZIP_DEFLATED)
+        else:
+            self.archive = tarfile.open(path, "w")
+
+    def add(self, member, data, record):
+        if self.format == "zip":
+            self.archive.writestr(zipfile.ZipInfo(member, time.localtime()[:6]), data)
+        else:
+            info = tarfile.TarInfo(member)
+            info.size = len(data)
+            info.mtime = int(time.time())
+            self.archive.addfile(info, io.BytesIO(data))
+        self.records.append(record)
+
+    def close(self):
+        self.archive.close()
+
+
+def run(args):
+    os.makedirs(args.output_dir, exist_ok=True)
+    jobs = build_jobs(args.counts, args.seed_start, args.num_notes, args.temperature)
+    done, part_number = read_manifest(args.output_dir)
+    pending = [job for job in jobs if job["key"] not in done]
+    print(f"{len(jobs)} pieces requested, {len(jobs) - len(pending)} already done, "
+          f"{len(pending)} to generate")
+    if not pending:
+        return
+
+    # Parts after the last committed one belong to a killed run; start them over
+    extension = "zip" if args.format == "zip" else "tar"
+    for name in os.listdir(args.output_dir):
+        if name.startswith("corpus-") and name.endswith(f".{extension}"):
+            try:
+                number = int(name[len("corpus-"):-len(extension) - 1])
+            except ValueError:
+                continue
+            if number > part_number:
+                os.remove(os.path.join(args.output_dir, name))
+
+    manifest = open(os.path.join(args.output_dir, MANIFEST_NAME), "a", encoding="utf-8")
+    stage_totals = {"decode": 0.0, "tracks": 0.0, "encode": 0.0, "archive": 0.0}
+    completed = 0
+    part = None
+    started = time.perf_counter()
+
+    def commit_part():
+        # Close the archive first, then record its pieces: the checkpoint
+        part.close()
+        for record in part.records:
+            manifest.write(json.dumps(record) + "\n")
+        manifest.flush()
+        os.fsync(manifest.fileno())
+
+    job_iter = iter(pending)
+    in_flight = set()
+    max_in_flight = args.workers * 4
+    with ProcessPoolExecutor(max_workers=args.workers, initializer=init_worker) as executor:
+        try:
+            while True:
+                for job in job_iter:
+                    in_flight.add(executor.submit(generate_piece, job))
+                    if len(in_flight) >= max_in_flight:
+                        break
+                if not in_flight:
+                    break
+                finished, in_flight = wait(in_flight, return_when=FIRST_COMPLETED)
+                for future in finished:
+                    job, data, source, model_version, timings = future.result()
+                    if part is None:
+                        part_number += 1
+                        part = ArchivePart(os.path.join(args.output_dir, f"corpus-{part_number:05d}.{extension}"),
+                                           args.format)
+                    t0 = time.perf_counter()
+                    member = f"{job['genre']}/{job['id']}.mid"
+                    part.add(member, data, dict(
+                        job,
+                        part=part_number,
+                        archive=os.path.basename(part.path),
+                        member=member,
+                        bytes=len(data),
+                        sha256=hashlib.sha256(data).hexdigest(),
+                        source=source,
+                        model_version=model_version,
+                        timings={k: round(v, 6) for k, v in timings.items()},
+                    ))
+                    timings["archive"] = time.perf_counter() - t0
+                    for stage, seconds in timings.items():
+                        stage_totals[stage] += seconds
+                    completed += 1
+
+                    if len(part.records) >= args.part_size:
+                        commit_part()
+                        part = None
+                    if completed % args.report_every == 0:
+                        rate = completed / (time.perf_counter() - started)
+                        print(f"{completed}/{len(pending)} pieces, {rate:.1f} pieces/sec")
+        finally:
+            if part is not None:
+                commit_part()
+            manifest.close()
+
+    elapsed = time.perf_counter() - started
+    print(f"Generated {completed} pieces in {elapsed:.1f}s ({completed / elapsed:.1f} pieces/sec)")
+    for stage, seconds in stage_totals.items():
+        print(f"  {stage:<8} {1000 * seconds / max(completed, 1):8.2f} ms/piece")
+
+
+def main(argv=None):
+    parser = argparse.ArgumentParser(description="Generate a corpus of NADHISUVAI pieces offline")
+    parser.add_argument("--counts", type=parse_counts, required=True,
+                        help="pieces per genre, e.g. jazz=100,rock=50")
+    parser.add_argument("--seed-start", type=int, default=0,
+                        help="first seed; each genre uses seeds seed-start .. seed-start+count-1")
+    parser.add_argument("--num-notes", type=parse_range, default=(200, 200),
+                        help="notes per piece, a number or a range like 200-400")
+    parser.add_argument("--temperature", type=float, default=None,
+                        help="sampling temperature (default: the genre's default)")
+    parser.add_argument("--workers", type=int, default=os.cpu_count() or 1)
+    parser.add_argument("--output-dir", default="corpus")
+    parser.add_argument("--format", choices=["zip", "tar"], default="zip")
+    parser.add_argument("--part-size", type=int, default=500,
+                        help="pieces per archive part (the checkpoint interval)")
+    parser.add_argument("--report-every", type=int, default=100)
+    run(parser.parse_args(argv))
+
+
+if __name__ == "__main__":
+    sys.exit(main())
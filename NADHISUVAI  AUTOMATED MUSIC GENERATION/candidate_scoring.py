@@ -0,0 +1,54 @@
+# Vectorized scoring of candidate note sequences
+# Best-of-K generation decodes several continuations at once; this ranks them
+# on a (candidates, notes) pitch matrix in a few array operations: how well
+# they stay in the raga, how often they land on the current chord and how
+# repetitive they are.
+import numpy as np
+
+WEIGHTS = {"raga": 1.0, "chord": 0.5, "repetition": 1.0}
+NGRAM = 4
+
+
+def _pitch_class_table(pitch_sets, shape):
+    """Boolean membership table over the 12 pitch classes for arrays of pitches"""
+    table = np.zeros(shape + (12,), dtype=bool)
+    pitch_sets = np.asarray(pitch_sets, dtype=np.int64)
+    index = np.indices(pitch_sets.shape)[:-1]
+    table[tuple(index) + (pitch_sets % 12,)] = True
+    return table
+
+
+def score_candidates(notes, profile, chord_sequence_indices, weights=WEIGHTS):
+    """Score each row of a (K, N) pitch matrix; returns a dict of (K,) arrays
+
+    raga        fraction of notes whose pitch class is in the raga
+    chord       fraction of notes in the chord of their step (chord i % len)
+    repetition  mean of the immediate-repeat rate and repeated n-gram rate
+    total       weighted raga + chord - repetition
+    """
+    notes = np.atleast_2d(np.asarray(notes, dtype=np.int64))
+    k, n = notes.shape
+    pitch_class = notes % 12
+
+    in_raga = _pitch_class_table(profile.raga, ())
+    raga = in_raga[pitch_class].mean(axis=1)
+
+    # (sequences, chords_per_sequence, 12) membership of every chord
+    chords = profile.chord_sequences
+    in_chord = _pitch_class_table(chords, chords.shape[:2])
+    steps = np.arange(n) % chords.shape[1]
+    sequence = np.asarray(chord_sequence_indices, dtype=np.int64)[:, None]
+    chord = in_chord[sequence, steps[None, :], pitch_class].mean(axis=1)
+
+    repeats = (np.diff(notes, axis=1) == 0).mean(axis=1) if n > 1 else np.zeros(k)
+    if n >= NGRAM:
+        # Encode each n-gram as one integer, then count duplicates per row
+        codes = sum(notes[:, i:n - NGRAM + 1 + i] << (7 * (NGRAM - 1 - i)) for i in range(NGRAM))
+        codes = np.sort(codes, axis=1)
+        repeated_ngrams = (np.diff(codes, axis=1) == 0).mean(axis=1) if codes.shape[1] > 1 else np.zeros(k)
+    else:
+        repeated_ngrams = np.zeros(k)
+    repetition = (repeats + repeated_ngrams) / 2
+
+    total = weights["raga"] * raga + weights["chord"] * chord - weights["repetition"] * repetition
+    return {"raga": raga, "chord": chord, "repetition": repetition, "total": total}
@@ -0,0 +1,76 @@
+# Decoder-state cache behind the "continue this piece" API
+# Every model piece is handed out with an opaque token. The token maps to the
+# state needed to keep decoding where the piece stopped (decoder row, pending
+# token, chord position, temperature, track clocks and rng state), so a
+# continuation costs only the new notes. Entries expire after a TTL and the
+# cache is bounded, dropping the least recently used entry first.
+import secrets
+import threading
+import time
+from collections import OrderedDict
+from typing import NamedTuple
+
+
+class Continuation(NamedTuple):
+    """Where a generated piece stopped"""
+    genre: str
+    temperature: float       # requested base temperature
+    temp: float              # current (varied) sampling temperature
+    chord_sequence_index: int
+    decoder_state: object    # one decoder row, see StatefulLSTMDecoder.row_state
+    token: int               # last sampled token, not fed to the decoder yet
+    clock: dict              # ModelTrackStream clocks; clock["position"] is the note count
+    rng_state: dict          # bit generator state after the piece
+
+
+class ContinuationCache:
+    def __init__(self, max_entries=4096, ttl_seconds=1800.0):
+        self.max_entries = max_entries
+        self.ttl = ttl_seconds
+        self._entries = OrderedDict()
+        self._lock = threading.Lock()
+        self.counters = {"hits": 0, "misses": 0, "expired": 0, "stores": 0, "evictions": 0}
+
+    def _expire(self, now):
+        # Caller holds the lock; entries are in insertion/use order, so
+        # expired ones cluster at the front
+        while self._entries:
+            token, (expires, _) = next(iter(self._entries.items()))
+            if expires > now:
+                break
+            del self._entries[token]
+            self.counters["expired"] += 1
+
+    def put(self, value, token=None):
+        """Store a value under a new token, or replace the value of `token`;
+        returns the token"""
+        if token is None:
+            token = secrets.token_urlsafe(16)
+        now = time.monotonic()
+        with self._lock:
+            self._expire(now)
+            self._entries[token] = (now + self.ttl, value)
+            self._entries.move_to_end(token)
+            self.counters["stores"] += 1
+            while len(self._entries) > self.max_entries:
+                self._entries.popitem(last=False)
+                self.counters["evictions"] += 1
+        return token
+
+    def get(self, token):
+        """Value for a token, or None if unknown or expired; a hit renews the TTL"""
+        now = time.monotonic()
+        with self._lock:
+            self._expire(now)
+            entry = self._entries.get(token)
+            if entry is None:
+                self.counters["misses"] += 1
+                return None
+            self._entries[token] = (now + self.ttl, entry[1])
+            self._entries.move_to_end(token)
+            self.counters["hits"] += 1
+            return entry[1]
+
+    def stats(self):
+        with self._lock:
+            return dict(self.counters, entries=len(self._entries))
@@ -0,0 +1,266 @@
+# MIDI corpus preprocessing into a memory-mapped token dataset
+# Parses a directory of MIDI files in parallel worker processes into pitch
+# tokens (the same 0-127 vocabulary the model samples from) and streams them
+# into one flat uint8 file. File boundaries go into an offsets array and each
+# genre (the top-level sub-directory of the corpus) gets a contiguous range of
+# files, so training reads 50-token windows straight out of the memory map.
+#
+# Layout of a dataset directory:
+#   tokens.u8     all tokens, uint8, genre by genre
+#   offsets.npy   int64 token offset of every file, plus the total at the end
+#   index.json    genre -> [first_file, end_file), file names, parse stats
+#
+# Example:
+#   python corpus_dataset.py build midi_corpus/ dataset/ --workers 16
+#   python corpus_dataset.py info dataset/
+import argparse
+import json
+import os
+import struct
+import sys
+from multiprocessing import Pool
+
+import numpy as np
+
+VOCAB_SIZE = 128
+TOKENS_NAME = "tokens.u8"
+OFFSETS_NAME = "offsets.npy"
+INDEX_NAME = "index.json"
+MIDI_EXTENSIONS = (".mid", ".midi")
+DRUM_CHANNEL = 9
+
+
+def _read_vlq(data, pos):
+    value = 0
+    while True:
+        byte = data[pos]
+        pos += 1
+        value = (value << 7) | (byte & 0x7F)
+        if byte < 0x80:
+            return value, pos
+
+
+def read_note_pitches(data, skip_drums=True):
+    """Pitches of all note-ons in a Standard MIDI File, in time order
+
+    A minimal SMF reader: only note-on events are kept, so it skips the
+    message objects a full MIDI library would build. Notes starting on the
+    same tick are ordered by pitch. Raises ValueError for malformed files.
+    """
+    if data[:4] != b"MThd":
+        raise ValueError("not a Standard MIDI File")
+    if len(data) < 14:
+        raise ValueError("truncated MIDI header")
+    header_length = struct.unpack(">I", data[4:8])[0]
+    pos = 8 + header_length
+    ticks, pitches = [], []
+    try:
+        while pos + 8 <= len(data):
+            chunk_type = data[pos:pos + 4]
+            chunk_length = struct.unpack(">I", data[pos + 4:pos + 8])[0]
+            pos += 8
+            end = min(pos + chunk_length, len(data))
+            if chunk_type != b"MTrk":
+                pos = end
+                continue
+            tick, running = 0, 0
+            while pos < end:
+                delta, pos = _read_vlq(data, pos)
+                tick += delta
+                status = data[pos]
+                if status >= 0x80:
+                    pos += 1
+                    if status < 0xF0:
+                        running = status
+                elif running:
+                    status = running
+                else:
+                    raise ValueError("running status without a status byte")
+
+                if status == 0xFF:
+                    length, pos = _read_vlq(data, pos + 1)
+                    pos += length
+                elif status in (0xF0, 0xF7):
+                    length, pos = _read_vlq(data, pos)
+                    pos += length
+                elif status & 0xF0 in (0xC0, 0xD0):
+                    pos += 1
+                else:
+                    if (status & 0xF0 == 0x90 and data[pos + 1] > 0
+                            and not (skip_drums and status & 0x0F == DRUM_CHANNEL)):
+                        ticks.append(tick)
+                        pitches.append(data[pos])
+                    pos += 2
+            pos = end
+    except IndexError:
+        raise ValueError("truncated MIDI data")
+
+    ticks = np.asarray(ticks, dtype=np.int64)
+    pitches = np.asarray(pitches, dtype=np.uint8)
+    return pitches[np.lexsort((pitches, ticks))]
+
+
+def _extract(path):
+    """Worker: (token bytes, error message) for one file"""
+    try:
+        with open(path, "rb") as f:
+            return read_note_pitches(f.read()).tobytes(), None
+    except (OSError, ValueError) as e:
+        return b"", f"{path}: {e}"
+
+
+def find_midi_files(corpus_dir):
+    """{genre: [paths]} with the genre taken from the top-level sub-directory"""
+    files = {}
+    for root, dirs, names in os.walk(corpus_dir):
+        dirs.sort()
+        relative = os.path.relpath(root, corpus_dir)
+        genre = "unknown" if relative == "." else relative.split(os.sep)[0].lower()
+        for name in sorted(names):
+            if name.lower().endswith(MIDI_EXTENSIONS):
+                files.setdefault(genre, []).append(os.path.join(root, name))
+    return files
+
+
+def build_dataset(corpus_dir, output_dir, workers=None, chunksize=32, min_tokens=1):
+    """Parse every MIDI file under `corpus_dir` into a dataset in `output_dir`"""
+    os.makedirs(output_dir, exist_ok=True)
+    files_by_genre = find_midi_files(corpus_dir)
+    offsets = [0]
+    names = []
+    genres = {}
+    errors = []
+    skipped = 0
+
+    with open(os.path.join(output_dir, TOKENS_NAME), "wb") as tokens_file, Pool(workers) as pool:
+        for genre, paths in files_by_genre.items():
+            first_file = len(names)
+            # imap keeps file order, so the dataset is reproducible
+            for path, (tokens, error) in zip(paths, pool.imap(_extract, paths, chunksize)):
+                if error is not None:
+                    errors.append(error)
+                    continue
+                if len(tokens) < min_tokens:
+                    skipped += 1
+                    continue
+                tokens_file.write(tokens)
+                offsets.append(offsets[-1] + len(tokens))
+                names.append(os.path.relpath(path, corpus_dir))
+            genres[genre] = [first_file, len(names)]
+            print(f"{genre}: {len(names) - first_file} files, "
+                  f"{offsets[-1] - offsets[first_file]} tokens")
+
+    np.save(os.path.join(output_dir, OFFSETS_NAME), np.asarray(offsets, dtype=np.int64))
+    with open(os.path.join(output_dir, INDEX_NAME), "w", encoding="utf-8") as f:
+        json.dump({"vocab_size": VOCAB_SIZE, "genres": genres, "files": names,
+                   "errors": errors, "skipped": skipped}, f)
+    if errors:
+        print(f"{len(errors)} files could not be parsed")
+    return TokenDataset(output_dir)
+
+
+class TokenDataset:
+    """Read-only view of a preprocessed corpus backed by a memory map"""
+
+    def __init__(self, path):
+        with open(os.path.join(path, INDEX_NAME), encoding="utf-8") as f:
+            self.index = json.load(f)
+        self.offsets = np.load(os.path.join(path, OFFSETS_NAME))
+        total = int(self.offsets[-1])
+        # np.memmap cannot map an empty file
+        self.tokens = (np.memmap(os.path.join(path, TOKENS_NAME), dtype=np.uint8, mode="r", shape=(total,))
+                       if total else np.zeros(0, dtype=np.uint8))
+
+    @property
+    def genres(self):
+        return list(self.index["genres"])
+
+    def __len__(self):
+        return len(self.tokens)
+
+    def file_range(self, genre=None):
+        if genre is None:
+            return 0, len(self.offsets) - 1
+        return tuple(self.index["genres"][genre])
+
+    def file_tokens(self, file_number):
+        """Tokens of one file, as a view into the memory map"""
+        return self.tokens[self.offsets[file_number]:self.offsets[file_number + 1]]
+
+    def windows(self, window=50, genre=None):
+        """Every (window + 1)-token slice of a genre as a zero-copy strided view
+
+        Row i is tokens[i:i + window + 1] of the genre's token range (windows
+        that straddle two files are included; use `batches` to avoid them).
+        """
+        first, end = self.file_range(genre)
+        tokens = self.tokens[self.offsets[first]:self.offsets[end]]
+        if len(tokens) <= window:
+            return np.zeros((0, window + 1), dtype=np.uint8)
+        return np.lib.stride_tricks.sliding_window_view(tokens, window + 1)
+
+    def _window_starts(self, window, genre):
+        # Per file: number of complete windows that stay inside the file
+        first, end = self.file_range(genre)
+        starts = self.offsets[first:end]
+        counts = np.maximum(self.offsets[first + 1:end + 1] - starts - window, 0)
+        return starts, np.cumsum(counts)
+
+    def num_windows(self, window=50, genre=None):
+        _, cumulative = self._window_starts(window, genre)
+        return int(cumulative[-1]) if len(cumulative) else 0
+
+    def batches(self, batch_size=64, window=50, genre=None, rng=None, shuffle=True):
+        """Yield (inputs, targets) batches: (batch, window) uint8 token windows
+        and the (batch,) token that follows each one
+
+        Windows never cross file boundaries. Each batch is gathered directly
+        from the memory map; nothing else is materialized.
+        """
+        rng = np.random.default_rng() if rng is None else rng
+        starts, cumulative = self._window_starts(window, genre)
+        total = int(cumulative[-1]) if len(cumulative) else 0
+        if total == 0:
+            return
+        view = np.lib.stride_tricks.sliding_window_view(self.tokens, window + 1)
+        order = rng.permutation(total) if shuffle else np.arange(total)
+        for i in range(0, total, batch_size):
+            k = order[i:i + batch_size]
+            # Map the k-th window to its file and position inside the file
+            file_index = np.searchsorted(cumulative, k, side="right")
+            before = np.where(file_index > 0, cumulative[file_index - 1], 0)
+            rows = view[starts[file_index] + (k - before)]
+            yield rows[:, :window], rows[:, window]
+
+
+def as_model_input(inputs):
+    """(batch, window) tokens -> the (batch, window, 1) float input the LSTM takes"""
+    return inputs.astype(np.float32)[:, :, None]
+
+
+def main(argv=None):
+    parser = argparse.ArgumentParser(description="Preprocess a MIDI corpus into a token dataset")
+    commands = parser.add_subparsers(dest="command", required=True)
+    build = commands.add_parser("build", help="parse a corpus directory")
+    build.add_argument("corpus_dir")
+    build.add_argument("output_dir")
+    build.add_argument("--workers", type=int, default=None)
+    build.add_argument("--chunksize", type=int, default=32)
+    build.add_argument("--min-tokens", type=int, default=51,
+                       help="drop files with fewer tokens (default: one 50-token window)")
+    info = commands.add_parser("info", help="summarize a dataset")
+    info.add_argument("dataset_dir")
+    args = parser.parse_args(argv)
+
+    if args.command == "build":
+        build_dataset(args.corpus_dir, args.output_dir, args.workers, args.chunksize, args.min_tokens)
+    else:
+        dataset = TokenDataset(args.dataset_dir)
+        print(f"{len(dataset)} tokens in {len(dataset.offsets) - 1} files")
+        for genre in dataset.genres:
+            first, end = dataset.file_range(genre)
+            print(f"  {genre:<12} {end - first:>7} files {dataset.num_windows(genre=genre):>10} windows")
+
+
+if __name__ == "__main__":
+    sys.exit(main())
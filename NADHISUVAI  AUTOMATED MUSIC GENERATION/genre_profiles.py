@@ -0,0 +1,97 @@
+# Compiled per-genre profiles
+# The raga, chord and instrument dictionaries in sample_code.py are compiled
+# once at startup into immutable array-backed profiles. Each profile carries a
+# 128-entry pitch -> raga-note lookup table, so snapping a whole generated
+# sequence to the raga is a single indexing operation.
+from dataclasses import dataclass
+
+import numpy as np
+
+NUM_PITCHES = 128
+
+
+def _frozen(values, dtype=np.int64):
+    array = np.array(values, dtype=dtype)
+    array.flags.writeable = False
+    return array
+
+
+def build_snap_table(raga):
+    """Pitch -> nearest raga note in the pitch's own octave
+
+    The pitch class is placed in octave 4 (48-59), the nearest raga note to it
+    is chosen and then shifted back by the pitch's octave. Ties resolve to the
+    lower raga note, like min() over the raga.
+    """
+    pitches = np.arange(NUM_PITCHES)
+    raga = np.asarray(raga)
+    distance = np.abs(raga[None, :] - ((pitches % 12) + 48)[:, None])
+    nearest = raga[np.argmin(distance, axis=1)]
+    table = nearest + (pitches // 12 - 4) * 12
+    return _frozen(np.clip(table, 0, NUM_PITCHES - 1))
+
+
+@dataclass(frozen=True)
+class GenreProfile:
+    genre: str
+    raga: np.ndarray
+    snap_table: np.ndarray
+    chord_sequences: np.ndarray   # (num_sequences, chords_per_sequence, notes_per_chord)
+    primary_instrument: str
+    primary_program: int
+    secondary_instrument: str
+    secondary_program: int
+    tanpura_program: int
+
+    @property
+    def root_note(self):
+        return int(self.raga[0])
+
+    def snap(self, note_indices):
+        """Snap an array of pitches to the raga in one vectorized lookup"""
+        return self.snap_table[np.asarray(note_indices, dtype=np.int64)]
+
+    def render_notes(self, note_indices, chord_sequence_index, rng, offset=0):
+        """Apply the raga/chord constraints to a whole sampled sequence
+
+        Every 7th note keeps its sampled pitch, the rest are snapped to the raga
+        and 30% of those are replaced by a tone of the current chord. `offset`
+        is the position of the first note, for rendering a piece in chunks.
+        """
+        note_indices = np.asarray(note_indices, dtype=np.int64)
+        steps = offset + np.arange(len(note_indices))
+        chords = self.chord_sequences[chord_sequence_index]
+
+        result = np.where(steps % 7 == 0, note_indices, self.snap(note_indices))
+        use_chord = (steps % 7 != 0) & (rng.random(len(steps)) < 0.3)
+        chord_notes = chords[steps % len(chords), rng.integers(0, chords.shape[1], len(steps))]
+        return np.where(use_chord, chord_notes, result)
+
+
+def compile_genre_profiles(ragas, chord_sequences_by_genre, primary_instrument_by_genre,
+                           secondary_instrument_by_genre, instruments, default_genre="melody"):
+    """Compile the genre dictionaries into {genre: GenreProfile}
+
+    The profile stored under None mirrors the fallbacks used for unknown
+    genres: the default genre's raga and chords with sitar and tabla.
+    """
+    def compile_one(genre, lookup_genre, primary_default, secondary_default):
+        raga = ragas.get(lookup_genre, ragas[default_genre])
+        chords = chord_sequences_by_genre.get(lookup_genre, chord_sequences_by_genre[default_genre])
+        primary = primary_instrument_by_genre.get(lookup_genre, primary_default)
+        secondary = secondary_instrument_by_genre.get(lookup_genre, secondary_default)
+        return GenreProfile(
+            genre=genre,
+            raga=_frozen(raga),
+            snap_table=build_snap_table(raga),
+            chord_sequences=_frozen(chords),
+            primary_instrument=primary,
+            primary_program=instruments[primary],
+            secondary_instrument=secondary,
+            secondary_program=instruments[secondary],
+            tanpura_program=instruments["tanpura"],
+        )
+
+    profiles = {genre: compile_one(genre, genre, "sitar", "tabla") for genre in ragas}
+    profiles[None] = compile_one(None, None, "sitar", "tabla")
+    return profiles
@@ -0,0 +1,273 @@
+# Incremental (stateful) decoding for the LSTM music model
+# Instead of re-running the whole 50-step window through the network for every
+# generated note, the decoder keeps each LSTM layer's hidden and cell state
+# and only feeds the newest token, so a request costs O(num_notes) LSTM steps.
+import numpy as np
+
+
+def _sigmoid(x):
+    # tanh form avoids overflow in exp for large negative inputs
+    return 0.5 * (1.0 + np.tanh(0.5 * x))
+
+
+def _hard_sigmoid(x):
+    return np.clip(0.2 * x + 0.5, 0.0, 1.0)
+
+
+def _softmax(x):
+    x = x - np.max(x, axis=-1, keepdims=True)
+    e = np.exp(x)
+    return e / np.sum(e, axis=-1, keepdims=True)
+
+
+ACTIVATIONS = {
+    "tanh": np.tanh,
+    "sigmoid": _sigmoid,
+    "hard_sigmoid": _hard_sigmoid,
+    "relu": lambda x: np.maximum(x, 0.0),
+    "linear": lambda x: x,
+    "softmax": _softmax,
+}
+
+
+def get_activation(name):
+    """Look up a Keras activation by name"""
+    if name not in ACTIVATIONS:
+        raise ValueError(f"Unsupported activation '{name}'")
+    return ACTIVATIONS[name]
+
+
+class LSTMLayer:
+    """Keras-compatible LSTM cell (gate order i, f, c, o)"""
+
+    def __init__(self, kernel, recurrent_kernel, bias,
+                 activation="tanh", recurrent_activation="sigmoid"):
+        self.kernel = np.asarray(kernel, dtype=np.float32)
+        self.recurrent_kernel = np.asarray(recurrent_kernel, dtype=np.float32)
+        self.bias = np.asarray(bias, dtype=np.float32)
+        self.units = self.recurrent_kernel.shape[0]
+        self.activation = get_activation(activation)
+        self.recurrent_activation = get_activation(recurrent_activation)
+
+    def initial_state(self, batch_size):
+        h = np.zeros((batch_size, self.units), dtype=np.float32)
+        c = np.zeros((batch_size, self.units), dtype=np.float32)
+        return [h, c]
+
+    def project_inputs(self, x):
+        """Input projection x @ W + b, can be done for a whole sequence at once"""
+        return x @ self.kernel + self.bias
+
+    def recurrent(self, h):
+        """Recurrent projection h @ U"""
+        return h @ self.recurrent_kernel
+
+    def step(self, projected_x, state):
+        """Advance one timestep from an already projected input"""
+        h, c = state
+        z = projected_x + self.recurrent(h)
+        u = self.units
+        i = self.recurrent_activation(z[:, :u])
+        f = self.recurrent_activation(z[:, u:2 * u])
+        g = self.activation(z[:, 2 * u:3 * u])
+        o = self.recurrent_activation(z[:, 3 * u:])
+        c = f * c + i * g
+        h = o * self.activation(c)
+        return h, [h, c]
+
+
+class DenseLayer:
+    """Fully connected layer with a named activation"""
+
+    def __init__(self, kernel, bias, activation="linear"):
+        self.kernel = np.asarray(kernel, dtype=np.float32)
+        self.bias = np.asarray(bias, dtype=np.float32)
+        self.activation = get_activation(activation)
+
+    def project(self, x):
+        return x @ self.kernel + self.bias
+
+    def __call__(self, x):
+        return self.activation(self.project(x))
+
+
+class ActivationLayer:
+    """Standalone activation layer"""
+
+    def __init__(self, activation):
+        self.activation = get_activation(activation)
+
+    def __call__(self, x):
+        return self.activation(x)
+
+
+def layers_from_keras(model):
+    """Convert a loaded Keras model into decoder layers
+
+    Dropout and InputLayer are no-ops at inference time and are skipped.
+    Raises ValueError for any layer type the decoder cannot reproduce.
+    """
+    layers = []
+    for layer in model.layers:
+        kind = type(layer).__name__
+        if kind in ("InputLayer", "Dropout"):
+            continue
+        if kind == "LSTM":
+            kernel, recurrent_kernel, bias = layer.get_weights()
+            layers.append(LSTMLayer(
+                kernel, recurrent_kernel, bias,
+                activation=layer.activation.__name__,
+                recurrent_activation=layer.recurrent_activation.__name__
+            ))
+        elif kind == "Dense":
+            kernel, bias = layer.get_weights()
+            layers.append(DenseLayer(kernel, bias, layer.activation.__name__))
+        elif kind == "Activation":
+            layers.append(ActivationLayer(layer.activation.__name__))
+        else:
+            raise ValueError(f"Layer type '{kind}' is not supported by the stateful decoder")
+    return layers
+
+
+class StatefulLSTMDecoder:
+    """Runs the music model one token at a time, carrying LSTM state between steps
+
+    The decoder works on a batch of independent sequences: `prime` consumes the
+    start sequences and returns the next-note distributions, then every call to
+    `step` feeds exactly one new token per row.
+    """
+
+    def __init__(self, layers):
+        self.layers = layers
+        self.lstm_indices = [i for i, l in enumerate(layers) if isinstance(l, LSTMLayer)]
+        if not self.lstm_indices:
+            raise ValueError("Model has no LSTM layer to decode with")
+        self.state = None
+
+    @classmethod
+    def from_keras(cls, model):
+        return cls(layers_from_keras(model))
+
+    @property
+    def batch_size(self):
+        return 0 if self.state is None else self.state[0][0].shape[0]
+
+    def _as_inputs(self, tokens):
+        # The model is trained on raw note indices with a single feature
+        return np.asarray(tokens, dtype=np.float32).reshape(-1, 1)
+
+    def _head(self, x):
+        # Layers after the last LSTM (dense / softmax) only see the final output
+        for layer in self.layers[self.lstm_indices[-1] + 1:]:
+            x = layer(x)
+        return x
+
+    def prime(self, sequences):
+        """Reset the state and consume whole start sequences of shape (batch, steps)"""
+        sequences = np.atleast_2d(np.asarray(sequences, dtype=np.float32))
+        batch_size, steps = sequences.shape
+        x = sequences.reshape(batch_size, steps, 1)
+        self.state = []
+        for layer in self.layers[:self.lstm_indices[-1] + 1]:
+            if isinstance(layer, LSTMLayer):
+                state = layer.initial_state(batch_size)
+                projected = layer.project_inputs(x)
+                outputs = np.empty((batch_size, steps, layer.units), dtype=np.float32)
+                for t in range(steps):
+                    outputs[:, t], state = layer.step(projected[:, t], state)
+                self.state.append(state)
+                x = outputs
+            else:
+                x = layer(x)
+        return self._head(x[:, -1])
+
+    def step(self, tokens):
+        """Feed one new token per row and return next-note probabilities (batch, vocab)"""
+        x = self._as_inputs(tokens)
+        lstm_pos = 0
+        for layer in self.layers[:self.lstm_indices[-1] + 1]:
+            if isinstance(layer, LSTMLayer):
+                x, self.state[lstm_pos] = layer.step(layer.project_inputs(x), self.state[lstm_pos])
+                lstm_pos += 1
+            else:
+                x = layer(x)
+        return self._head(x)
+
+    def select(self, rows):
+        """Keep only the given batch rows (used when requests finish)"""
+        self.state = [[h[rows], c[rows]] for h, c in self.state]
+
+    def append(self, other):
+        """Concatenate the rows of another primed decoder onto this batch"""
+        if self.state is None:
+            self.state = other.state
+        else:
+            self.state = [[np.concatenate([h, oh]), np.concatenate([c, oc])]
+                          for (h, c), (oh, oc) in zip(self.state, other.state)]
+
+    def row_state(self, row):
+        """Copy of one row's LSTM state, to resume it later with `restore`"""
+        return [[h[row:row + 1].copy(), c[row:row + 1].copy()] for h, c in self.state]
+
+    def restore(self, row_states):
+        """Replace the batch with previously saved rows"""
+        self.state = [[np.concatenate([s[layer][0] for s in row_states]),
+                       np.concatenate([s[layer][1] for s in row_states])]
+                      for layer in range(len(row_states[0]))]
+
+
+class WindowedDecoder:
+    """Fallback decoder with the same interface that re-runs `model.predict`
+
+    Used for models the stateful decoder cannot reproduce; it keeps the
+    sliding window of the last `sequence_length` tokens per row.
+    """
+
+    def __init__(self, model, sequence_length=50):
+        self.model = model
+        self.sequence_length = sequence_length
+        self.state = None
+
+    @property
+    def batch_size(self):
+        return 0 if self.state is None else self.state.shape[0]
+
+    def _predict(self):
+        x = self.state.reshape(self.state.shape[0], self.sequence_length, 1)
+        return self.model.predict(x, verbose=0)
+
+    def prime(self, sequences):
+        sequences = np.atleast_2d(np.asarray(sequences, dtype=np.float32))
+        self.state = sequences[:, -self.sequence_length:].copy()
+        return self._predict()
+
+    def step(self, tokens):
+        tokens = np.asarray(tokens, dtype=np.float32).reshape(-1, 1)
+        self.state = np.concatenate([self.state[:, 1:], tokens], axis=1)
+        return self._predict()
+
+    def select(self, rows):
+        self.state = self.state[rows]
+
+    def append(self, other):
+        if self.state is None:
+            self.state = other.state
+        else:
+            self.state = np.concatenate([self.state, other.state])
+
+    def row_state(self, row):
+        return self.state[row:row + 1].copy()
+
+    def restore(self, row_states):
+        self.state = np.concatenate(row_states)
+
+
+def build_decoder(model, sequence_length=50):
+    """Return a stateful decoder for the model, or the windowed fallback"""
+    if hasattr(model, "decoder"):
+        return model.decoder()
+    try:
+        return StatefulLSTMDecoder.from_keras(model)
+    except (ValueError, AttributeError) as e:
+        print(f"Stateful decoding unavailable ({e}), using windowed predict")
+        return WindowedDecoder(model, sequence_length)
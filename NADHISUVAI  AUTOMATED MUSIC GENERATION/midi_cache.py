@@ -0,0 +1,140 @@
+# Content-addressed cache for generated MIDI
+# Seeded generation is a deterministic function of (genre, seed, params,
+# model version), so the encoded bytes can be cached under a hash of those
+# inputs. A bounded in-memory LRU sits in front of an optional bounded on-disk
+# LRU directory; both evict least recently used entries first.
+import hashlib
+import json
+import os
+import threading
+from collections import OrderedDict
+
+
+# Bump when the rendering of a given note sequence changes, so stale entries
+# in a persistent disk cache are never served
+RENDER_VERSION = 2
+
+
+def make_cache_key(params, model_version):
+    """Stable hash of the generation inputs"""
+    payload = json.dumps({"params": params, "model_version": model_version,
+                          "render_version": RENDER_VERSION},
+                         sort_keys=True, separators=(",", ":"))
+    return hashlib.sha256(payload.encode("utf-8")).hexdigest()
+
+
+def file_digest(path, chunk_size=1 << 20):
+    """sha256 of a file, used to version the model weights"""
+    digest = hashlib.sha256()
+    with open(path, "rb") as f:
+        for chunk in iter(lambda: f.read(chunk_size), b""):
+            digest.update(chunk)
+    return digest.hexdigest()
+
+
+class MidiCache:
+    def __init__(self, max_memory_bytes=64 << 20, disk_dir=None, max_disk_bytes=1 << 30):
+        self.max_memory_bytes = max_memory_bytes
+        self.max_disk_bytes = max_disk_bytes
+        self.disk_dir = disk_dir
+        self._memory = OrderedDict()
+        self._memory_bytes = 0
+        self._disk = OrderedDict()
+        self._disk_bytes = 0
+        self._lock = threading.Lock()
+        self.counters = {"memory_hits": 0, "disk_hits": 0, "misses": 0,
+                         "stores": 0, "memory_evictions": 0, "disk_evictions": 0}
+        if disk_dir:
+            self._load_disk_index()
+
+    def _disk_path(self, key):
+        return os.path.join(self.disk_dir, f"{key}.mid")
+
+    def _load_disk_index(self):
+        # Rebuild the LRU order from file modification times
+        os.makedirs(self.disk_dir, exist_ok=True)
+        entries = []
+        for name in os.listdir(self.disk_dir):
+            if name.endswith(".mid"):
+                stat = os.stat(os.path.join(self.disk_dir, name))
+                entries.append((stat.st_mtime, name[:-4], stat.st_size))
+        for _, key, size in sorted(entries):
+            self._disk[key] = size
+            self._disk_bytes += size
+
+    def _remember(self, key, data):
+        # Caller holds the lock
+        if key in self._memory:
+            self._memory.move_to_end(key)
+            return
+        self._memory[key] = data
+        self._memory_bytes += len(data)
+        while self._memory_bytes > self.max_memory_bytes and len(self._memory) > 1:
+            _, evicted = self._memory.popitem(last=False)
+            self._memory_bytes -= len(evicted)
+            self.counters["memory_evictions"] += 1
+
+    def _store_disk(self, key, data):
+        # Caller holds the lock
+        if not self.disk_dir or key in self._disk:
+            return
+        path = self._disk_path(key)
+        tmp_path = f"{path}.{threading.get_ident()}.tmp"
+        try:
+            with open(tmp_path, "wb") as f:
+                f.write(data)
+            os.replace(tmp_path, path)
+        except OSError as e:
+            print(f"Could not write MIDI cache entry {key}: {e}")
+            return
+        self._disk[key] = len(data)
+        self._disk_bytes += len(data)
+        while self._disk_bytes > self.max_disk_bytes and len(self._disk) > 1:
+            evicted_key, size = self._disk.popitem(last=False)
+            self._disk_bytes -= size
+            self.counters["disk_evictions"] += 1
+            try:
+                os.remove(self._disk_path(evicted_key))
+            except OSError:
+                pass
+
+    def get(self, key):
+        with self._lock:
+            data = self._memory.get(key)
+            if data is not None:
+                self._memory.move_to_end(key)
+                self.counters["memory_hits"] += 1
+                return data
+            if key in self._disk:
+                try:
+                    with open(self._disk_path(key), "rb") as f:
+                        data = f.read()
+                    os.utime(self._disk_path(key))
+                except OSError:
+                    self._disk_bytes -= self._disk.pop(key)
+                else:
+                    self._disk.move_to_end(key)
+                    self.counters["disk_hits"] += 1
+                    self._remember(key, data)
+                    return data
+            self.counters["misses"] += 1
+            return None
+
+    def put(self, key, data):
+        with self._lock:
+            self.counters["stores"] += 1
+            self._remember(key, data)
+            self._store_disk(key, data)
+
+    def stats(self):
+        with self._lock:
+            lookups = self.counters["memory_hits"] + self.counters["disk_hits"] + self.counters["misses"]
+            hits = lookups - self.counters["misses"]
+            return dict(
+                self.counters,
+                hit_rate=round(hits / lookups, 4) if lookups else 0.0,
+                memory_entries=len(self._memory),
+                memory_bytes=self._memory_bytes,
+                disk_entries=len(self._disk),
+                disk_bytes=self._disk_bytes,
+            )
@@ -0,0 +1,43 @@
+# Time-ordered note events for streamed pieces
+# Lane chunks arrive together with a watermark (the lead clock). Notes that
+# start before the watermark are released sorted by start time; the few that
+# start later (offset secondary notes, rhythm and drone notes running past the
+# lead) wait in a small heap for the next chunk, so the event stream is
+# globally ordered while buffering stays bounded.
+import heapq
+import itertools
+
+
+def iter_note_events(chunks, end_time=None):
+    """Yield lists of note event dicts, in start order, from (lanes, watermark) chunks
+
+    `lanes` maps a lane name to a Track. Notes starting at or after `end_time`
+    are dropped.
+    """
+    pending = []
+    order = itertools.count()
+    end_time = float("inf") if end_time is None else end_time
+
+    def release(watermark):
+        batch = []
+        while pending and pending[0][0] < watermark:
+            batch.append(heapq.heappop(pending)[2])
+        return batch
+
+    for lanes, watermark in chunks:
+        for lane, track in lanes.items():
+            for pitch, velocity, start, end in zip(track.pitch.tolist(), track.velocity.tolist(),
+                                                   track.start.tolist(), track.end.tolist()):
+                if start >= end_time:
+                    continue
+                heapq.heappush(pending, (start, next(order), {
+                    "type": "note", "lane": lane, "program": track.program,
+                    "pitch": pitch, "velocity": velocity,
+                    "start": round(start, 4), "end": round(end, 4),
+                }))
+        batch = release(min(watermark, end_time))
+        if batch:
+            yield batch
+    batch = release(float("inf"))
+    if batch:
+        yield batch
@@ -0,0 +1,112 @@
+# TensorFlow-free inference backend for the music model
+# Reads the architecture and weights straight out of the Keras .h5 file with
+# h5py and runs the LSTM + dense softmax as vectorized NumPy, so a worker
+# process can start without importing TensorFlow at all.
+import json
+
+import h5py
+import numpy as np
+
+from lstm_decoder import ActivationLayer, DenseLayer, LSTMLayer, StatefulLSTMDecoder
+
+
+def _decode(value):
+    return value.decode("utf-8") if isinstance(value, bytes) else value
+
+
+def _activation_name(value, default):
+    # Keras 2 stores activations as plain names, newer versions as dicts
+    if value is None:
+        return default
+    if isinstance(value, dict):
+        return value.get("config", {}).get("name") or value.get("class_name", default)
+    return value
+
+
+def _layer_weights(weights_group, name):
+    """Return {short_name: array} for one layer, e.g. {'kernel': ..., 'bias': ...}"""
+    if name not in weights_group:
+        return {}
+    group = weights_group[name]
+    weights = {}
+    for weight_name in group.attrs.get("weight_names", []):
+        weight_name = _decode(weight_name)
+        short_name = weight_name.split("/")[-1].split(":")[0]
+        weights[short_name] = np.asarray(group[weight_name][()], dtype=np.float32)
+    return weights
+
+
+def read_keras_h5(path):
+    """Build decoder layers from a Keras HDF5 model file"""
+    with h5py.File(path, "r") as f:
+        config = json.loads(_decode(f.attrs["model_config"]))
+        weights_group = f["model_weights"] if "model_weights" in f else f
+        layer_configs = config["config"]
+        if isinstance(layer_configs, dict):
+            layer_configs = layer_configs["layers"]
+
+        layers = []
+        for layer_config in layer_configs:
+            kind = layer_config["class_name"]
+            cfg = layer_config["config"]
+            if kind in ("InputLayer", "Dropout"):
+                continue
+            weights = _layer_weights(weights_group, cfg["name"])
+            if kind == "LSTM":
+                layers.append(LSTMLayer(
+                    weights["kernel"], weights["recurrent_kernel"], weights["bias"],
+                    activation=_activation_name(cfg.get("activation"), "tanh"),
+                    recurrent_activation=_activation_name(cfg.get("recurrent_activation"), "sigmoid")
+                ))
+            elif kind == "Dense":
+                layers.append(DenseLayer(
+                    weights["kernel"], weights["bias"],
+                    _activation_name(cfg.get("activation"), "linear")
+                ))
+            elif kind == "Activation":
+                layers.append(ActivationLayer(_activation_name(cfg.get("activation"), "linear")))
+            else:
+                raise ValueError(f"Layer type '{kind}' is not supported by the NumPy backend")
+    return layers
+
+
+class NumpyMusicModel:
+    """Drop-in replacement for the Keras model in generate_notes_based_on_genre"""
+
+    def __init__(self, layers):
+        self.layers = layers
+
+    def decoder(self):
+        """Fresh stateful decoder sharing this model's weights"""
+        return StatefulLSTMDecoder(self.layers)
+
+    def predict(self, x, verbose=0):
+        """Keras-style predict on a (batch, steps, 1) window"""
+        x = np.asarray(x, dtype=np.float32)
+        return self.decoder().prime(x.reshape(x.shape[0], -1))
+
+
+def load_numpy_model(path):
+    return NumpyMusicModel(read_keras_h5(path))
+
+
+def stub_model(hidden_size=256, num_layers=2, vocab_size=128, seed=0):
+    """Deterministic stand-in for the music model
+
+    Same interface and shapes as the trained network: a (batch, 50, 1) window
+    of note indices in, a (batch, vocab_size) softmax out. Weights are seeded
+    random values scaled to keep the activations in a realistic range.
+    """
+    rng = np.random.default_rng(seed)
+    layers = []
+    input_size = 1
+    for _ in range(num_layers):
+        layers.append(LSTMLayer(
+            rng.normal(0, 1 / np.sqrt(input_size * 64), (input_size, 4 * hidden_size)),
+            rng.normal(0, 1 / np.sqrt(hidden_size), (hidden_size, 4 * hidden_size)),
+            np.zeros(4 * hidden_size),
+        ))
+        input_size = hidden_size
+    layers.append(DenseLayer(rng.normal(0, 1 / np.sqrt(hidden_size), (hidden_size, vocab_size)),
+                             np.zeros(vocab_size), "softmax"))
+    return NumpyMusicModel(layers)
@@ -0,0 +1,186 @@
+# Int8 weight quantization for the NumPy music model
+# Every LSTM and dense weight matrix is stored as int8 with one float32 scale
+# per output channel (symmetric max-abs), so a worker keeps a quarter of the
+# float32 weights resident. NumPy has no int8 GEMM: each step widens the
+# kernel one block of columns at a time, so the float32 scratch stays a few
+# hundred columns wide, and applies the per-channel scale to the output
+# afterwards, the same factorisation an int8 GEMM uses. Biases and LSTM state
+# stay float32.
+#
+# The evaluation harness runs the float and int8 models side by side on the
+# same token streams and reports how far the next-note distributions drift:
+#   python quantized_backend.py music_generation_model.h5 --rows 64 --steps 200
+#   python quantized_backend.py --stub --hidden-size 512
+import argparse
+import sys
+import time
+
+import numpy as np
+
+from lstm_decoder import DenseLayer, LSTMLayer
+from numpy_backend import NumpyMusicModel, read_keras_h5, stub_model
+
+QMAX = 127
+# Kernel columns widened to float32 at a time during a step
+DEQUANT_COLUMNS = 256
+
+
+def quantize_per_channel(weights):
+    """(int8 weights, float32 scale per column) with weights ~= q * scale"""
+    weights = np.asarray(weights, dtype=np.float32)
+    scale = np.abs(weights).max(axis=0) / QMAX
+    # All-zero columns would divide by zero; any scale reproduces them
+    scale[scale == 0] = 1.0
+    q = np.clip(np.rint(weights / scale), -QMAX, QMAX).astype(np.int8)
+    return q, scale.astype(np.float32)
+
+
+def dequantize(q, scale):
+    return q.astype(np.float32) * scale
+
+
+def _int8_matmul(x, q, scale):
+    """x @ (q * scale) for an int8 kernel with per-column scales
+
+    The scale factors out of every column, so (x @ q) * scale is exact. q is
+    widened DEQUANT_COLUMNS columns at a time and never copied whole.
+    """
+    out = np.empty(x.shape[:-1] + q.shape[1:], dtype=np.float32)
+    for start in range(0, q.shape[1], DEQUANT_COLUMNS):
+        block = slice(start, start + DEQUANT_COLUMNS)
+        np.matmul(x, q[:, block].astype(np.float32), out=out[..., block])
+    out *= scale
+    return out
+
+
+class QuantizedLSTMLayer(LSTMLayer):
+    """LSTMLayer with int8 input and recurrent kernels"""
+
+    def __init__(self, layer):
+        self.kernel_q, self.kernel_scale = quantize_per_channel(layer.kernel)
+        self.recurrent_q, self.recurrent_scale = quantize_per_channel(layer.recurrent_kernel)
+        self.bias = layer.bias
+        self.units = layer.units
+        self.activation = layer.activation
+        self.recurrent_activation = layer.recurrent_activation
+
+    def project_inputs(self, x):
+        return _int8_matmul(x, self.kernel_q, self.kernel_scale) + self.bias
+
+    def recurrent(self, h):
+        return _int8_matmul(h, self.recurrent_q, self.recurrent_scale)
+
+
+class QuantizedDenseLayer(DenseLayer):
+    """DenseLayer with an int8 kernel"""
+
+    def __init__(self, layer):
+        self.kernel_q, self.kernel_scale = quantize_per_channel(layer.kernel)
+        self.bias = layer.bias
+        self.activation = layer.activation
+
+    def project(self, x):
+        return _int8_matmul(x, self.kernel_q, self.kernel_scale) + self.bias
+
+
+def quantize_layers(layers):
+    """Quantized copies of the LSTM and dense layers; other layers are shared"""
+    quantized = []
+    for layer in layers:
+        if isinstance(layer, LSTMLayer):
+            layer = QuantizedLSTMLayer(layer)
+        elif isinstance(layer, DenseLayer):
+            layer = QuantizedDenseLayer(layer)
+        quantized.append(layer)
+    return quantized
+
+
+def load_quantized_model(path):
+    """Read a Keras .h5 file and keep only the int8 weights"""
+    return NumpyMusicModel(quantize_layers(read_keras_h5(path)))
+
+
+def weight_bytes(model):
+    """Bytes held in weight arrays (kernels, scales and biases)"""
+    return sum(value.nbytes for layer in model.layers for value in vars(layer).values()
+               if isinstance(value, np.ndarray))
+
+
+def compare_models(reference, candidate, start_sequences, steps, rng):
+    """Decode both models on the same token streams and compare next-note distributions
+
+    Tokens are sampled from the reference model, so both decoders always see
+    identical context. Returns summary statistics over every (row, step).
+    """
+    eps = 1e-12
+    ref_decoder, cand_decoder = reference.decoder(), candidate.decoder()
+    ref_probs = ref_decoder.prime(start_sequences)
+    cand_probs = cand_decoder.prime(start_sequences)
+    kl, total_variation, top1 = [], [], []
+    timings = {"reference": 0.0, "candidate": 0.0}
+    for step in range(steps + 1):
+        p = np.asarray(ref_probs, dtype=np.float64)
+        q = np.asarray(cand_probs, dtype=np.float64)
+        kl.append(np.sum(p * (np.log(p + eps) - np.log(q + eps)), axis=1))
+        total_variation.append(0.5 * np.abs(p - q).sum(axis=1))
+        top1.append(p.argmax(axis=1) == q.argmax(axis=1))
+        if step == steps:
+            break
+        # Inverse-CDF sampling from the reference distribution
+        tokens = (np.cumsum(p, axis=1) > rng.random((len(p), 1))).argmax(axis=1)
+        t = time.perf_counter()
+        ref_probs = ref_decoder.step(tokens)
+        timings["reference"] += time.perf_counter() - t
+        t = time.perf_counter()
+        cand_probs = cand_decoder.step(tokens)
+        timings["candidate"] += time.perf_counter() - t
+
+    kl, total_variation, top1 = np.concatenate(kl), np.concatenate(total_variation), np.concatenate(top1)
+    return {
+        "kl_mean": float(kl.mean()),
+        "kl_p99": float(np.percentile(kl, 99)),
+        "kl_max": float(kl.max()),
+        "total_variation_mean": float(total_variation.mean()),
+        "top1_agreement": float(top1.mean()),
+        "step_ms": {name: 1000 * seconds / max(steps, 1) for name, seconds in timings.items()},
+    }
+
+
+def main(argv=None):
+    parser = argparse.ArgumentParser(description="Compare the int8 model against the float model")
+    parser.add_argument("model_path", nargs="?", help="Keras .h5 model file")
+    parser.add_argument("--stub", action="store_true",
+                        help="use the seeded stub model instead of a file")
+    parser.add_argument("--hidden-size", type=int, default=256)
+    parser.add_argument("--layers", type=int, default=2)
+    parser.add_argument("--rows", type=int, default=32, help="token streams decoded in parallel")
+    parser.add_argument("--steps", type=int, default=200)
+    parser.add_argument("--seed", type=int, default=0)
+    args = parser.parse_args(argv)
+    if not args.stub and not args.model_path:
+        parser.error("a model path or --stub is required")
+
+    if args.stub:
+        reference = stub_model(args.hidden_size, args.layers, seed=args.seed)
+    else:
+        reference = NumpyMusicModel(read_keras_h5(args.model_path))
+    candidate = NumpyMusicModel(quantize_layers(reference.layers))
+
+    rng = np.random.default_rng(args.seed)
+    # Same range as make_start_sequence for genres outside RAGAS
+    start_sequences = rng.integers(48, 73, size=(args.rows, 50))
+    report = compare_models(reference, candidate, start_sequences, args.steps, rng)
+
+    print(f"weights        float32 {weight_bytes(reference) / 1024:.0f} KiB, "
+          f"int8 {weight_bytes(candidate) / 1024:.0f} KiB")
+    print(f"KL(float||int8) mean {report['kl_mean']:.2e}  p99 {report['kl_p99']:.2e}  "
+          f"max {report['kl_max']:.2e}")
+    print(f"total variation mean {report['total_variation_mean']:.4f}")
+    print(f"top-1 agreement {100 * report['top1_agreement']:.2f}%")
+    print(f"step latency   float32 {report['step_ms']['reference']:.3f} ms, "
+          f"int8 {report['step_ms']['candidate']:.3f} ms ({args.rows} rows)")
+    return 0
+
+
+if __name__ == "__main__":
+    sys.exit(main())
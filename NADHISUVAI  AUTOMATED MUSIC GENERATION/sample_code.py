@@ -1,176 +1,104 @@
 # Function to create MIDI directly without using the model 
 # This provides a more reliable fallback that explicitly uses Indian instruments 
-def create_direct_midi(genre, output_file): 
-    midi_data = pretty_midi.PrettyMIDI() 
-     
-    # Get appropriate instruments for this genre 
-    primary_instrument_name = primary_instrument_by_genre.get(genre, "sitar") 
-    secondary_instrument_name = secondary_instrument_by_genre.get(genre, 
-"tabla") 
-     
-    primary_program = INDIAN_INSTRUMENTS[primary_instrument_name] 
-    secondary_program = 
-INDIAN_INSTRUMENTS[secondary_instrument_name] 
-     
-    # Create instrument tracks 
-    lead_instrument = pretty_midi.Instrument(program=primary_program, 
-name=primary_instrument_name) 
-    rhythm_instrument = pretty_midi.Instrument(program=secondary_program, 
-name=secondary_instrument_name) 
-31 
- 
-     
-    # Get the appropriate raga/scale for this genre 
-    raga = RAGAS.get(genre, RAGAS["melody"]) 
-     
-    # Set genre-specific parameters 
-    if genre == "fastbeat": 
-        note_duration = 0.15 
-        velocity_main = 95 
-        num_notes = 120 
-    elif genre == "classical": 
-        note_duration = 0.5 
-        velocity_main = 85 
-        num_notes = 80 
-    else: 
-        note_duration = 0.25 
-        velocity_main = 90 
-        num_notes = 100 
-     
-    # Generate main melody using raga notes 
-    start_time = 0 
-    for i in range(num_notes): 
-        # Select a note from the raga 
-32 
- 
-        octave = random.randint(4, 6) 
-        scale_note = random.choice(raga) 
-        note_pitch = scale_note + (octave - 4) * 12 
-         
-        # Vary velocity for expressiveness 
-        if i % 8 == 0:  # Emphasize certain beats 
-            velocity = velocity_main + random.randint(-5, 10) 
-        else: 
-            velocity = velocity_main + random.randint(-10, 5) 
-         
-        # Vary duration 
-        duration = note_duration * random.uniform(0.8, 1.3) 
-         
-        # Create note 
-        note = pretty_midi.Note( 
-            velocity=velocity, 
-            pitch=note_pitch, 
-            start=start_time, 
-            end=start_time + duration 
-        ) 
-         
-        # Add note to instrument 
-33 
- 
-        lead_instrument.notes.append(note) 
-         
-        # Move to next note with slight variation in timing 
-        start_time += duration * random.uniform(0.95, 1.05) 
-     
-    # Add rhythm/percussion notes 
-    rhythm_start = 0 
-    rhythm_duration = 0.2 
-    for i in range(int(num_notes * 1.5)): 
-        # Skip some beats for variation 
-        if random.random() < 0.2: 
-            rhythm_start += rhythm_duration 
-            continue 
-             
-        # Basic rhythm pattern based on genre 
-        if genre == "reggae": 
-            pitch = 45 if i % 3 == 0 else 47 
-        elif genre == "rock": 
-            pitch = 48 if i % 4 == 0 else 50 
-        elif genre == "fastbeat": 
-            pitch = 46 + (i % 3) 
-        elif genre == "blues": 
-34 
- 
-            pitch = 48 if i % 2 == 0 else 51 
-        else: 
-            pitch = 45 + (i % 3) 
-             
-        # Create percussion note 
-        rhythm_note = pretty_midi.Note( 
-            velocity=70 + random.randint(-10, 15), 
-            pitch=pitch, 
-            start=rhythm_start, 
-            end=rhythm_start + rhythm_duration * random.uniform(0.8, 1.2) 
-        ) 
-        rhythm_instrument.notes.append(rhythm_note) 
-         
-        # Move to next rhythm note 
-        rhythm_start += rhythm_duration 
-     
-    # Add drone for certain genres 
-    if genre in ["classical", "melody", "blues"]: 
-        tanpura = 
-pretty_midi.Instrument(program=INDIAN_INSTRUMENTS["tanpura"], 
-name="tanpura") 
-        root_note = raga[0]  # Use raga's root note 
-35 
- 
-        fifth_note = root_note + 7  # Perfect fifth 
-         
-        # Add drone notes 
-        for i in range(0, int(start_time), 2): 
-            # Root note 
-            note = pretty_midi.Note( 
-                velocity=50, 
-                pitch=root_note - 12,  # Lower octave 
-                start=i, 
-                end=i + 1.9 
-            ) 
-            tanpura.notes.append(note) 
-             
-            # Fifth note 
-            note = pretty_midi.Note( 
-                velocity=45, 
-                pitch=fifth_note - 12,  # Lower octave 
-                start=i + 0.7, 
-                end=i + 2.6 
-            ) 
-            tanpura.notes.append(note) 
-         
-36 
- 
-midi_data.instruments.append(tanpura) 
-# Add instruments to the MIDI file 
-midi_data.instruments.append(lead_instrument) 
-midi_data.instruments.append(rhythm_instrument) 
-# Write the MIDI file 
-midi_data.write(output_file) 
-print(f"Direct MIDI file saved as '{output_file}' with genre '{genre}' using 
-Indian instruments {primary_instrument_name} and 
-{secondary_instrument_name}") 
-from flask import Flask, request, jsonify, send_file 
-import random 
+# The melody, rhythm and tanpura drone are synthesized as NumPy arrays in
+# track_builder, so even very long fallback pieces build in milliseconds.
+# Returns the MIDI bytes; output_file is optional and only used to also save them.
+def create_direct_midi(genre, output_file=None, num_notes=None, rng=None): 
+    profile = get_genre_profile(genre)
+    tracks = build_direct_tracks(profile, genre, rng=rng, num_notes=num_notes)
+
+    # Encode the note arrays straight to a Standard MIDI File 
+    data = encode_smf(tracks)
+    if output_file is not None:
+        with open(output_file, 'wb') as f:
+            f.write(data)
+        print(f"Direct MIDI file saved as '{output_file}' with genre '{genre}' using "
+              f"Indian instruments {profile.primary_instrument} and {profile.secondary_instrument}") 
+    return data
+from flask import Flask, Response, g, request, jsonify, stream_with_context 
+import json
+import re
+import uuid
+import secrets
+import time
+from concurrent.futures import TimeoutError as BatchTimeoutError
+from datetime import datetime
 import numpy as np 
-import pretty_midi 
 import os 
 import traceback 
+from lstm_decoder import build_decoder
+from batching import DynamicBatcher
+from numpy_backend import load_numpy_model
+from quantized_backend import load_quantized_model
+from sampling import sample_batch
+from genre_profiles import compile_genre_profiles
+from track_builder import (ModelTrackStream, build_direct_tracks, build_model_tracks, 
+                           build_model_tracks_with_clock, lane_tracks)
+from smf_encoder import encode_smf
+from midi_cache import MidiCache, file_digest, make_cache_key
+from warm_pool import WarmPool
+from note_events import iter_note_events
+from metrics import MetricsRegistry, SIZE_BUCKETS
+from audio_renderer import iter_wav_stream, render_wav
+from candidate_scoring import score_candidates
+from continuation_cache import Continuation, ContinuationCache
+
+# Service metrics, exposed in the Prometheus text format on /metrics 
+metrics = MetricsRegistry() 
+STAGE_SECONDS = metrics.histogram("music_stage_seconds", "Time spent in each generation stage", ["stage"]) 
+REQUEST_SECONDS = metrics.histogram("music_request_seconds", "Request latency by endpoint and status", 
+                                    ["endpoint", "status"]) 
+REQUESTS = metrics.counter("music_requests", "Generation requests by genre and how they were served", 
+                           ["genre", "source"]) 
+FALLBACKS = metrics.counter("music_fallbacks", "Pieces generated without the model, by cause", ["cause"]) 
+OUTPUT_BYTES = metrics.histogram("music_output_bytes", "Size of MIDI responses in bytes", 
+                                 buckets=SIZE_BUCKETS) 
+MODEL_LOAD_SECONDS = metrics.gauge("music_model_load_seconds", "Time taken to load the model at startup") 
+MODEL_LOADED = metrics.gauge("music_model_loaded", "1 if the model is loaded, 0 if serving fallbacks only") 
 # Attempt to load the model and handle potential errors 
+# The NumPy backend reads the .h5 weights directly and avoids importing
+# TensorFlow; set MUSIC_MODEL_BACKEND=keras to use load_model instead,
+# MUSIC_MODEL_BACKEND=int8 for int8 weights (a quarter of the memory per
+# worker, see quantized_backend.py), or MUSIC_MODEL_BACKEND=none for a
+# model-free process (e.g. the ASGI front end). Models the NumPy decoder cannot run are loaded with Keras instead.
+MODEL_PATH = os.environ.get("MUSIC_MODEL_PATH", 
+    r'D:\music_generator main\music_generator\model\music_generation_model.h5')
+MODEL_BACKEND = os.environ.get("MUSIC_MODEL_BACKEND", "numpy").lower()
+
+def load_keras_model(path): 
+    from tensorflow.keras.models import load_model 
+    return load_model(path) 
+
+def load_model_for_backend(backend, path): 
+    if backend == "none":
+        return None
+    if backend == "keras":
+        return load_keras_model(path)
+    try: 
+        return load_quantized_model(path) if backend == "int8" else load_numpy_model(path)
+    except (ValueError, KeyError) as e: 
+        # Layers, activations or config/weight layouts the NumPy decoder does not
+        # understand (ValueError / KeyError from the .h5 parser): Keras can still run them
+        print(f"NumPy backend cannot load the model ({e}); falling back to Keras") 
+        return load_keras_model(path)
+
+model_load_start = time.perf_counter()
 try: 
-from tensorflow.keras.models import load_model 
-37 
-    model = load_model('D:\music_generator 
-main\music_generator\model\music_generation_model.h5') 
+    model = load_model_for_backend(MODEL_BACKEND, MODEL_PATH)
 except Exception as e: 
     print(f"Error loading model: {e}") 
     traceback.print_exc()  # Print detailed error for debugging 
     model = None 
- 
-# Temperature sampling function for randomness 
-def sample_with_temperature(predictions, temperature=1.0): 
-    predictions = np.log(predictions + 1e-8) / temperature 
-    predictions = np.exp(predictions) 
-    predictions /= np.sum(predictions) 
-    return np.random.choice(len(predictions), p=predictions) 
+MODEL_LOAD_SECONDS.set(time.perf_counter() - model_load_start)
+MODEL_LOADED.set(0 if model is None else 1)
+
+# Version of the loaded weights, part of every cache key 
+MODEL_VERSION = None
+if model is not None: 
+    try: 
+        MODEL_VERSION = f"{MODEL_BACKEND}:{file_digest(MODEL_PATH)}"
+    except OSError: 
+        MODEL_VERSION = f"{MODEL_BACKEND}:{MODEL_PATH}"
  
 # Define Indian instruments with their MIDI program numbers 
 INDIAN_INSTRUMENTS = { 
@@ -180,7 +108,6 @@ INDIAN_INSTRUMENTS = {
     "shehnai": 111,      # Shanai 
     "tabla": 116,        # Taiko Drum (closest to Tabla) 
     "santoor": 15,       # Dulcimer (closest to Santoor) 
-38 
  
     "sarangi": 110,      # Fiddle (closest to Sarangi) 
     "tanpura": 106,      # Koto (closest to Tanpura) 
@@ -195,19 +122,15 @@ RAGAS = {
     "fastbeat": [48, 50, 51, 55, 56, 58, 59, 60],    # Bhairav 
     "jazz": [48, 49, 52, 55, 56, 58, 60],            # Purvi 
     "rock": [48, 51, 53, 55, 58, 60],                # Bhairavi (with phrygian influence) 
-    "classical": [48, 50, 52, 54, 55, 57, 59, 60],   # Bhupali (similar to major 
-pentatonic) 
+    "classical": [48, 50, 52, 54, 55, 57, 59, 60],   # Bhupali (similar to major pentatonic) 
     "blues": [48, 51, 53, 54, 55, 58, 60],           # Charukeshi (with blue notes) 
     "pop": [48, 50, 52, 53, 55, 57, 58, 60],         # Khamaj 
-    "electronic": [48, 50, 53, 55, 58, 60],          # Malkauns with electronic 
-influence 
+    "electronic": [48, 50, 53, 55, 58, 60],          # Malkauns with electronic influence 
     "reggae": [48, 50, 52, 55, 57, 60]               # Desh with reggae rhythm 
 } 
  
-39 
  
-# Define chord sequence options for each genre based on Indian music 
-structures 
+# Define chord sequence options for each genre based on Indian music structures 
 # Using combinations of notes from appropriate ragas 
 chord_sequences_by_genre = { 
     "melody": [ 
@@ -228,7 +151,6 @@ chord_sequences_by_genre = {
     ], 
     "classical": [ 
         [[48, 52, 55], [50, 54, 57], [52, 55, 59], [54, 57, 60]], 
-40 
  
         [[48, 52, 55], [50, 54, 57], [52, 55, 59], [55, 59, 62]] 
     ], 
@@ -252,7 +174,6 @@ chord_sequences_by_genre = {
  
 # Map genres to appropriate Indian instruments 
 primary_instrument_by_genre = { 
-41 
  
     "melody": "bansuri",      # Flute for melodic pieces 
     "fastbeat": "tabla",      # Tabla for rhythmic fast beats 
@@ -276,315 +197,648 @@ secondary_instrument_by_genre = {
     "electronic": "tabla",    # Tabla for electronic beats 
     "reggae": "tabla"         # Tabla for reggae rhythm 
 } 
-42 
- 
- 
-# Add variation parameters to avoid repetitive patterns 
-def add_variation(note, variation_level=0.2): 
-    """Add slight variations to note timing and velocity to avoid repetitive 
-patterns""" 
-    # Apply small random variations to note parameters 
-    velocity_variation = random.uniform(1 - variation_level, 1 + variation_level) 
-    timing_variation = random.uniform(1 - variation_level/2, 1 + 
-variation_level/2) 
-    # Ensure values stay within valid ranges 
-    velocity = min(127, max(60, int(note.velocity * velocity_variation))) 
-    note.velocity = velocity 
-    # Modify note timing slightly, but ensure it doesn't overlap with next note 
-    # (implemented by caller who controls note.end) 
-    return timing_variation 
- 
-# Generate notes with user-defined genre using Indian scales 
-def generate_notes_based_on_genre(model, start_sequence, num_notes, 
-int_to_note, sequence_length=50, temperature=0.9, genre="melody"): 
-    pattern = start_sequence 
-    generated_notes = [] 
-     
-43 
- 
-    # Use the raga for this genre 
-    raga = RAGAS.get(genre, RAGAS["melody"]) 
-     
-    # Select chord sequence for the genre 
-    chord_sequence = random.choice(chord_sequences_by_genre.get(genre, 
-chord_sequences_by_genre["melody"])) 
-     
-    # Use a higher temperature for more variation 
-    temp = temperature + random.uniform(0.1, 0.3) 
-     
-    # Generate notes with non-repetitive patterns by introducing variations 
-    for i in range(num_notes): 
-        if len(pattern) > sequence_length: 
-            pattern = pattern[-sequence_length:] 
-             
-        prediction_input = np.reshape(pattern, (1, sequence_length, 1)) 
-        prediction = model.predict(prediction_input, verbose=0) 
+
+# Compile the tables above once into immutable per-genre profiles 
+GENRE_PROFILES = compile_genre_profiles(RAGAS, chord_sequences_by_genre, 
+                                        primary_instrument_by_genre, 
+                                        secondary_instrument_by_genre, 
+                                        INDIAN_INSTRUMENTS)
+
+def get_genre_profile(genre):
+    return GENRE_PROFILES.get(genre, GENRE_PROFILES[None])
+ 
+ 
+# Per-request note generation state 
+# Holds the genre profile and temperature for one request so that the same
+# logic can drive a single decoder or one row of a batched decoder. Only the
+# sampled note indices are kept during decoding; raga and chord constraints
+# are applied to the whole sequence at once when it is finished.
+class GenreNoteSession: 
+    def __init__(self, start_sequence, num_notes, sequence_length=50, 
+                 temperature=0.9, genre="melody", top_k=None, top_p=None, 
+                 rng=None, keep_state=False, chord_sequence_index=None, temp=None): 
+        self.pattern = list(start_sequence)[-sequence_length:]
+        self.num_notes = num_notes
+        self.temperature = temperature
+        self.top_k = top_k
+        self.top_p = top_p
+        self.note_indices = np.empty(num_notes, dtype=np.int64)
+        self.position = 0
+        # All randomness for the request comes from this generator, so a
+        # seeded request always produces the same piece
+        self.rng = np.random.default_rng() if rng is None else rng
+        # With keep_state the batcher saves the decoder row when the session
+        # finishes, so the piece can be continued
+        self.keep_state = keep_state
+        self.final_state = None
          
-        # Use temperature sampling for more variation 
-        note_index = sample_with_temperature(prediction[0], temp) 
+        # Use the compiled raga/chord profile for this genre 
+        self.profile = get_genre_profile(genre)
          
-        # Apply raga constraints but with variations to avoid repetition 
-44 
- 
-        if i % 7 == 0:  # Occasionally allow notes outside the raga for variation 
-            result = int_to_note[note_index] 
-        else: 
-            # Map to nearest raga note but with some variations 
-            nearest_raga_note = min(raga, key=lambda x: abs(x - (note_index % 12) 
-+ 48)) 
-            octave = note_index // 12 
-            result = int_to_note[nearest_raga_note + (octave - 4) * 12] 
-             
-            # Occasionally use chord notes for harmony 
-            if random.random() < 0.3: 
-                current_chord = chord_sequence[i % len(chord_sequence)] 
-                chord_note = random.choice(current_chord) 
-                result = int_to_note[chord_note] 
+        # Select chord sequence for the genre (given when continuing a piece) 
+        if chord_sequence_index is None: 
+            chord_sequence_index = int(self.rng.integers(len(self.profile.chord_sequences)))
+        self.chord_sequence_index = chord_sequence_index
          
-        generated_notes.append(result) 
+        # Use a higher temperature for more variation 
+        self.temp = temperature + self.rng.uniform(0.1, 0.3) if temp is None else temp 
+
+    @property
+    def done(self):
+        return self.position >= self.num_notes
+
+    def advance(self, note_index):
+        """Record a sampled note index and return the token to feed back"""
+        note_index = int(note_index)
+        self.note_indices[self.position] = note_index
+        self.position += 1
          
         # Add slightly modified note index to pattern to avoid repetition 
         modified_index = note_index 
-        if random.random() < 0.15:  # Small chance to introduce a variation 
-            modified_index = max(0, min(127, note_index + random.randint(-2, 2))) 
-        pattern.append(modified_index) 
-45 
- 
+        if self.rng.random() < 0.15:  # Small chance to introduce a variation 
+            modified_index = max(0, min(127, note_index + int(self.rng.integers(-2, 3)))) 
          
         # Occasionally vary the temperature to add more unpredictability 
-        if random.random() < 0.1: 
-            temp = temperature + random.uniform(-0.2, 0.4) 
-            temp = max(0.5, min(1.5, temp))  # Keep temperature in reasonable 
-range 
- 
-    return generated_notes 
+        if self.rng.random() < 0.1: 
+            temp = self.temperature + self.rng.uniform(-0.2, 0.4) 
+            self.temp = max(0.5, min(1.5, temp))  # Keep temperature in reasonable range
+
+        return modified_index
+
+    def result(self):
+        """Raga-snapped (with occasional chord tones) MIDI pitches as an int array"""
+        return self.profile.render_notes(self.note_indices[:self.position], 
+                                         self.chord_sequence_index, self.rng)
+
+# Generate notes with user-defined genre using Indian scales 
+# The LSTM runs incrementally: the start sequence primes the decoder once and
+# each generated note feeds a single token, keeping the hidden/cell state.
+# int_to_note is no longer needed (pitches stay integers end to end) and is
+# only accepted for backwards compatibility.
+def generate_notes_based_on_genre(model, start_sequence, num_notes, 
+int_to_note=None, sequence_length=50, temperature=0.9, genre="melody", rng=None): 
+    session = GenreNoteSession(start_sequence, num_notes, sequence_length, 
+                               temperature, genre, rng=rng)
+    decoder = build_decoder(model, sequence_length)
+    prediction = decoder.prime([session.pattern])
+    while not session.done:
+        # Use temperature sampling for more variation 
+        note_index = sample_batch(prediction, session.temp, session.top_k, session.top_p, 
+                                  rng=session.rng)[0]
+        token = session.advance(note_index)
+        if not session.done:
+            # Only the new token goes through the LSTM
+            prediction = decoder.step([token])
+
+    return session.result() 
+
+class StreamingNoteSession(GenreNoteSession):
+    """Unbounded GenreNoteSession that hands out its rendered notes chunk by chunk
+
+    Only one chunk of sampled indices is buffered at a time; set `num_notes`
+    (up to `chunk_size`) to the size of the next chunk before decoding it.
+    """
+    def __init__(self, start_sequence, chunk_size=64, **kwargs):
+        super().__init__(start_sequence, chunk_size, **kwargs)
+        self.offset = 0
+
+    def drain(self):
+        notes = self.profile.render_notes(self.note_indices[:self.position], 
+                                          self.chord_sequence_index, self.rng, offset=self.offset)
+        self.offset += self.position
+        self.position = 0
+        return notes
+
+class ContinuedNoteSession(GenreNoteSession):
+    """GenreNoteSession that picks up where a previous piece stopped
+
+    The batcher restores the saved decoder row instead of priming a start
+    sequence; chord positions and the temperature carry on from the piece.
+    """
+    def __init__(self, continuation, num_notes, rng): 
+        # The piece's chord sequence and temperature are passed in, so
+        # nothing is drawn from rng here 
+        super().__init__([], num_notes, temperature=continuation.temperature, 
+                         genre=continuation.genre, rng=rng, keep_state=True, 
+                         chord_sequence_index=continuation.chord_sequence_index, 
+                         temp=continuation.temp) 
+        self.resume = (continuation.decoder_state, continuation.token)
+        self.offset = continuation.clock["position"]
+
+    def result(self):
+        return self.profile.render_notes(self.note_indices[:self.position], 
+                                         self.chord_sequence_index, self.rng, offset=self.offset)
  
 # Convert notes to MIDI with Indian instruments 
-def notes_to_midi(generated_notes, genre, output_file='unique_music.mid'): 
-    midi_data = pretty_midi.PrettyMIDI() 
-     
+# Returns the MIDI bytes; output_file is optional and only used to also save them.
+def notes_to_midi(generated_notes, genre, output_file=None, rng=None): 
     # Get primary and secondary instruments for this genre 
-    primary_instrument_name = primary_instrument_by_genre.get(genre, "sitar") 
-    secondary_instrument_name = secondary_instrument_by_genre.get(genre, 
-"tabla") 
-     
-    primary_program = INDIAN_INSTRUMENTS[primary_instrument_name] 
-    secondary_program = 
-INDIAN_INSTRUMENTS[secondary_instrument_name]
-# Create the main instrument track 
-    main_instrument = pretty_midi.Instrument(program=primary_program) 
-    secondary_instrument = 
-pretty_midi.Instrument(program=secondary_program) 
-     
-    # Add a tanpura drone for certain genres 
-    if genre in ["classical", "melody"]: 
-        tanpura = 
-pretty_midi.Instrument(program=INDIAN_INSTRUMENTS["tanpura"]) 
-        root_note = RAGAS[genre][0]  # Use the root note of the raga 
-        fifth_note = root_note + 7 
-         
-        # Add tanpura drone notes throughout the piece 
-        for i in range(0, 120, 2):  # Add drone every 2 seconds 
-            # Root note 
-            note = pretty_midi.Note( 
-                velocity=45, 
-                pitch=root_note, 
-                start=i, 
-                end=i + 1.8 
-            ) 
-            tanpura.notes.append(note) 
-47 
- 
-             
-            # Fifth note 
-            if i % 4 == 0:  # Add fifth every 4 seconds 
-                note = pretty_midi.Note( 
-                    velocity=40, 
-                    pitch=fifth_note, 
-                    start=i + 0.5, 
-                    end=i + 2.3 
-                ) 
-                tanpura.notes.append(note) 
-         
-        midi_data.instruments.append(tanpura) 
+    profile = get_genre_profile(genre)
+
+    # Melody split across both instruments, genre rhythm and tanpura drone,
+    # all built as note arrays
+    with STAGE_SECONDS.time(stage="tracks"):
+        tracks = build_model_tracks(generated_notes, profile, genre, rng=rng)
      
-    # Set timing parameters based on genre 
-    if genre == "fastbeat": 
-        base_duration = 0.15 
-        duration_range = (0.1, 0.25) 
-    elif genre == "classical": 
-        base_duration = 0.5 
-        duration_range = (0.3, 0.8) 
-    else: 
-        base_duration = 0.3 
-48 
- 
-        duration_range = (0.2, 0.5) 
+    # Encode the note arrays straight to a Standard MIDI File 
+    with STAGE_SECONDS.time(stage="encode"):
+        data = encode_smf(tracks)
+    if output_file is not None:
+        with open(output_file, 'wb') as f:
+            f.write(data)
+        print(f"MIDI file saved as '{output_file}' with genre '{genre}' using Indian "
+              f"instruments {profile.primary_instrument} and {profile.secondary_instrument}") 
+    return data
+ 
+# Optional audit archive for generated pieces (disabled unless MIDI_ARCHIVE_DIR is set) 
+MIDI_ARCHIVE_DIR = os.environ.get("MIDI_ARCHIVE_DIR")
+
+def safe_genre_name(genre):
+    return re.sub(r'[^a-z0-9_-]', '', genre) or 'music'
+
+def archive_midi(data, genre):
+    """Save a copy of a generated piece under a unique name, written atomically"""
+    if not MIDI_ARCHIVE_DIR:
+        return None
+    try:
+        os.makedirs(MIDI_ARCHIVE_DIR, exist_ok=True)
+        stamp = datetime.now().strftime("%Y%m%d-%H%M%S")
+        path = os.path.join(MIDI_ARCHIVE_DIR, 
+                            f"{stamp}_{safe_genre_name(genre)}_{uuid.uuid4().hex[:12]}.mid")
+        tmp_path = path + ".tmp"
+        with open(tmp_path, 'wb') as f:
+            f.write(data)
+        os.replace(tmp_path, path)
+        return path
+    except OSError as e:
+        print(f"Could not archive MIDI for '{genre}': {e}")
+        return None
+
+# Stream MIDI bytes from memory - no shared files on disk 
+def midi_response(data, genre, headers=None):
+    archive_midi(data, genre)
+    OUTPUT_BYTES.observe(len(data))
+    response = Response(data, mimetype='audio/midi', headers=headers)
+    response.headers['Content-Disposition'] = \
+        f'attachment; filename="{safe_genre_name(genre)}_unique_music.mid"'
+    response.headers['Content-Length'] = str(len(data))
+    response.headers['Cache-Control'] = 'no-store'
+    return response
+
+# Batch concurrent requests into one forward pass per timestep 
+BATCH_MAX_SIZE = int(os.environ.get("BATCH_MAX_SIZE", "32"))
+BATCH_WAIT_MS = float(os.environ.get("BATCH_WAIT_MS", "5"))
+BATCH_TIMEOUT = float(os.environ.get("BATCH_TIMEOUT", "60"))
+batcher = DynamicBatcher(lambda: build_decoder(model), 
+                         max_batch_size=BATCH_MAX_SIZE, 
+                         max_wait_ms=BATCH_WAIT_MS)
+
+# Cache for seeded pieces, keyed by a hash of (genre, seed, params, model version) 
+midi_cache = MidiCache( 
+    max_memory_bytes=int(os.environ.get("MIDI_CACHE_MEMORY_MB", "64")) << 20, 
+    disk_dir=os.environ.get("MIDI_CACHE_DIR"), 
+    max_disk_bytes=int(os.environ.get("MIDI_CACHE_DISK_MB", "1024")) << 20 
+)
+
+# Continuation tokens for model pieces: decoder state kept for CONTINUATION_TTL seconds 
+continuations = ContinuationCache( 
+    max_entries=int(os.environ.get("CONTINUATION_CACHE_SIZE", "4096")), 
+    ttl_seconds=float(os.environ.get("CONTINUATION_TTL", "1800")) 
+)
+
+# Request parameters 
+MAX_NUM_NOTES = int(os.environ.get("MAX_NUM_NOTES", "2000"))
+MAX_CANDIDATES = int(os.environ.get("MAX_CANDIDATES", "16"))
+DEFAULT_NUM_NOTES = 200
+
+def default_temperature(genre): 
+    # Adjust temperature based on genre for more variation 
+    if genre in ["jazz", "blues"]: 
+        return 1.0  # More variation for jazz and blues 
+    elif genre in ["electronic", "rock"]: 
+        return 0.9  # Medium variation 
+    return 0.8  # Standard variation 
+
+def parse_generation_params(args): 
+    """Validate the query string; raises ValueError with a client-facing message"""
+    genre = args.get('genre', 'melody').lower() 
+    seed = args.get('seed') 
+    num_notes = args.get('num_notes') 
+    temperature = args.get('temperature') 
+    candidates = args.get('candidates') 
+    try: 
+        seed = int(seed) if seed not in (None, '') else None 
+        num_notes = int(num_notes) if num_notes not in (None, '') else None 
+        temperature = float(temperature) if temperature not in (None, '') else default_temperature(genre) 
+        candidates = int(candidates) if candidates not in (None, '') else 1 
+    except ValueError: 
+        raise ValueError("seed, num_notes and candidates must be integers, temperature a number") 
+    if seed is not None and not 0 <= seed < 2 ** 63: 
+        raise ValueError("seed must be between 0 and 2**63 - 1") 
+    if num_notes is not None and not 1 <= num_notes <= MAX_NUM_NOTES: 
+        raise ValueError(f"num_notes must be between 1 and {MAX_NUM_NOTES}") 
+    if not 0.1 <= temperature <= 2.0: 
+        raise ValueError("temperature must be between 0.1 and 2.0") 
+    if not 1 <= candidates <= MAX_CANDIDATES: 
+        raise ValueError(f"candidates must be between 1 and {MAX_CANDIDATES}") 
+    return {"genre": genre, "seed": seed, "num_notes": num_notes, "temperature": temperature, 
+            "candidates": candidates} 
+
+def make_start_sequence(genre, rng, length=50): 
+    # Start with notes that fit the genre's scale 
+    if genre in RAGAS: 
+        return rng.choice(RAGAS[genre], length).tolist() 
+    return rng.integers(48, 73, length).tolist() 
+
+def generate_candidate_notes(start_sequence, num_notes, candidates, genre="melody", 
+                             temperature=0.9, rng=None): 
+    """Best-of-K: decode several continuations of one start sequence and keep the best
+
+    All candidates join the shared batch together, so they advance in the same
+    forward pass each step. Returns the winning notes, the score arrays
+    (see score_candidates) with the index of the winner under "best", and the
+    winning session.
+    """
+    rng = np.random.default_rng() if rng is None else rng 
+    # One independent generator per candidate, derived from the request's rng 
+    sessions = [GenreNoteSession(start_sequence, num_notes, genre=genre, temperature=temperature, 
+                                 rng=np.random.default_rng(seed), keep_state=True) 
+                for seed in rng.integers(0, 2 ** 63, candidates)] 
+    futures = [batcher.submit(session) for session in sessions] 
+    notes = np.stack([future.result(BATCH_TIMEOUT) for future in futures]) 
+    scores = score_candidates(notes, sessions[0].profile, 
+                              [session.chord_sequence_index for session in sessions]) 
+    scores["best"] = int(np.argmax(scores["total"])) 
+    return notes[scores["best"]], scores, sessions[scores["best"]] 
+
+def make_continuation(session, genre, clock, rng): 
+    decoder_state, token = session.final_state 
+    return Continuation(genre, session.temperature, session.temp, session.chord_sequence_index, 
+                        decoder_state, int(token), clock, rng.bit_generator.state) 
+
+def generate_model_piece(params): 
+    """Note arrays of a model piece plus the Continuation where it stops; 
+    a deterministic function of params for a given model"""
+    rng = np.random.default_rng(params["seed"]) 
+    genre = params["genre"] 
+    start_sequence = make_start_sequence(genre, rng) 
+    num_notes = params["num_notes"] or DEFAULT_NUM_NOTES 
      
-    # Add main melody notes 
-    start_time = 0 
-    for i, note_name in enumerate(generated_notes): 
-        note_number = int(note_name) 
-         
-        # Vary velocity for expressiveness 
-        if i % 8 == 0:  # Emphasize certain beats 
-            velocity = random.randint(90, 110) 
-        else: 
-            velocity = random.randint(70, 95) 
-         
-        # Vary duration for more natural sound and to avoid repetition 
-        if i % 4 == 0 and random.random() < 0.7: 
-            # Longer notes on certain beats 
-            duration = random.uniform(base_duration * 1.5, base_duration * 2.2) 
-        else: 
-            # Normal notes with slight variation 
-            duration = random.uniform(duration_range[0], duration_range[1]) 
-             
-        # Create and add the note 
-49 
- 
-        note = pretty_midi.Note( 
-            velocity=velocity, 
-            pitch=note_number, 
-            start=start_time, 
-            end=start_time + duration 
-        ) 
-         
-        # Apply variation to avoid repetitive patterns 
-        timing_variation = add_variation(note, 0.15) 
-         
-        # Determine which instrument gets this note 
-        if random.random() < 0.8:  # 80% of notes go to primary instrument 
-            main_instrument.notes.append(note) 
+    candidates = params.get("candidates", 1) 
+    with STAGE_SECONDS.time(stage="decode"): 
+        if candidates > 1: 
+            generated_notes, _, session = generate_candidate_notes( 
+                start_sequence, num_notes, candidates, genre=genre, 
+                temperature=params["temperature"], rng=rng) 
         else: 
-            # Shift some notes to secondary instrument for texture 
-            secondary_note = pretty_midi.Note( 
-                velocity=min(100, velocity + random.randint(-10, 10)), 
-                pitch=note_number, 
-                start=start_time + random.uniform(0, 0.1),  # Slight timing offset 
-                end=start_time + duration * 0.9  # Slightly different duration 
-            ) 
-            secondary_instrument.notes.append(secondary_note) 
-50 
- 
-         
-        # Apply timing variations to avoid repetitive rhythm 
-        start_time += duration * timing_variation 
-     
-    # Add rhythmic patterns for tabla/percussion (secondary instrument) in 
-certain genres 
-    if genre in ["fastbeat", "rock", "pop", "electronic", "reggae"]: 
-        rhythm_start = 0 
-         
-        # Create non-repetitive but genre-appropriate rhythm patterns 
-        rhythm_duration = 0.2 if genre == "fastbeat" else 0.3 
-         
-        for i in range(int(start_time * 2)):  # Fill throughout the piece 
-            if random.random() < 0.25:  # Add some randomness to avoid repetition 
-                continue 
-                 
-            # Vary the rhythm note pitch based on genre 
-            if genre == "reggae": 
-                pitch = 45 if i % 3 == 0 else 47 
-            elif genre == "rock": 
-                pitch = 48 if i % 4 == 0 else 50 
-            elif genre == "fastbeat": 
-51 
- 
-                pitch = 46 + (i % 5) 
-            else: 
-                pitch = 45 + (i % 4) 
-                 
-            # Create percussion note 
-            rhythm_note = pretty_midi.Note( 
-                velocity=75 + random.randint(-15, 15), 
-                pitch=pitch, 
-                start=rhythm_start, 
-                end=rhythm_start + rhythm_duration * random.uniform(0.8, 1.2) 
-            ) 
-            secondary_instrument.notes.append(rhythm_note) 
-             
-            # Vary timing to avoid strict repetition 
-            rhythm_start += rhythm_duration * random.uniform(0.95, 1.05) 
-     
-    # Add the instruments to the MIDI file 
-    midi_data.instruments.append(main_instrument) 
-    midi_data.instruments.append(secondary_instrument) 
-     
-    # Write the MIDI file 
-    midi_data.write(output_file) 
-52 
- 
-    print(f"MIDI file saved as '{output_file}' with genre '{genre}' using Indian 
-instruments {primary_instrument_name} and {secondary_instrument_name}") 
- 
+            # Decode in the shared batch alongside other in-flight requests
+            session = GenreNoteSession(start_sequence, num_notes, genre=genre, 
+                                       temperature=params["temperature"], rng=rng, keep_state=True) 
+            generated_notes = batcher.generate(session, timeout=BATCH_TIMEOUT) 
+    with STAGE_SECONDS.time(stage="tracks"): 
+        tracks, clock = build_model_tracks_with_clock(generated_notes, get_genre_profile(genre), 
+                                                      genre, rng=rng) 
+    return tracks, make_continuation(session, genre, clock, rng) 
+
+def generate_model_tracks(params): 
+    """Note arrays of a model piece; a deterministic function of params for a given model"""
+    return generate_model_piece(params)[0] 
+
+def continue_model_piece(continuation, num_notes): 
+    """The next `num_notes` of a piece as note arrays on the piece's timeline, 
+    plus the Continuation after them"""
+    rng = np.random.default_rng() 
+    rng.bit_generator.state = continuation.rng_state 
+    session = ContinuedNoteSession(continuation, num_notes, rng) 
+    with STAGE_SECONDS.time(stage="decode"): 
+        generated_notes = batcher.generate(session, timeout=BATCH_TIMEOUT) 
+    with STAGE_SECONDS.time(stage="tracks"): 
+        lanes = ModelTrackStream(session.profile, continuation.genre, rng, clock=continuation.clock) 
+        tracks = lane_tracks(lanes.feed(generated_notes), session.profile) 
+    return tracks, make_continuation(session, continuation.genre, lanes.clock(), rng) 
+
+def generate_model_midi(params): 
+    """Generate a piece with the model; same piece as notes_to_midi would encode"""
+    tracks = generate_model_tracks(params) 
+    with STAGE_SECONDS.time(stage="encode"): 
+        return encode_smf(tracks) 
+
+def generate_fallback_midi(params): 
+    """Model-free piece, also deterministic for a given seed"""
+    rng = np.random.default_rng(params["seed"]) 
+    with STAGE_SECONDS.time(stage="direct"): 
+        return create_direct_midi(params["genre"], num_notes=params["num_notes"], rng=rng) 
+
+def generate_fallback_tracks(params): 
+    """Note arrays of the model-free piece generate_fallback_midi encodes"""
+    rng = np.random.default_rng(params["seed"]) 
+    with STAGE_SECONDS.time(stage="direct"): 
+        return build_direct_tracks(get_genre_profile(params["genre"]), params["genre"], 
+                                   rng=rng, num_notes=params["num_notes"]) 
+
+def genre_label(genre): 
+    # Keep metric label values bounded: unknown genres share one label 
+    return genre if genre in RAGAS else "other" 
+
+def fallback_cause(error): 
+    if isinstance(error, (TimeoutError, BatchTimeoutError)): 
+        return "timeout" 
+    return "error" 
+
+def default_params(genre, seed=None): 
+    return {"genre": genre, "seed": seed, "num_notes": None, 
+            "temperature": default_temperature(genre), "candidates": 1} 
+
+def generate_pool_piece(genre): 
+    """New default-parameter piece for the warm pool, returned with its seed"""
+    params = default_params(genre, secrets.randbits(63)) 
+    if model is not None: 
+        return params["seed"], generate_model_midi(params) 
+    return params["seed"], generate_fallback_midi(params) 
+
+# Warm pool of ready-made pieces for unseeded requests (WARM_POOL_SIZE=0 disables it) 
+warm_pool = WarmPool(generate_pool_piece, RAGAS, 
+                     target_size=int(os.environ.get("WARM_POOL_SIZE", "4")), 
+                     workers=int(os.environ.get("WARM_POOL_WORKERS", "2"))) 
+# Started with the first request, not at import: ASGI workers and the bulk CLI
+# import this module without serving requests
+
 # Initialize Flask app 
-app = Flask(_name_) 
+app = Flask(__name__) 
+
+# Optional per-request trace IDs: echo the caller's X-Request-ID (or a new one)
+# in the response and in error logs 
+TRACE_IDS = os.environ.get("TRACE_IDS", "0") == "1" 
+
+@app.before_request 
+def start_request(): 
+    g.request_start = time.perf_counter() 
+    warm_pool.start() 
+    if TRACE_IDS: 
+        incoming = request.headers.get("X-Request-ID", "") 
+        g.trace_id = incoming if re.fullmatch(r"[\w.-]{1,64}", incoming) else uuid.uuid4().hex 
+
+@app.after_request 
+def finish_request(response): 
+    endpoint = request.url_rule.rule if request.url_rule else "unmatched" 
+    REQUEST_SECONDS.observe(time.perf_counter() - g.request_start, 
+                            endpoint=endpoint, status=response.status_code) 
+    if TRACE_IDS: 
+        response.headers["X-Request-ID"] = g.trace_id 
+    return response 
+
+def log_prefix(): 
+    trace_id = getattr(g, "trace_id", None) 
+    return f"[{trace_id}] " if trace_id else "" 
  
 @app.route('/generate_music', methods=['GET']) 
 def generate_music(): 
     try: 
-        if model is None: 
-            # Fallback to direct MIDI generation if model isn't loaded 
-            return generate_direct_midi() 
-             
-        genre = request.args.get('genre', 'melody').lower() 
-         
-        # Start with notes that fit the genre's scale 
-        if genre in RAGAS: 
-            raga_notes = RAGAS[genre] 
-            start_sequence = [random.choice(raga_notes) for _ in range(50)] 
-        else: 
-            start_sequence = [random.randint(48, 72) for _ in range(50)] 
-         
-53 
- 
-        num_notes = 200 
-        int_to_note = {i: str(i) for i in range(128)} 
-         
-        # Adjust temperature based on genre for more variation 
-        if genre in ["jazz", "blues"]: 
-            temp = 1.0  # More variation for jazz and blues 
-        elif genre in ["electronic", "rock"]: 
-            temp = 0.9  # Medium variation 
-        else: 
-            temp = 0.8  # Standard variation 
-         
-        generated_notes = generate_notes_based_on_genre( 
-            model,  
-            start_sequence,  
-            num_notes,  
-            int_to_note,  
-            genre=genre,  
-            temperature=temp 
-        ) 
-         
-        output_filename = f"{genre}_unique_music.mid" 
-        notes_to_midi(generated_notes, genre, output_file=output_filename) 
- 
- 
-        if os.path.exists(output_filename): 
-            return send_file(output_filename, as_attachment=True) 
+        params = parse_generation_params(request.args) 
+    except ValueError as e: 
+        return jsonify({"error": str(e)}), 400 
+    genre = params["genre"] 
+
+    # Unseeded requests still get a seed so the piece can be reproduced,
+    # but only explicitly seeded ones are worth caching
+    seeded = params["seed"] is not None 
+
+    # Default unseeded requests are served straight from the warm pool;
+    # the returned seed reproduces the piece as a seeded request
+    if not seeded and params == default_params(genre): 
+        piece = warm_pool.pop(genre) 
+        if piece is not None: 
+            seed, midi_bytes = piece 
+            REQUESTS.inc(genre=genre_label(genre), source="pool") 
+            headers = {"X-Seed": str(seed), "X-Pool": "hit"} 
+            if model is not None: 
+                headers["X-Continuation-Token"] = continuations.put(default_params(genre, seed)) 
+            return midi_response(midi_bytes, genre, headers) 
+
+    if not seeded: 
+        params["seed"] = secrets.randbits(63) 
+    headers = {"X-Seed": str(params["seed"])} 
+
+    use_model = model is not None 
+    cache_key = make_cache_key(params, MODEL_VERSION if use_model else "direct") 
+    if seeded: 
+        cached = midi_cache.get(cache_key) 
+        if cached is not None: 
+            headers["X-Cache"] = "hit" 
+            if use_model: 
+                # No decoder state for cached pieces: keep the params and 
+                # replay them if the piece is ever continued 
+                headers["X-Continuation-Token"] = continuations.put(dict(params)) 
+            REQUESTS.inc(genre=genre_label(genre), source="cache") 
+            return midi_response(cached, genre, headers) 
+
+    try: 
+        if use_model: 
+            tracks, continuation = generate_model_piece(params) 
+            with STAGE_SECONDS.time(stage="encode"): 
+                midi_bytes = encode_smf(tracks) 
+            headers["X-Continuation-Token"] = continuations.put(continuation) 
         else: 
-            return jsonify({"error": "Failed to generate MIDI file."}), 500 
-     
+            # Fallback to direct MIDI generation if model isn't loaded 
+            FALLBACKS.inc(cause="model_unavailable") 
+            midi_bytes = generate_fallback_midi(params) 
     except Exception as e: 
-        print(f"Error in generate_music: {e}") 
+        print(f"{log_prefix()}Error in generate_music: {e}") 
         traceback.print_exc()  # Print detailed error for debugging 
-        # Fallback to direct MIDI generation 
-        return generate_direct_midi() 
+        FALLBACKS.inc(cause=fallback_cause(e)) 
+        REQUESTS.inc(genre=genre_label(genre), source="fallback") 
+        # Fallback to direct MIDI generation (not cached under the model key) 
+        return generate_direct_midi(params, headers) 
+    REQUESTS.inc(genre=genre_label(genre), source="model" if use_model else "direct") 
+
+    if not midi_bytes: 
+        return jsonify({"error": "Failed to generate MIDI file."}), 500 
+    if seeded: 
+        midi_cache.put(cache_key, midi_bytes) 
+        headers["X-Cache"] = "miss" 
+    return midi_response(midi_bytes, genre, headers) 
+
+@app.route('/continue_music', methods=['GET']) 
+def continue_music(): 
+    """The next segment of a model piece: only the new notes, timed to follow 
+    the piece (X-Start-Time), with a new token for the segment after it"""
+    if model is None: 
+        return jsonify({"error": "Continuations need the model, which is not loaded."}), 503 
+    try: 
+        num_notes = int(request.args.get('num_notes') or DEFAULT_NUM_NOTES) 
+    except ValueError: 
+        return jsonify({"error": "num_notes must be an integer"}), 400 
+    if not 1 <= num_notes <= MAX_NUM_NOTES: 
+        return jsonify({"error": f"num_notes must be between 1 and {MAX_NUM_NOTES}"}), 400 
+    token = request.args.get('token', '') 
+    entry = continuations.get(token) 
+    if entry is None: 
+        return jsonify({"error": "Unknown or expired continuation token"}), 404 
+
+    try: 
+        if not isinstance(entry, Continuation): 
+            # Piece served from the cache or warm pool: regenerate it once and 
+            # keep its state under the same token for later continuations 
+            entry = generate_model_piece(entry)[1] 
+            continuations.put(entry, token=token) 
+        tracks, continuation = continue_model_piece(entry, num_notes) 
+        with STAGE_SECONDS.time(stage="encode"): 
+            midi_bytes = encode_smf(tracks) 
+    except Exception as e: 
+        print(f"{log_prefix()}Error in continue_music: {e}") 
+        traceback.print_exc() 
+        return jsonify({"error": "Failed to continue the piece."}), 503 
+    REQUESTS.inc(genre=genre_label(entry.genre), source="continuation") 
+    headers = {"X-Continuation-Token": continuations.put(continuation), 
+               "X-Start-Time": f"{entry.clock['time']:.3f}", 
+               "X-End-Time": f"{continuation.clock['time']:.3f}"} 
+    return midi_response(midi_bytes, entry.genre, headers) 
+
+@app.route('/continuation_stats', methods=['GET']) 
+def continuation_stats(): 
+    return jsonify(continuations.stats()) 
+
+@app.route('/cache_stats', methods=['GET']) 
+def cache_stats(): 
+    return jsonify(midi_cache.stats()) 
+
+@app.route('/pool_stats', methods=['GET']) 
+def pool_stats(): 
+    return jsonify(warm_pool.stats()) 
+
+BATCH_QUEUE_DEPTH = metrics.gauge("music_batch_queue_depth", "Sessions waiting to join the decode batch", 
+                                  function=lambda: batcher.queue_depth) 
+CACHE_EVENTS = metrics.counter("music_cache_events", "MIDI cache hits, misses, stores and evictions", ["event"], 
+                               function=lambda: {(event,): count for event, count in midi_cache.stats().items() 
+                                                 if event in midi_cache.counters}) 
+POOL_READY = metrics.gauge("music_pool_ready", "Ready pieces in the warm pool by genre", ["genre"]) 
+
+@app.route('/metrics', methods=['GET']) 
+def metrics_endpoint(): 
+    # Component stats are copied into gauges at scrape time 
+    for genre, size in warm_pool.stats()["pool_sizes"].items(): 
+        POOL_READY.set(size, genre=genre) 
+    return Response(metrics.render(), content_type="text/plain; version=0.0.4; charset=utf-8") 
+
+# Streaming long-form generation: notes are decoded, rendered and sent in
+# chunks, so a piece of any length starts playing at once in constant memory
+MAX_STREAM_SECONDS = float(os.environ.get("MAX_STREAM_SECONDS", "14400"))
+DEFAULT_STREAM_SECONDS = 600.0
+STREAM_CHUNK_NOTES = int(os.environ.get("STREAM_CHUNK_NOTES", "64"))
+FIRST_STREAM_CHUNK_NOTES = 8
+
+def stream_note_chunks(params, seconds): 
+    """Yield (lanes, lead_time) chunks until the lead reaches `seconds`"""
+    rng = np.random.default_rng(params["seed"]) 
+    genre = params["genre"] 
+    profile = get_genre_profile(genre) 
+    lanes = ModelTrackStream(profile, genre, rng) 
+    if model is not None: 
+        session = StreamingNoteSession(make_start_sequence(genre, rng), STREAM_CHUNK_NOTES, 
+                                       genre=genre, temperature=params["temperature"], rng=rng) 
+        decoder = build_decoder(model) 
+        prediction = decoder.prime([session.pattern]) 
+
+    # A small first chunk keeps the time to the first note low
+    chunk_size = FIRST_STREAM_CHUNK_NOTES 
+    while lanes.time < seconds: 
+        if model is not None: 
+            session.num_notes = chunk_size 
+            while not session.done: 
+                note_index = sample_batch(prediction, session.temp, session.top_k, session.top_p, 
+                                          rng=session.rng)[0] 
+                prediction = decoder.step([session.advance(note_index)]) 
+            pitches = session.drain() 
+        else: 
+            # No model: random raga notes across octaves 4-6, as in create_direct_midi 
+            pitches = profile.raga[rng.integers(0, len(profile.raga), chunk_size)] \
+                + rng.integers(0, 3, chunk_size) * 12 
+        yield lanes.feed(pitches), lanes.time 
+        chunk_size = min(2 * chunk_size, STREAM_CHUNK_NOTES) 
+
+def parse_stream_params(args): 
+    """Generation params plus the stream length; raises ValueError like parse_generation_params"""
+    params = parse_generation_params(args) 
+    try: 
+        seconds = float(args.get('seconds') or DEFAULT_STREAM_SECONDS) 
+    except ValueError: 
+        raise ValueError("seconds must be a number") 
+    if not 1 <= seconds <= MAX_STREAM_SECONDS: 
+        raise ValueError(f"seconds must be between 1 and {MAX_STREAM_SECONDS:g}") 
+    if params["seed"] is None: 
+        params["seed"] = secrets.randbits(63) 
+    return params, seconds 
+
+@app.route('/stream_music', methods=['GET']) 
+def stream_music(): 
+    """Newline-delimited JSON note events for a piece of up to MAX_STREAM_SECONDS"""
+    try: 
+        params, seconds = parse_stream_params(request.args) 
+    except ValueError as e: 
+        return jsonify({"error": str(e)}), 400 
+    REQUESTS.inc(genre=genre_label(params["genre"]), source="stream") 
+
+    def events(): 
+        yield json.dumps({"type": "header", "genre": params["genre"], "seed": params["seed"], 
+                          "seconds": seconds, "source": "model" if model is not None else "direct"}) + "\n" 
+        for batch in iter_note_events(stream_note_chunks(params, seconds), end_time=seconds): 
+            yield "".join(json.dumps(event) + "\n" for event in batch) 
+
+    return Response(stream_with_context(events()), mimetype="application/x-ndjson", 
+                    headers={"X-Seed": str(params["seed"]), "Cache-Control": "no-store"}) 
+
+# Audio rendering for clients that cannot play MIDI 
+AUDIO_SAMPLE_RATE = int(os.environ.get("AUDIO_SAMPLE_RATE", "44100")) 
+
+@app.route('/generate_audio', methods=['GET']) 
+def generate_audio(): 
+    """The piece /generate_music would return for the same params, as a WAV file"""
+    try: 
+        params = parse_generation_params(request.args) 
+    except ValueError as e: 
+        return jsonify({"error": str(e)}), 400 
+    if params["seed"] is None: 
+        params["seed"] = secrets.randbits(63) 
+    headers = {"X-Seed": str(params["seed"]), "Cache-Control": "no-store"} 
+
+    source = "model" if model is not None else "direct" 
+    try: 
+        tracks = generate_model_tracks(params) if model is not None else generate_fallback_tracks(params) 
+    except Exception as e: 
+        print(f"{log_prefix()}Error in generate_audio: {e}") 
+        traceback.print_exc() 
+        FALLBACKS.inc(cause=fallback_cause(e)) 
+        source = "fallback" 
+        tracks = generate_fallback_tracks(params) 
+    REQUESTS.inc(genre=genre_label(params["genre"]), source=f"audio_{source}") 
+
+    with STAGE_SECONDS.time(stage="audio"): 
+        data = render_wav(tracks, AUDIO_SAMPLE_RATE) 
+    headers["Content-Disposition"] = \
+        f'attachment; filename="{safe_genre_name(params["genre"])}_unique_music.wav"' 
+    return Response(data, mimetype="audio/wav", headers=headers) 
+
+@app.route('/stream_audio', methods=['GET']) 
+def stream_audio(): 
+    """Chunked WAV stream of a piece of up to MAX_STREAM_SECONDS"""
+    try: 
+        params, seconds = parse_stream_params(request.args) 
+    except ValueError as e: 
+        return jsonify({"error": str(e)}), 400 
+    REQUESTS.inc(genre=genre_label(params["genre"]), source="audio_stream") 
+    blocks = iter_wav_stream(stream_note_chunks(params, seconds), AUDIO_SAMPLE_RATE, end_time=seconds) 
+    return Response(stream_with_context(blocks), mimetype="audio/wav", 
+                    headers={"X-Seed": str(params["seed"]), "Cache-Control": "no-store"}) 
  
 # Fallback function that creates MIDI directly without the model 
-def generate_direct_midi(): 
-    genre = request.args.get('genre', 'melody').lower() 
-    output_filename = f"{genre}_unique_music.mid" 
-     
-    # Create MIDI file directly without using the model 
-    create_direct_midi(genre, output_filename) 
+def generate_direct_midi(params=None, headers=None): 
+    if params is None: 
+        params = parse_generation_params(request.args) 
      
-    if os.path.exists(output_filename): 
-        return send_file(output_filename, as_attachment=True)
-        else: 
-return jsonify({"error": "Failed to generate MIDI file."}), 500 
-if _name_ == '_main_': 
-app.run(debug=True, host='0.0.0.0', port=5000)
+    # Create MIDI directly without using the model 
+    midi_bytes = generate_fallback_midi(params) 
+    if not midi_bytes: 
+        return jsonify({"error": "Failed to generate MIDI file."}), 500 
+    return midi_response(midi_bytes, params["genre"], headers)
+if __name__ == '__main__': 
+    app.run(debug=True, host='0.0.0.0', port=5000)
\ No newline at end of file
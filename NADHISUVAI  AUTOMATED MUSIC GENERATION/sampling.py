@@ -0,0 +1,66 @@
+# Batched, vectorized note sampling
+# Works on a whole (batch, vocab) probability matrix in one call using the
+# Gumbel-max trick, so there is no per-row np.random.choice overhead.
+import numpy as np
+
+_default_rng = np.random.default_rng()
+
+
+def _per_row(value, batch_size, dtype):
+    return np.broadcast_to(np.asarray(value, dtype=dtype), (batch_size,))
+
+
+def truncate_logits(logits, top_k=None, top_p=None):
+    """Mask (in place) everything outside the top-k / nucleus of each row
+
+    top_k and top_p may be scalars or per-row arrays. A top_k of 0 (or >= vocab)
+    and a top_p of 1.0 disable the corresponding truncation for that row.
+    """
+    batch_size, vocab = logits.shape
+    if top_k is None and top_p is None:
+        return logits
+
+    order = np.argsort(-logits, axis=1)
+    sorted_logits = np.take_along_axis(logits, order, axis=1)
+    keep = np.ones_like(sorted_logits, dtype=bool)
+
+    if top_k is not None:
+        k = _per_row(top_k, batch_size, np.int64)
+        k = np.where((k <= 0) | (k > vocab), vocab, k)
+        keep &= np.arange(vocab)[None, :] < k[:, None]
+
+    if top_p is not None:
+        p = _per_row(top_p, batch_size, np.float64)
+        sorted_probs = np.exp(sorted_logits - sorted_logits[:, :1])
+        sorted_probs /= sorted_probs.sum(axis=1, keepdims=True)
+        # Keep a token while the mass *before* it is still below top_p
+        mass_before = np.cumsum(sorted_probs, axis=1) - sorted_probs
+        keep &= mass_before < p[:, None]
+
+    # Always keep the most likely token
+    keep[:, 0] = True
+    masked = np.zeros_like(keep)
+    np.put_along_axis(masked, order, ~keep, axis=1)
+    logits[masked] = -np.inf
+    return logits
+
+
+def sample_batch(probs, temperature=1.0, top_k=None, top_p=None, rng=None):
+    """Sample one index per row of a (batch, vocab) probability matrix
+
+    `temperature` can be a scalar or a per-row array. `rng` is a
+    numpy Generator so results are reproducible when it is seeded, or a
+    list with one Generator per row so each row's draws are independent of
+    how requests were batched together.
+    """
+    rng = _default_rng if rng is None else rng
+    probs = np.atleast_2d(np.asarray(probs, dtype=np.float64))
+    temperature = _per_row(temperature, probs.shape[0], np.float64)
+
+    logits = np.log(probs + 1e-8) / temperature[:, None]
+    truncate_logits(logits, top_k, top_p)
+    if isinstance(rng, (list, tuple)):
+        noise = np.stack([row_rng.gumbel(size=logits.shape[1]) for row_rng in rng])
+    else:
+        noise = rng.gumbel(size=logits.shape)
+    return np.argmax(logits + noise, axis=1)
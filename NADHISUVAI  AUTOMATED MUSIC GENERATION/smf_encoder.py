@@ -0,0 +1,155 @@
+# Direct Standard MIDI File encoder
+# Writes SMF bytes (header, tempo track, per-instrument tracks with program
+# changes and delta-timed note on/off events) straight from the note arrays in
+# track_builder, without building pretty_midi Note objects. Event encoding,
+# including variable-length delta times, is vectorized per track.
+import io
+import struct
+
+import numpy as np
+
+DEFAULT_RESOLUTION = 220   # ticks per quarter note, same as pretty_midi
+DEFAULT_TEMPO_BPM = 120.0
+DRUM_CHANNEL = 9
+
+
+def _chunk(tag, payload):
+    return tag + struct.pack(">I", len(payload)) + payload
+
+
+def _meta(meta_type, data):
+    # Delta time 0, FF <type> <len> <data>; all our metadata is < 128 bytes
+    return bytes([0x00, 0xFF, meta_type, len(data)]) + data
+
+
+def _vlq_lengths(values):
+    return (1 + (values >= 1 << 7) + (values >= 1 << 14) + (values >= 1 << 21)).astype(np.int64)
+
+
+def encode_events(delta, status, data1, data2):
+    """Encode channel events as <VLQ delta><status><data1><data2> in one pass"""
+    delta = np.asarray(delta, dtype=np.int64)
+    lengths = _vlq_lengths(delta)
+    sizes = lengths + 3
+    offsets = np.concatenate([[0], np.cumsum(sizes)[:-1]])
+    out = np.zeros(int(sizes.sum()), dtype=np.uint8)
+
+    # Big-endian 7-bit groups, continuation bit on every byte but the last
+    for k in range(4):
+        has_byte = lengths > k
+        position = offsets[has_byte] + lengths[has_byte] - 1 - k
+        value = (delta[has_byte] >> (7 * k)) & 0x7F
+        out[position] = value | (0x80 if k else 0)
+
+    out[offsets + lengths] = status
+    out[offsets + lengths + 1] = data1
+    out[offsets + lengths + 2] = data2
+    return out.tobytes()
+
+
+def _channel_for(index):
+    # Skip the General MIDI drum channel like pretty_midi does
+    channel = index if index < DRUM_CHANNEL else index + 1
+    return channel % 16
+
+
+def _seconds_to_ticks(times, ticks_per_second):
+    return np.round(np.asarray(times, dtype=np.float64) * ticks_per_second).astype(np.int64)
+
+
+def encode_track(track, channel, ticks_per_second):
+    """Encode one instrument track (name, program change, notes) as an MTrk chunk"""
+    header = b""
+    if track.name:
+        header += _meta(0x03, track.name.encode("latin-1", "replace")[:127])
+    header += bytes([0x00, 0xC0 | channel, track.program & 0x7F])
+
+    n = len(track.pitch)
+    if n:
+        pitch = np.clip(track.pitch, 0, 127)
+        velocity = np.clip(track.velocity, 1, 127)
+        on_ticks = _seconds_to_ticks(track.start, ticks_per_second)
+        off_ticks = np.maximum(_seconds_to_ticks(track.end, ticks_per_second), on_ticks)
+
+        ticks = np.concatenate([on_ticks, off_ticks])
+        is_on = np.concatenate([np.ones(n, dtype=bool), np.zeros(n, dtype=bool)])
+        pitches = np.concatenate([pitch, pitch])
+        velocities = np.concatenate([velocity, np.zeros(n, dtype=np.int64)])
+
+        # Time order; at equal ticks note-offs go first so repeated pitches retrigger
+        order = np.lexsort((pitches, is_on, ticks))
+        ticks = ticks[order]
+        delta = np.diff(ticks, prepend=0)
+        status = np.where(is_on[order], 0x90, 0x80) | channel
+        body = encode_events(delta, status, pitches[order], velocities[order])
+    else:
+        body = b""
+
+    return _chunk(b"MTrk", header + body + b"\x00\xFF\x2F\x00")
+
+
+def encode_smf(tracks, resolution=DEFAULT_RESOLUTION, tempo_bpm=DEFAULT_TEMPO_BPM):
+    """Encode a list of Track note arrays into format-1 SMF bytes"""
+    ticks_per_second = resolution * tempo_bpm / 60.0
+    microseconds_per_beat = int(round(60_000_000 / tempo_bpm))
+
+    tempo_track = _chunk(
+        b"MTrk",
+        _meta(0x51, microseconds_per_beat.to_bytes(3, "big"))
+        + _meta(0x58, bytes([4, 2, 24, 8]))
+        + b"\x00\xFF\x2F\x00"
+    )
+    chunks = [_chunk(b"MThd", struct.pack(">HHH", 1, len(tracks) + 1, resolution)), tempo_track]
+    for index, track in enumerate(tracks):
+        chunks.append(encode_track(track, _channel_for(index), ticks_per_second))
+    return b"".join(chunks)
+
+
+def write_smf(tracks, output_file, **kwargs):
+    """Encode tracks and write them to a path or binary file object"""
+    data = encode_smf(tracks, **kwargs)
+    if hasattr(output_file, "write"):
+        output_file.write(data)
+    else:
+        with open(output_file, "wb") as f:
+            f.write(data)
+    return len(data)
+
+
+def _decoded_notes(data):
+    import pretty_midi
+
+    decoded = pretty_midi.PrettyMIDI(io.BytesIO(data))
+    return [(instrument.program, sorted((n.pitch, n.start, n.end, n.velocity) for n in instrument.notes))
+            for instrument in decoded.instruments]
+
+
+def verify_roundtrip(tracks, **kwargs):
+    """Check the encoder against pretty_midi's own writer
+
+    Both files are decoded with pretty_midi (so overlapping notes of the same
+    pitch are paired the same way) and every note must match to within one
+    tick of the coarser of the two tick grids. Returns the encoded bytes,
+    raises AssertionError on any mismatch.
+    """
+    from track_builder import tracks_to_pretty_midi
+
+    reference_midi = tracks_to_pretty_midi(tracks)
+    tolerance = max(60.0 / (kwargs.get("tempo_bpm", DEFAULT_TEMPO_BPM)
+                            * kwargs.get("resolution", DEFAULT_RESOLUTION)),
+                    reference_midi.tick_to_time(1))
+    data = encode_smf(tracks, **kwargs)
+    reference = io.BytesIO()
+    reference_midi.write(reference)
+
+    actual = _decoded_notes(data)
+    expected = _decoded_notes(reference.getvalue())
+    assert len(actual) == len(expected), "instrument count differs"
+    for (program, notes), (expected_program, expected_notes) in zip(actual, expected):
+        assert program == expected_program, "program differs"
+        assert len(notes) == len(expected_notes), "note count differs"
+        for (p, s, e, v), (p2, s2, e2, v2) in zip(notes, expected_notes):
+            assert p == p2 and v == v2, "pitch/velocity differs"
+            assert abs(s - s2) <= tolerance and abs(e - e2) <= tolerance, "timing differs"
+    return data
+
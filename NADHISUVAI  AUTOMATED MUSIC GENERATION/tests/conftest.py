@@ -0,0 +1,10 @@
+import os
+import sys
+
+PROJECT_DIR = os.path.dirname(os.path.dirname(os.path.abspath(__file__)))
+sys.path.insert(0, PROJECT_DIR)
+
+# The suite never reads the .h5 weights; tests that need a model install the
+# benchmark's seeded stub model instead
+os.environ.setdefault("MUSIC_MODEL_BACKEND", "none")
+os.environ.setdefault("WARM_POOL_SIZE", "0")
@@ -0,0 +1,67 @@
+import struct
+
+import numpy as np
+import pytest
+
+import audio_renderer
+import sample_code
+from track_builder import make_track
+
+SAMPLE_RATE = 8000
+
+
+def pcm(data):
+    return np.frombuffer(data, dtype="<i2").astype(np.int64)
+
+
+def test_wavetable_is_cached_and_normalized():
+    voice = audio_renderer.voice_for(104)
+    table = audio_renderer.wavetable(voice.harmonics)
+    assert table is audio_renderer.wavetable(voice.harmonics)
+    assert table.shape == (audio_renderer.TABLE_SIZE,) and table.dtype == np.float32
+    assert np.isclose(np.abs(table).max(), 1.0)
+    assert audio_renderer.voice_for(9999) is audio_renderer.DEFAULT_VOICE
+
+
+def test_single_note_has_the_right_pitch_and_length():
+    track = make_track("", 73, [69], [100], [0.0], [1.0])
+    samples = pcm(audio_renderer.render_pcm([track], SAMPLE_RATE))
+    voice = audio_renderer.voice_for(73)
+    assert len(samples) == int(np.ceil((1.0 + audio_renderer.TAIL_CONSTANTS * voice.release) * SAMPLE_RATE))
+    # Strongest frequency in the sustained part is A4
+    steady = samples[SAMPLE_RATE // 4:3 * SAMPLE_RATE // 4].astype(np.float64)
+    spectrum = np.abs(np.fft.rfft(steady * np.hanning(len(steady))))
+    assert abs(np.fft.rfftfreq(len(steady), 1 / SAMPLE_RATE)[spectrum.argmax()] - 440) < 4
+
+
+def test_wav_header_describes_the_pcm():
+    track = make_track("", 116, [60, 62], [90, 90], [0.0, 0.3], [0.2, 0.5])
+    data = audio_renderer.render_wav([track], SAMPLE_RATE)
+    riff, size, wave, _, _, fmt, channels, rate, _, _, bits, _, data_bytes = \
+        struct.unpack("<4sI4s4sIHHIIHH4sI", data[:44])
+    assert (riff, wave, fmt, channels, rate, bits) == (b"RIFF", b"WAVE", 1, 1, SAMPLE_RATE, 16)
+    assert data_bytes == len(data) - 44 and size == len(data) - 8
+
+
+def test_batched_synthesis_matches_one_batch(monkeypatch):
+    rng = np.random.default_rng(0)
+    start = np.sort(rng.uniform(0, 5, 60))
+    track = make_track("", 104, rng.integers(40, 90, 60), rng.integers(60, 120, 60), start, start + 0.3)
+    whole = pcm(audio_renderer.render_pcm([track], SAMPLE_RATE))
+    monkeypatch.setattr(audio_renderer, "MAX_BATCH_SAMPLES", 5000)
+    assert np.abs(pcm(audio_renderer.render_pcm([track], SAMPLE_RATE)) - whole).max() <= 1
+
+
+@pytest.mark.parametrize("genre", ["classical", "rock"])
+def test_stream_matches_the_full_render(genre):
+    seconds = 12.0
+    params = dict(sample_code.default_params(genre, 11))
+    chunks = list(sample_code.stream_note_chunks(params, seconds))
+    # The last chunk runs past the end, so clipping is exercised
+    assert chunks[-1][1] > seconds
+
+    streamed = b"".join(audio_renderer.iter_wav_stream(chunks, SAMPLE_RATE, end_time=seconds))[44:]
+    tracks = [track for lanes, _ in chunks for track in lanes.values()]
+    full = audio_renderer.render_pcm(audio_renderer.clip_tracks(tracks, seconds), SAMPLE_RATE)
+    assert len(streamed) == len(full)
+    assert np.abs(pcm(streamed) - pcm(full)).max() <= 1
@@ -0,0 +1,67 @@
+import numpy as np
+import pytest
+
+import batching
+import sample_code
+from batching import DynamicBatcher
+from numpy_backend import stub_model
+
+MODEL = stub_model(hidden_size=16, seed=2)
+
+
+def make_session(seed, num_notes=20, **kwargs):
+    rng = np.random.default_rng(seed)
+    start_sequence = sample_code.make_start_sequence("jazz", rng)
+    return sample_code.GenreNoteSession(start_sequence, num_notes, genre="jazz", rng=rng, **kwargs)
+
+
+def run_together(batcher, sessions):
+    futures = [batcher.submit(session) for session in sessions]
+    return [future.exception(timeout=10) or future.result() for future in futures]
+
+
+def test_bad_session_fails_alone_and_batcher_keeps_serving():
+    batcher = DynamicBatcher(MODEL.decoder, max_wait_ms=50)
+    alone = DynamicBatcher(MODEL.decoder).generate(make_session(1, top_p=0.9), timeout=10)
+
+    results = run_together(batcher, [make_session(1, top_p=0.9), make_session(2, top_p="bad")])
+    np.testing.assert_array_equal(results[0], alone)
+    assert isinstance(results[1], ValueError)
+
+    again = batcher.generate(make_session(1, top_p=0.9), timeout=10)
+    np.testing.assert_array_equal(again, alone)
+
+
+def test_decoder_failure_fails_batch_but_not_thread():
+    calls = {"count": 0}
+
+    def flaky_decoder():
+        calls["count"] += 1
+        decoder = MODEL.decoder()
+        if calls["count"] == 1:
+            def broken_step(tokens):
+                raise FloatingPointError("bad step")
+            decoder.step = broken_step
+        return decoder
+
+    batcher = DynamicBatcher(flaky_decoder)
+    with pytest.raises(FloatingPointError):
+        batcher.generate(make_session(3), timeout=10)
+    assert len(batcher.generate(make_session(3), timeout=10)) > 0
+
+
+def test_untruncated_batches_skip_truncation(monkeypatch):
+    seen = []
+    real_sample_batch = batching.sample_batch
+
+    def recording_sample_batch(probs, temperature, top_k=None, top_p=None, rng=None):
+        seen.append((top_k, top_p))
+        return real_sample_batch(probs, temperature, top_k=top_k, top_p=top_p, rng=rng)
+
+    monkeypatch.setattr(batching, "sample_batch", recording_sample_batch)
+    DynamicBatcher(MODEL.decoder).generate(make_session(4), timeout=10)
+    assert seen and all(top_k is None and top_p is None for top_k, top_p in seen)
+
+    seen.clear()
+    DynamicBatcher(MODEL.decoder).generate(make_session(4, top_k=5), timeout=10)
+    assert all(top_k == [5] and top_p is None for top_k, top_p in seen)
@@ -0,0 +1,38 @@
+import json
+import os
+import subprocess
+import sys
+
+import benchmark
+
+ARGS = ["--sizes", "30", "--genres", "jazz,rock", "--repeat", "1", "--hidden-size", "16"]
+
+
+def test_benchmark_report(tmp_path):
+    output = tmp_path / "bench.json"
+    benchmark.main(ARGS + ["--output", str(output)])
+    report = json.loads(output.read_text(encoding="utf-8"))
+    assert [(r["genre"], r["num_notes"]) for r in report["results"]] == [("jazz", 30), ("rock", 30)]
+    for result in report["results"]:
+        assert set(result["stages"]) == set(benchmark.STAGES)
+        assert result["midi_bytes"] > 0
+
+    compared = tmp_path / "compare.json"
+    benchmark.main(ARGS + ["--output", str(compared), "--compare", str(output), "--threshold", "1e9"])
+    assert json.loads(compared.read_text(encoding="utf-8"))["regressions"] == []
+
+
+def test_decoders_produce_the_same_piece():
+    model = benchmark.stub_model(hidden_size=16, seed=1)
+    _, stateful = benchmark.run_once(model, "jazz", 40, 5, "stateful", False)
+    _, windowed = benchmark.run_once(model, "jazz", 40, 5, "windowed", False)
+    assert stateful[:4] == b"MThd"
+    assert stateful == windowed
+
+
+def test_import_leaves_the_environment_alone():
+    env = {k: v for k, v in os.environ.items() if k not in ("MUSIC_MODEL_BACKEND", "WARM_POOL_SIZE")}
+    code = "import os, benchmark; print(os.environ.get('MUSIC_MODEL_BACKEND'), os.environ.get('WARM_POOL_SIZE'))"
+    result = subprocess.run([sys.executable, "-c", code], capture_output=True, text=True, check=True,
+                            cwd=os.path.dirname(os.path.dirname(os.path.abspath(__file__))), env=env)
+    assert result.stdout.split() == ["None", "None"]
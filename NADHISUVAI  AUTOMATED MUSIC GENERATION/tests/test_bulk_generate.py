@@ -0,0 +1,59 @@
+import json
+
+import pytest
+
+import benchmark
+import bulk_generate
+import sample_code
+
+
+def endpoint_midi(genre, seed, num_notes):
+    response = sample_code.app.test_client().get(
+        "/generate_music", query_string={"genre": genre, "seed": seed, "num_notes": num_notes})
+    assert response.status_code == 200
+    return response.data
+
+
+def cli_midi(genre, seed, num_notes):
+    job = {"id": f"{genre}_{seed}", "genre": genre, "seed": seed, "num_notes": num_notes,
+           "temperature": None}
+    _, data, source, _, _ = bulk_generate.generate_piece(job)
+    return data, source
+
+
+@pytest.mark.parametrize("genre", ["jazz", "rock", "classical"])
+def test_cli_matches_endpoint_without_model(genre):
+    data, source = cli_midi(genre, 11, 40)
+    assert source == "direct"
+    assert data == endpoint_midi(genre, 11, 40)
+
+
+@pytest.mark.parametrize("genre", ["jazz", "electronic", "melody"])
+def test_cli_matches_endpoint_with_model(monkeypatch, genre):
+    monkeypatch.setattr(sample_code, "model", benchmark.stub_model(hidden_size=32, seed=3))
+    monkeypatch.setattr(sample_code, "MODEL_VERSION", "stub:test")
+    data, source = cli_midi(genre, 12, 40)
+    assert source == "model"
+    assert data == endpoint_midi(genre, 12, 40)
+
+
+def test_resume_key_covers_every_generation_parameter():
+    job = bulk_generate.build_jobs({"jazz": 1}, 5, (40, 40), None)[0]
+    assert job["key"] == bulk_generate.job_key(dict(job, id="other"))
+    for change in ({"genre": "rock"}, {"seed": 6}, {"num_notes": 41}, {"temperature": 0.9}):
+        assert bulk_generate.job_key(dict(job, **change)) != job["key"]
+
+
+def test_resume_skips_only_pieces_with_the_same_parameters(tmp_path):
+    args = ["--counts", "jazz=2", "--num-notes", "20", "--workers", "1",
+            "--output-dir", str(tmp_path), "--part-size", "1"]
+    bulk_generate.main(args)
+    bulk_generate.main(args)
+    manifest = tmp_path / bulk_generate.MANIFEST_NAME
+    assert len(manifest.read_text(encoding="utf-8").splitlines()) == 2
+
+    # Same ids, different note count: a different piece, so not already done
+    bulk_generate.main(args[:3] + ["30"] + args[4:])
+    records = [json.loads(line) for line in manifest.read_text(encoding="utf-8").splitlines()]
+    assert sorted((r["id"], r["num_notes"]) for r in records[2:]) == [("jazz_0", 30), ("jazz_1", 30)]
+    assert len({r["key"] for r in records}) == 4
@@ -0,0 +1,58 @@
+import numpy as np
+import pytest
+
+import sample_code
+from candidate_scoring import NGRAM, score_candidates
+from numpy_backend import stub_model
+
+
+def score_one(notes, profile, chord_sequence_index):
+    # Per-row reference for the vectorized scores
+    raga_classes = {note % 12 for note in profile.raga.tolist()}
+    chords = profile.chord_sequences[chord_sequence_index].tolist()
+    raga = np.mean([note % 12 in raga_classes for note in notes])
+    chord = np.mean([note % 12 in {c % 12 for c in chords[i % len(chords)]} for i, note in enumerate(notes)])
+    repeats = np.mean([a == b for a, b in zip(notes, notes[1:])])
+    ngrams = sorted(tuple(notes[i:i + NGRAM]) for i in range(len(notes) - NGRAM + 1))
+    repeated_ngrams = np.mean([a == b for a, b in zip(ngrams, ngrams[1:])])
+    return raga, chord, (repeats + repeated_ngrams) / 2
+
+
+def test_scores_match_the_per_row_definition():
+    profile = sample_code.get_genre_profile("jazz")
+    rng = np.random.default_rng(0)
+    notes = rng.integers(48, 60, (6, 40))
+    notes[1, 10:30] = 55
+    indices = rng.integers(0, len(profile.chord_sequences), 6)
+    scores = score_candidates(notes, profile, indices)
+    for row in range(6):
+        raga, chord, repetition = score_one(notes[row].tolist(), profile, indices[row])
+        assert scores["raga"][row] == pytest.approx(raga)
+        assert scores["chord"][row] == pytest.approx(chord)
+        assert scores["repetition"][row] == pytest.approx(repetition)
+    assert scores["total"] == pytest.approx(scores["raga"] + 0.5 * scores["chord"] - scores["repetition"])
+
+
+def test_in_raga_varied_line_beats_a_repetitive_or_out_of_scale_one():
+    profile = sample_code.get_genre_profile("melody")
+    scale = profile.raga.tolist()
+    good = [scale[i % len(scale)] + 12 * (i // 3 % 2) for i in range(32)]
+    repetitive = [scale[0]] * 32
+    out_of_scale = [61, 63, 66, 68, 70] * 6 + [61, 63]
+    scores = score_candidates([repetitive, good, out_of_scale], profile, [0, 0, 0])
+    assert int(np.argmax(scores["total"])) == 1
+    assert scores["repetition"][0] > 0.9 and scores["raga"][2] == 0.0
+
+
+def test_best_of_k_returns_the_highest_scoring_candidate(monkeypatch):
+    monkeypatch.setattr(sample_code, "model", stub_model(hidden_size=16, seed=8))
+    rng = np.random.default_rng(3)
+    start_sequence = sample_code.make_start_sequence("pop", rng)
+    notes, scores, session = sample_code.generate_candidate_notes(
+        start_sequence, 24, 4, genre="pop", rng=np.random.default_rng(9))
+    assert scores["total"].shape == (4,)
+    assert scores["best"] == int(np.argmax(scores["total"]))
+    assert len(notes) == 24 and session.final_state is not None
+
+    again = sample_code.generate_candidate_notes(start_sequence, 24, 4, genre="pop", rng=np.random.default_rng(9))
+    np.testing.assert_array_equal(again[0], notes)
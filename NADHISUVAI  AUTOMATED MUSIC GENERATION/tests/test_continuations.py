@@ -0,0 +1,61 @@
+import numpy as np
+import pytest
+
+import sample_code
+from continuation_cache import Continuation, ContinuationCache
+from numpy_backend import stub_model
+
+
+@pytest.fixture
+def with_model(monkeypatch):
+    monkeypatch.setattr(sample_code, "model", stub_model(hidden_size=16, seed=4))
+    monkeypatch.setattr(sample_code, "MODEL_VERSION", "stub:continuations")
+
+
+def continue_piece(client, token, num_notes=30):
+    response = client.get("/continue_music", query_string={"token": token, "num_notes": num_notes})
+    assert response.status_code == 200
+    return response
+
+
+def test_put_with_token_replaces_the_value():
+    cache = ContinuationCache(max_entries=4)
+    token = cache.put("params")
+    assert cache.put("state", token=token) == token
+    assert cache.get(token) == "state"
+    assert cache.stats()["entries"] == 1
+
+
+def test_regenerated_state_is_stored_under_the_token(with_model, monkeypatch):
+    params = dict(sample_code.default_params("jazz", 21), num_notes=40)
+    token = sample_code.continuations.put(params)
+    calls = []
+    generate_model_piece = sample_code.generate_model_piece
+
+    def counting_generate_model_piece(p):
+        calls.append(p)
+        return generate_model_piece(p)
+
+    monkeypatch.setattr(sample_code, "generate_model_piece", counting_generate_model_piece)
+    client = sample_code.app.test_client()
+    first = continue_piece(client, token)
+    assert isinstance(sample_code.continuations.get(token), Continuation)
+    second = continue_piece(client, token)
+    assert len(calls) == 1
+    assert first.data == second.data
+
+    # Same segment as continuing the directly generated piece
+    _, continuation = generate_model_piece(params)
+    direct_token = sample_code.continuations.put(continuation)
+    assert continue_piece(client, direct_token).data == first.data
+
+
+def test_continued_session_has_base_session_state(with_model):
+    params = dict(sample_code.default_params("rock", 5), num_notes=20)
+    _, continuation = sample_code.generate_model_piece(params)
+    session = sample_code.ContinuedNoteSession(continuation, 10, np.random.default_rng(0))
+    assert session.chord_sequence_index == continuation.chord_sequence_index
+    assert session.temp == continuation.temp
+    assert session.keep_state and session.final_state is None
+    assert session.pattern == [] and not session.done
+    assert session.profile is sample_code.get_genre_profile("rock")
@@ -0,0 +1,67 @@
+import numpy as np
+import pytest
+
+import corpus_dataset
+from smf_encoder import encode_smf, write_smf
+from track_builder import make_track
+
+
+def melody(pitches, step=0.25):
+    start = np.arange(len(pitches)) * step
+    return make_track("", 0, pitches, np.full(len(pitches), 80), start, start + step)
+
+
+@pytest.fixture
+def corpus(tmp_path):
+    rng = np.random.default_rng(0)
+    lengths = {"rock": [70, 5, 64], "jazz": [90]}
+    expected = {}
+    for genre, sizes in lengths.items():
+        (tmp_path / "corpus" / genre).mkdir(parents=True)
+        for i, size in enumerate(sizes):
+            pitches = rng.integers(30, 100, size)
+            write_smf([melody(pitches)], str(tmp_path / "corpus" / genre / f"{i}.mid"))
+            expected[f"{genre}/{i}.mid"] = pitches
+    (tmp_path / "corpus" / "jazz" / "broken.mid").write_bytes(b"not midi")
+    return tmp_path, expected
+
+
+def test_reader_returns_pitches_in_time_then_pitch_order():
+    tracks = [melody([60, 62, 64]), melody([50, 70], step=0.5)]
+    pitches = corpus_dataset.read_note_pitches(encode_smf(tracks))
+    assert pitches.tolist() == [50, 60, 62, 64, 70]
+    with pytest.raises(ValueError):
+        corpus_dataset.read_note_pitches(b"MThd")
+
+
+def test_build_indexes_files_by_genre(corpus):
+    tmp_path, expected = corpus
+    dataset = corpus_dataset.build_dataset(str(tmp_path / "corpus"), str(tmp_path / "dataset"),
+                                           workers=2, min_tokens=51)
+    assert isinstance(dataset.tokens, np.memmap)
+    assert dataset.index["files"] == ["jazz/0.mid", "rock/0.mid", "rock/2.mid"]
+    assert dataset.index["skipped"] == 1 and len(dataset.index["errors"]) == 1
+    assert dataset.file_range("jazz") == (0, 1) and dataset.file_range("rock") == (1, 3)
+    for number, name in enumerate(dataset.index["files"]):
+        np.testing.assert_array_equal(dataset.file_tokens(number), expected[name])
+    assert len(dataset) == 90 + 70 + 64
+
+
+def test_batches_cover_every_in_file_window_once(corpus):
+    tmp_path, expected = corpus
+    dataset = corpus_dataset.build_dataset(str(tmp_path / "corpus"), str(tmp_path / "dataset"), workers=1)
+    window = 50
+    wanted = sorted(tuple(pitches[i:i + window + 1]) for name, pitches in expected.items()
+                    if name.startswith("rock") for i in range(len(pitches) - window))
+    assert dataset.num_windows(window, genre="rock") == len(wanted)
+
+    seen = []
+    for inputs, targets in dataset.batches(batch_size=8, window=window, genre="rock",
+                                           rng=np.random.default_rng(1)):
+        assert inputs.shape[1] == window and inputs.dtype == np.uint8
+        seen.extend(tuple(row) + (target,) for row, target in zip(inputs.tolist(), targets.tolist()))
+    assert sorted(seen) == wanted
+
+    windows = dataset.windows(window, genre="jazz")
+    assert windows.shape == (90 - window, window + 1)
+    assert corpus_dataset.as_model_input(windows[:2, :window]).shape == (2, window, 1)
@@ -0,0 +1,42 @@
+import numpy as np
+import pytest
+
+import sample_code
+from genre_profiles import build_snap_table
+
+
+def snap_one(raga, pitch):
+    nearest = min(raga, key=lambda x: abs(x - ((pitch % 12) + 48)))
+    return min(max(nearest + (pitch // 12 - 4) * 12, 0), 127)
+
+
+@pytest.mark.parametrize("genre", sorted(sample_code.RAGAS, key=str))
+def test_snap_table_matches_per_note_search(genre):
+    raga = sample_code.RAGAS[genre]
+    table = build_snap_table(raga)
+    assert table.tolist() == [snap_one(raga, pitch) for pitch in range(128)]
+
+
+@pytest.mark.parametrize("genre", sorted(sample_code.RAGAS, key=str))
+def test_snap_keeps_raga_notes_and_moves_others_to_a_neighbour(genre):
+    raga = sample_code.RAGAS[genre]
+    table = build_snap_table(raga)
+    pitch_classes = {note % 12 for note in raga}
+    for pitch in range(12, 116):
+        if pitch % 12 in pitch_classes:
+            assert table[pitch] == pitch
+        else:
+            assert table[pitch] % 12 in pitch_classes
+            assert abs(int(table[pitch]) - pitch) <= 2
+
+
+def test_render_notes_keeps_every_seventh_note():
+    profile = sample_code.get_genre_profile("jazz")
+    notes = np.arange(40, 80)
+    rendered = profile.render_notes(notes, 0, np.random.default_rng(0), offset=3)
+    kept = (3 + np.arange(len(notes))) % 7 == 0
+    np.testing.assert_array_equal(rendered[kept], notes[kept])
+    chord_tones = set(profile.chord_sequences[0].ravel().tolist())
+    snapped = profile.snap(notes)
+    for value, snap in zip(rendered[~kept], snapped[~kept]):
+        assert value == snap or value in chord_tones
@@ -0,0 +1,78 @@
+import asyncio
+import importlib
+import os
+import subprocess
+import sys
+import threading
+
+import pytest
+
+
+@pytest.mark.parametrize("module", ["sample_code", "asgi_worker", "asgi_app", "bulk_generate", "benchmark"])
+def test_module_imports(module):
+    importlib.import_module(module)
+
+
+def test_import_starts_no_warm_pool_threads():
+    import sample_code
+    assert not sample_code.warm_pool._threads
+    assert not [t for t in threading.enumerate() if t.name.startswith("warm-pool")]
+
+
+def test_app_serves_stats():
+    import sample_code
+    response = sample_code.app.test_client().get("/cache_stats")
+    assert response.status_code == 200
+
+
+def test_asgi_worker_backend_is_normalized(monkeypatch):
+    import asgi_app
+    monkeypatch.setenv("MUSIC_MODEL_BACKEND", "NumPy")
+    module = importlib.reload(asgi_app)
+    try:
+        assert module.WORKER_BACKEND == "numpy"
+        module.load_front_end()
+        assert module.WORKER_MODEL_VERSION.startswith("numpy:")
+        assert os.environ["MUSIC_MODEL_BACKEND"] == "NumPy"
+    finally:
+        monkeypatch.setenv("MUSIC_MODEL_BACKEND", "none")
+        importlib.reload(asgi_app)
+
+
+def test_asgi_app_leaves_the_environment_alone():
+    env = {k: v for k, v in os.environ.items() if k not in ("MUSIC_MODEL_BACKEND", "WARM_POOL_SIZE")}
+    code = ("import os, asgi_app; asgi_app.load_front_end(); "
+            "print(asgi_app.sample_code.MODEL_BACKEND, os.environ.get('MUSIC_MODEL_BACKEND'), "
+            "os.environ.get('WARM_POOL_SIZE'))")
+    result = subprocess.run([sys.executable, "-c", code], capture_output=True, text=True, check=True,
+                            cwd=os.path.dirname(os.path.dirname(os.path.abspath(__file__))), env=env)
+    assert result.stdout.split()[-3:] == ["none", "None", "None"]
+
+
+def call_asgi(app, method, path, query=b""):
+    messages = []
+
+    async def send(message):
+        messages.append(message)
+
+    scope = {"type": "http", "method": method, "path": path, "query_string": query}
+    asyncio.run(app(scope, None, send))
+    start, body = messages
+    return start["status"], dict(start["headers"]), body["body"]
+
+
+def test_asgi_head_sends_headers_only():
+    import asgi_app
+    import sample_code
+    app = asgi_app.MusicASGIApp(workers=1)
+    status, headers, body = call_asgi(app, "HEAD", "/health")
+    assert status == 200 and body == b"" and int(headers[b"content-length"]) > 0
+
+    params = sample_code.parse_generation_params({"genre": "jazz", "seed": "4242"})
+    data = b"MThd cached piece"
+    sample_code.midi_cache.put(sample_code.make_cache_key(params, asgi_app.WORKER_MODEL_VERSION), data)
+    query = b"genre=jazz&seed=4242"
+    assert call_asgi(app, "GET", "/generate_music", query)[2] == data
+    status, headers, body = call_asgi(app, "HEAD", "/generate_music", query)
+    assert status == 200 and body == b""
+    assert headers[b"content-length"] == str(len(data)).encode() and headers[b"x-cache"] == b"hit"
@@ -0,0 +1,70 @@
+import re
+
+import pytest
+
+import sample_code
+from metrics import Counter, MetricsRegistry, _Metric
+
+
+def families(text):
+    """{family name: TYPE} plus every sample name, checked against its family"""
+    types, samples = {}, []
+    for line in text.splitlines():
+        match = re.match(r"# TYPE (\S+) (\S+)", line)
+        if match:
+            types[match.group(1)] = match.group(2)
+        elif line and not line.startswith("#"):
+            samples.append(re.match(r"[a-zA-Z_:][a-zA-Z0-9_:]*", line).group(0))
+    return types, samples
+
+
+def test_counter_family_matches_its_samples():
+    registry = MetricsRegistry()
+    requests = registry.counter("music_requests", "Requests", ["genre"])
+    registry.counter("music_errors_total", "Errors")
+    requests.inc(genre="jazz")
+    requests.inc(2, genre="jazz")
+    text = registry.render()
+    types, samples = families(text)
+    assert types == {"music_requests_total": "counter", "music_errors_total": "counter"}
+    assert samples == ["music_requests_total"]
+    assert 'music_requests_total{genre="jazz"} 3' in text
+    assert requests.value(genre="jazz") == 3
+
+
+def test_histogram_samples_use_family_suffixes():
+    registry = MetricsRegistry()
+    latency = registry.histogram("music_request_seconds", "Latency", buckets=(0.1, 1.0))
+    latency.observe(0.5)
+    types, samples = families(registry.render())
+    assert types == {"music_request_seconds": "histogram"}
+    assert set(samples) == {"music_request_seconds_bucket", "music_request_seconds_sum",
+                            "music_request_seconds_count"}
+    assert 'music_request_seconds_bucket{le="1.0"} 1' in registry.render()
+
+
+def test_function_counter_reads_component_totals():
+    totals = {"hits": 2, "misses": 5}
+    registry = MetricsRegistry()
+    events = registry.counter("music_cache_events", "Cache events", ["event"],
+                              function=lambda: {(event,): count for event, count in totals.items()})
+    totals["hits"] += 1
+    text = registry.render()
+    assert families(text) == ({"music_cache_events_total": "counter"}, ["music_cache_events_total"] * 2)
+    assert 'music_cache_events_total{event="hits"} 3' in text
+    assert events.value(event="misses") == 5
+    with pytest.raises(TypeError):
+        events.inc(event="hits")
+
+
+def test_metric_base_is_abstract():
+    with pytest.raises(TypeError):
+        _Metric("music_base", "Base")
+    assert isinstance(Counter("music_things", "Things"), _Metric)
+
+
+def test_service_exports_cache_events_as_a_counter():
+    text = sample_code.app.test_client().get("/metrics").get_data(as_text=True)
+    types, samples = families(text)
+    assert types["music_cache_events_total"] == "counter" and "music_cache_events" not in types
+    assert 'music_cache_events_total{event="misses"}' in text
@@ -0,0 +1,52 @@
+import os
+
+import sample_code
+from midi_cache import MidiCache, make_cache_key
+
+
+def test_cache_key_is_content_addressed():
+    params = sample_code.default_params("jazz", 7)
+    assert make_cache_key(params, "v1") == make_cache_key(dict(reversed(list(params.items()))), "v1")
+    assert make_cache_key(params, "v1") != make_cache_key(params, "v2")
+    assert make_cache_key(params, "v1") != make_cache_key(dict(params, seed=8), "v1")
+
+
+def test_memory_lru_evicts_least_recently_used():
+    cache = MidiCache(max_memory_bytes=30)
+    for key in "abc":
+        cache.put(key, key.encode() * 10)
+    assert cache.get("a") == b"a" * 10
+    cache.put("d", b"d" * 10)
+
+    assert cache.get("b") is None
+    assert [cache.get(key) is not None for key in "acd"] == [True, True, True]
+    stats = cache.stats()
+    assert stats["memory_evictions"] == 1
+    assert stats["memory_entries"] == 3 and stats["memory_bytes"] == 30
+    assert stats["misses"] == 1 and stats["memory_hits"] == 4
+
+
+def test_disk_cache_survives_a_restart_and_is_bounded(tmp_path):
+    cache = MidiCache(max_memory_bytes=10, disk_dir=str(tmp_path), max_disk_bytes=25)
+    cache.put("a", b"a" * 10)
+    cache.put("b", b"b" * 10)
+    # The in-memory LRU only holds "b"; "a" is served from disk
+    assert cache.get("a") == b"a" * 10
+    assert cache.stats()["disk_hits"] == 1
+    cache.put("c", b"c" * 10)
+
+    assert sorted(os.listdir(tmp_path)) == ["a.mid", "c.mid"]
+    restarted = MidiCache(max_memory_bytes=10, disk_dir=str(tmp_path), max_disk_bytes=25)
+    assert restarted.get("c") == b"c" * 10
+    assert restarted.get("b") is None
+    assert restarted.stats()["disk_entries"] == 2
+
+
+def test_seeded_requests_are_served_from_the_cache():
+    client = sample_code.app.test_client()
+    query = {"genre": "rock", "seed": 90210}
+    first = client.get("/generate_music", query_string=query)
+    second = client.get("/generate_music", query_string=query)
+    assert first.headers["X-Cache"] == "miss"
+    assert second.headers["X-Cache"] == "hit"
+    assert first.data == second.data
@@ -0,0 +1,33 @@
+import pytest
+
+import sample_code
+
+
+def unsupported(path):
+    raise ValueError("Layer type 'GRU' is not supported by the NumPy backend")
+
+
+def missing_key(path):
+    raise KeyError("model_config")
+
+
+@pytest.mark.parametrize("backend, loader", [("numpy", "load_numpy_model"),
+                                             ("int8", "load_quantized_model")])
+@pytest.mark.parametrize("failure", [unsupported, missing_key])
+def test_unsupported_layers_fall_back_to_keras(monkeypatch, backend, loader, failure):
+    keras_model = object()
+    monkeypatch.setattr(sample_code, loader, failure)
+    monkeypatch.setattr(sample_code, "load_keras_model", lambda path: keras_model)
+    assert sample_code.load_model_for_backend(backend, "model.h5") is keras_model
+
+
+def test_missing_weights_do_not_fall_back(monkeypatch):
+    def keras_must_not_load(path):
+        raise AssertionError("Keras fallback used for a missing file")
+    monkeypatch.setattr(sample_code, "load_keras_model", keras_must_not_load)
+    with pytest.raises(OSError):
+        sample_code.load_model_for_backend("numpy", "/nonexistent/model.h5")
+
+
+def test_none_backend_loads_nothing():
+    assert sample_code.load_model_for_backend("none", "model.h5") is None
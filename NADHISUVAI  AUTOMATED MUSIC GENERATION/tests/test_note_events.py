@@ -0,0 +1,63 @@
+import json
+
+import numpy as np
+import pytest
+
+import sample_code
+from note_events import iter_note_events
+from numpy_backend import stub_model
+from track_builder import make_track
+
+
+def lane(starts, pitch=60):
+    starts = np.asarray(starts, dtype=np.float64)
+    return make_track("", 0, np.full(len(starts), pitch), np.full(len(starts), 80), starts, starts + 0.5)
+
+
+def read_stream(response):
+    lines = response.get_data(as_text=True).split("\n")
+    assert lines[-1] == ""
+    return [json.loads(line) for line in lines[:-1]]
+
+
+def test_events_are_released_in_order_up_to_the_watermark():
+    chunks = [
+        ({"lead": lane([0.0, 1.0, 2.0]), "rhythm": lane([0.5, 2.5, 3.5], pitch=45)}, 3.0),
+        ({"lead": lane([3.0, 4.0]), "drone": lane([2.8])}, 5.0),
+    ]
+    batches = list(iter_note_events(chunks))
+    assert [event["start"] for event in batches[0]] == [0.0, 0.5, 1.0, 2.0, 2.5]
+    assert [event["start"] for event in batches[1]] == [2.8, 3.0, 3.5, 4.0]
+    assert batches[0][1] == {"type": "note", "lane": "rhythm", "program": 0, "pitch": 45,
+                             "velocity": 80, "start": 0.5, "end": 1.0}
+
+
+def test_events_past_the_end_are_dropped():
+    chunks = [({"lead": lane([0.0, 1.0, 2.0, 3.0])}, 4.0)]
+    events = [event for batch in iter_note_events(chunks, end_time=2.0) for event in batch]
+    assert [event["start"] for event in events] == [0.0, 1.0]
+
+
+@pytest.mark.parametrize("use_model", [False, True])
+def test_stream_music_is_ndjson_in_start_order(use_model, monkeypatch):
+    if use_model:
+        monkeypatch.setattr(sample_code, "model", stub_model(hidden_size=16, seed=6))
+    client = sample_code.app.test_client()
+    response = client.get("/stream_music", query_string={"genre": "classical", "seed": 3, "seconds": 20})
+    assert response.status_code == 200
+    assert response.mimetype == "application/x-ndjson"
+
+    header, *events = read_stream(response)
+    assert header == {"type": "header", "genre": "classical", "seed": 3, "seconds": 20.0,
+                      "source": "model" if use_model else "direct"}
+    starts = [event["start"] for event in events]
+    assert events and starts == sorted(starts) and starts[-1] < 20
+    assert {event["lane"] for event in events} >= {"lead", "drone"}
+    assert read_stream(client.get("/stream_music",
+                                  query_string={"genre": "classical", "seed": 3, "seconds": 20})) == [header] + events
+
+
+def test_stream_music_rejects_bad_lengths():
+    client = sample_code.app.test_client()
+    assert client.get("/stream_music", query_string={"seconds": "abc"}).status_code == 400
+    assert client.get("/stream_music", query_string={"seconds": 0}).status_code == 400
@@ -0,0 +1,58 @@
+import os
+import subprocess
+import sys
+
+import numpy as np
+
+import quantized_backend
+from numpy_backend import stub_model
+
+
+def test_quantize_per_channel_error_is_within_half_a_step():
+    weights = np.random.default_rng(0).normal(size=(64, 32)).astype(np.float32)
+    weights[:, 3] = 0.0
+    q, scale = quantized_backend.quantize_per_channel(weights)
+    assert q.dtype == np.int8 and scale.dtype == np.float32
+    error = np.abs(quantized_backend.dequantize(q, scale) - weights)
+    assert np.all(error <= scale / 2 + 1e-7)
+    assert not quantized_backend.dequantize(q, scale)[:, 3].any()
+
+
+def test_quantized_layers_hold_int8_kernels():
+    reference = stub_model(hidden_size=64, seed=0)
+    candidate = quantized_backend.NumpyMusicModel(quantized_backend.quantize_layers(reference.layers))
+    for layer in candidate.layers:
+        if isinstance(layer, (quantized_backend.QuantizedLSTMLayer, quantized_backend.QuantizedDenseLayer)):
+            kernels = [value for name, value in vars(layer).items() if name.endswith("_q")]
+            assert kernels and all(kernel.dtype == np.int8 for kernel in kernels)
+            assert not hasattr(layer, "kernel")
+    ratio = quantized_backend.weight_bytes(candidate) / quantized_backend.weight_bytes(reference)
+    assert 0.24 < ratio < 0.3
+
+
+def test_int8_matmul_matches_dequantized_kernel():
+    rng = np.random.default_rng(1)
+    q, scale = quantized_backend.quantize_per_channel(rng.normal(size=(40, 600)))
+    x = rng.normal(size=(3, 40)).astype(np.float32)
+    expected = x @ quantized_backend.dequantize(q, scale)
+    np.testing.assert_allclose(quantized_backend._int8_matmul(x, q, scale), expected, rtol=1e-5, atol=1e-5)
+
+
+def test_quantized_model_tracks_float_model():
+    reference = stub_model(hidden_size=32, seed=0)
+    candidate = quantized_backend.NumpyMusicModel(quantized_backend.quantize_layers(reference.layers))
+    rng = np.random.default_rng(0)
+    start_sequences = rng.integers(48, 73, size=(8, 50))
+    report = quantized_backend.compare_models(reference, candidate, start_sequences, 50, rng)
+    assert report["kl_max"] < 1e-3
+    assert report["top1_agreement"] > 0.95
+
+
+def test_stub_cli_does_not_import_the_service():
+    code = ("import sys, quantized_backend; "
+            "quantized_backend.main(['--stub', '--hidden-size', '16', '--rows', '2', '--steps', '5']); "
+            "assert 'sample_code' not in sys.modules")
+    result = subprocess.run([sys.executable, "-c", code], cwd=os.path.dirname(os.path.abspath(quantized_backend.__file__)),
+                            capture_output=True, text=True)
+    assert result.returncode == 0, result.stderr
+    assert "top-1 agreement" in result.stdout
@@ -0,0 +1,79 @@
+import numpy as np
+import pytest
+
+from sampling import sample_batch, truncate_logits
+
+VOCAB = 16
+
+
+def random_probs(batch_size, seed=0):
+    probs = np.random.default_rng(seed).random((batch_size, VOCAB)) ** 4
+    return probs / probs.sum(axis=1, keepdims=True)
+
+
+def test_seeded_draws_are_reproducible():
+    probs = random_probs(8)
+    first = sample_batch(probs, rng=np.random.default_rng(3))
+    second = sample_batch(probs, rng=np.random.default_rng(3))
+    np.testing.assert_array_equal(first, second)
+
+
+def test_per_row_rngs_do_not_depend_on_batching():
+    probs = random_probs(4)
+    together = sample_batch(probs, rng=[np.random.default_rng(seed) for seed in range(4)])
+    alone = [sample_batch(probs[row], rng=[np.random.default_rng(row)])[0] for row in range(4)]
+    np.testing.assert_array_equal(together, alone)
+
+
+def test_top_k_one_and_low_temperature_pick_the_argmax():
+    probs = random_probs(32)
+    rng = np.random.default_rng(0)
+    np.testing.assert_array_equal(sample_batch(probs, top_k=1, rng=rng), probs.argmax(axis=1))
+    np.testing.assert_array_equal(sample_batch(probs, temperature=1e-3, rng=rng), probs.argmax(axis=1))
+
+
+def test_top_k_restricts_to_the_k_most_likely():
+    probs = random_probs(1)[0]
+    allowed = set(np.argsort(-probs)[:3])
+    draws = sample_batch(np.tile(probs, (2000, 1)), top_k=3, rng=np.random.default_rng(1))
+    assert set(draws) <= allowed
+    assert len(set(draws)) > 1
+
+
+def test_top_p_keeps_the_nucleus_and_the_top_token():
+    probs = np.array([0.5, 0.3, 0.1, 0.06, 0.04])
+    draws = sample_batch(np.tile(probs, (2000, 1)), top_p=0.7, rng=np.random.default_rng(2))
+    assert set(draws) == {0, 1}
+    draws = sample_batch(np.tile(probs, (100, 1)), top_p=0.01, rng=np.random.default_rng(2))
+    assert set(draws) == {0}
+
+
+def test_per_row_truncation():
+    probs = np.tile(random_probs(1)[0], (3, 1))
+    logits = truncate_logits(np.log(probs), top_k=np.array([1, 0, 3]), top_p=np.array([1.0, 1.0, 1.0]))
+    assert np.isfinite(logits).sum(axis=1).tolist() == [1, VOCAB, 3]
+
+
+def test_disabled_truncation_matches_none():
+    probs = random_probs(8)
+    plain = sample_batch(probs, rng=np.random.default_rng(5))
+    disabled = sample_batch(probs, top_k=0, top_p=1.0, rng=np.random.default_rng(5))
+    np.testing.assert_array_equal(plain, disabled)
+
+
+def test_empirical_distribution_follows_probs():
+    probs = np.array([0.6, 0.25, 0.1, 0.05])
+    draws = sample_batch(np.tile(probs, (20000, 1)), rng=np.random.default_rng(4))
+    frequencies = np.bincount(draws, minlength=len(probs)) / len(draws)
+    np.testing.assert_allclose(frequencies, probs, atol=0.015)
+
+
+@pytest.mark.parametrize("temperature", [0.5, 2.0])
+def test_temperature_rescales_the_distribution(temperature):
+    probs = np.array([0.6, 0.25, 0.1, 0.05])
+    draws = sample_batch(np.tile(probs, (20000, 1)), temperature=temperature,
+                         rng=np.random.default_rng(6))
+    expected = probs ** (1 / temperature)
+    expected /= expected.sum()
+    frequencies = np.bincount(draws, minlength=len(probs)) / len(draws)
+    np.testing.assert_allclose(frequencies, expected, atol=0.015)
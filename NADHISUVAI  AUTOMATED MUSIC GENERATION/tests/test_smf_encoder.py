@@ -0,0 +1,56 @@
+import io
+
+import numpy as np
+import pytest
+
+import sample_code
+from smf_encoder import encode_smf, verify_roundtrip, write_smf
+from track_builder import make_track
+
+
+def random_tracks(n=2000, seed=0):
+    rng = np.random.default_rng(seed)
+    starts = np.cumsum(rng.uniform(0.05, 0.4, n))
+    return [
+        make_track("sitar", 104, rng.integers(36, 96, n), rng.integers(40, 120, n),
+                   starts, starts + rng.uniform(0.1, 0.5, n)),
+        # Unsorted, overlapping notes on a second channel
+        make_track("tabla", 116, rng.integers(45, 52, n), rng.integers(60, 90, n),
+                   starts[::-1] * 0.5, starts[::-1] * 0.5 + 0.2),
+    ]
+
+
+def test_roundtrip_matches_pretty_midi():
+    data = verify_roundtrip(random_tracks())
+    assert data.startswith(b"MThd")
+
+
+@pytest.mark.parametrize("resolution, tempo_bpm", [(96, 90), (480, 140)])
+def test_roundtrip_with_other_timing(resolution, tempo_bpm):
+    # Each note ends before the next starts: at a different tick grid than the
+    # pretty_midi reference, overlapping same-pitch notes could pair differently
+    rng = np.random.default_rng(1)
+    gaps = rng.uniform(0.05, 0.4, 300)
+    starts = np.cumsum(gaps)
+    track = make_track("sitar", 104, rng.integers(36, 96, 300), rng.integers(40, 120, 300),
+                       starts, starts + 0.8 * gaps)
+    verify_roundtrip([track], resolution=resolution, tempo_bpm=tempo_bpm)
+
+
+def test_roundtrip_of_generated_piece():
+    params = sample_code.default_params("jazz", 3)
+    verify_roundtrip(sample_code.generate_fallback_tracks(params))
+
+
+def test_empty_track_is_encoded():
+    empty = make_track("empty", 0, [], [], [], [])
+    verify_roundtrip([empty] + random_tracks(50))
+
+
+def test_write_smf_matches_encode_smf(tmp_path):
+    tracks = random_tracks(100)
+    buffer = io.BytesIO()
+    assert write_smf(tracks, buffer) == len(encode_smf(tracks))
+    assert buffer.getvalue() == encode_smf(tracks)
+    write_smf(tracks, tmp_path / "piece.mid")
+    assert (tmp_path / "piece.mid").read_bytes() == encode_smf(tracks)
@@ -0,0 +1,81 @@
+import numpy as np
+import pytest
+
+import sample_code
+import track_builder
+
+
+def assert_valid(track, min_length=0.0):
+    assert len(track.velocity) == len(track.start) == len(track.end) == len(track)
+    assert np.all((track.pitch >= 0) & (track.pitch <= 127))
+    assert np.all((track.velocity >= 1) & (track.velocity <= 127))
+    assert np.all(track.start >= 0)
+    assert np.all(track.end - track.start > min_length)
+
+
+@pytest.mark.parametrize("genre", ["classical", "fastbeat", "rock", "reggae", "jazz"])
+def test_direct_tracks(genre):
+    profile = sample_code.get_genre_profile(genre)
+    tracks = track_builder.build_direct_tracks(profile, genre, rng=np.random.default_rng(0), num_notes=200)
+    *drone, lead, rhythm = tracks
+    assert len(drone) == (genre in track_builder.DRONE_GENRES_DIRECT)
+    for track in tracks:
+        assert_valid(track)
+
+    assert len(lead) == 200
+    assert np.all(np.diff(lead.start) > 0)
+    assert set(((lead.pitch - 48) % 12).tolist()) <= set(((profile.raga - 48) % 12).tolist())
+    assert lead.pitch.min() >= profile.raga.min() and lead.pitch.max() <= profile.raga.max() + 24
+    # Rhythm on the 0.2s grid with about a fifth of the beats skipped
+    assert np.allclose(rhythm.start / 0.2, np.rint(rhythm.start / 0.2))
+    assert 0.7 < len(rhythm) / 300 < 0.9
+
+
+@pytest.mark.parametrize("genre", ["melody", "pop", "fastbeat", "jazz"])
+def test_model_tracks(genre):
+    profile = sample_code.get_genre_profile(genre)
+    notes = np.random.default_rng(1).integers(48, 84, 4000)
+    tracks = track_builder.build_model_tracks(notes, profile, genre, rng=np.random.default_rng(2))
+    *drone, main, secondary = tracks
+    assert len(drone) == (genre in track_builder.DRONE_GENRES_MODEL)
+    for track in drone + [main]:
+        assert_valid(track)
+    # As in the original loop, a secondary melody note starts up to 0.1s late
+    # but ends at 90% of its duration, so very short notes can end first
+    assert_valid(secondary, min_length=-0.1)
+
+    assert np.all(np.diff(main.start) > 0)
+    assert np.all((main.velocity >= 60) & (main.velocity <= 127))
+    # About 80% of the melody stays on the primary instrument
+    melody_notes = len(notes) - len(main)
+    assert 0.77 < len(main) / len(notes) < 0.83
+    secondary_melody = secondary.velocity[:melody_notes]
+    assert secondary_melody.max() <= 100
+    has_rhythm = len(secondary) > melody_notes
+    assert has_rhythm == (genre in track_builder.RHYTHM_GENRES_MODEL)
+
+
+def test_model_tracks_are_seeded():
+    profile = sample_code.get_genre_profile("melody")
+    notes = np.arange(48, 80)
+    first = track_builder.build_model_tracks(notes, profile, "melody", rng=np.random.default_rng(5))
+    second = track_builder.build_model_tracks(notes, profile, "melody", rng=np.random.default_rng(5))
+    for a, b in zip(first, second):
+        for x, y in zip(a, b):
+            np.testing.assert_array_equal(x, y)
+
+
+def test_stream_chunks_continue_the_clock():
+    profile = sample_code.get_genre_profile("classical")
+    stream = track_builder.ModelTrackStream(profile, "classical", rng=np.random.default_rng(3))
+    lead_starts, drone_starts = [], []
+    for chunk in np.array_split(np.arange(48, 108), 4):
+        lanes = stream.feed(chunk)
+        lead_starts.append(lanes["lead"].start)
+        if "drone" in lanes:
+            drone_starts.append(lanes["drone"].start[:len(lanes["drone"]) // 2 + 1])
+    lead_starts = np.concatenate(lead_starts)
+    assert stream.position == 60
+    assert np.all(np.diff(lead_starts) > 0) and lead_starts[-1] < stream.time
+    drone_roots = np.concatenate(drone_starts)
+    assert drone_roots[0] == 0.0 and stream.drone_time > stream.time - 2.0
@@ -0,0 +1,69 @@
+import threading
+import time
+
+from warm_pool import WarmPool
+
+
+def wait_for(predicate, timeout=5.0):
+    deadline = time.monotonic() + timeout
+    while not predicate():
+        assert time.monotonic() < deadline, "timed out"
+        time.sleep(0.01)
+
+
+def counting_generator():
+    seeds = iter(range(1000))
+    lock = threading.Lock()
+
+    def generate(genre):
+        with lock:
+            seed = next(seeds)
+        return seed, f"{genre}-{seed}".encode()
+
+    return generate
+
+
+def test_pool_fills_to_target_and_refills_after_pops():
+    pool = WarmPool(counting_generator(), ["rock", "jazz"], target_size=3, workers=2)
+    pool.start()
+    wait_for(lambda: pool.stats()["pool_sizes"] == {"rock": 3, "jazz": 3})
+
+    seed, data = pool.pop("rock")
+    assert data == f"rock-{seed}".encode()
+    pool.pop("rock")
+    wait_for(lambda: pool.stats()["pool_sizes"]["rock"] == 3)
+    stats = pool.stats()
+    assert stats["generated"] == 8 and stats["hits"] == 2
+    assert stats["demand"]["rock"] > stats["demand"]["jazz"] == 0
+
+
+def test_empty_or_unknown_genre_is_a_miss():
+    pool = WarmPool(counting_generator(), ["rock"], target_size=0)
+    pool.start()
+    assert pool.pop("rock") is None
+    assert pool.pop("polka") is None
+    assert pool.stats()["misses"] == 1
+    assert not pool._threads
+
+
+def test_most_demanded_genre_is_refilled_first():
+    pool = WarmPool(counting_generator(), ["rock", "jazz", "pop"], target_size=2, workers=1)
+    for _ in range(5):
+        pool.pop("jazz")
+    assert pool._next_genre() == "jazz"
+
+
+def test_generation_errors_are_counted_and_the_worker_keeps_going(monkeypatch):
+    monkeypatch.setattr(time, "sleep", lambda seconds: None)
+    calls = []
+
+    def flaky(genre):
+        calls.append(genre)
+        if len(calls) == 1:
+            raise RuntimeError("boom")
+        return len(calls), b"piece"
+
+    pool = WarmPool(flaky, ["rock"], target_size=2, workers=1)
+    pool.start()
+    wait_for(lambda: pool.stats()["pool_sizes"]["rock"] == 2)
+    assert pool.stats()["errors"] == 1
@@ -0,0 +1,112 @@
+# Background pre-generation pool
+# Keeps a few ready-made pieces per genre so unseeded "give me a new piece in
+# genre X" requests are served by an O(1) pop instead of waiting for the LSTM.
+# Background workers refill the pool, most-demanded genres first.
+import math
+import threading
+import time
+from collections import deque
+
+
+class WarmPool:
+    """Per-genre pool of pre-generated (seed, midi_bytes) pieces
+
+    `generate_fn(genre)` must return a (seed, midi_bytes) tuple. Demand is an
+    exponentially decaying request count per genre; the refill scheduler
+    always works on the genre with the highest demand-weighted shortfall.
+    """
+
+    def __init__(self, generate_fn, genres, target_size=4, workers=2, demand_half_life=300.0):
+        self.generate_fn = generate_fn
+        self.genres = list(genres)
+        self.target_size = target_size
+        self.workers = workers
+        self.demand_half_life = demand_half_life
+        self._pools = {genre: deque() for genre in self.genres}
+        self._in_flight = {genre: 0 for genre in self.genres}
+        self._demand = {genre: (0.0, time.monotonic()) for genre in self.genres}
+        self._condition = threading.Condition()
+        self._threads = []
+        self.counters = {"hits": 0, "misses": 0, "generated": 0, "errors": 0}
+
+    def start(self):
+        """Start the refill workers; safe to call repeatedly"""
+        if self._threads:
+            return
+        with self._condition:
+            if self._threads or self.target_size <= 0:
+                return
+            for i in range(self.workers):
+                thread = threading.Thread(target=self._worker, name=f"warm-pool-{i}", daemon=True)
+                thread.start()
+                self._threads.append(thread)
+
+    def _decayed_demand(self, genre, now):
+        score, updated = self._demand[genre]
+        return score * math.pow(0.5, (now - updated) / self.demand_half_life)
+
+    def _record_demand(self, genre):
+        now = time.monotonic()
+        self._demand[genre] = (self._decayed_demand(genre, now) + 1.0, now)
+
+    def pop(self, genre):
+        """Return a ready (seed, midi_bytes) for the genre, or None if the pool is empty"""
+        with self._condition:
+            if genre not in self._pools:
+                return None
+            self._record_demand(genre)
+            pool = self._pools[genre]
+            if pool:
+                self.counters["hits"] += 1
+                piece = pool.popleft()
+            else:
+                self.counters["misses"] += 1
+                piece = None
+            self._condition.notify()
+            return piece
+
+    def _next_genre(self):
+        # Caller holds the lock; highest demand-weighted shortfall first,
+        # with a small base weight so idle genres still get filled eventually
+        now = time.monotonic()
+        best, best_priority = None, 0.0
+        for genre in self.genres:
+            shortfall = self.target_size - len(self._pools[genre]) - self._in_flight[genre]
+            if shortfall <= 0:
+                continue
+            priority = shortfall * (1.0 + self._decayed_demand(genre, now))
+            if priority > best_priority:
+                best, best_priority = genre, priority
+        return best
+
+    def _worker(self):
+        while True:
+            with self._condition:
+                genre = self._next_genre()
+                while genre is None:
+                    self._condition.wait()
+                    genre = self._next_genre()
+                self._in_flight[genre] += 1
+            try:
+                piece = self.generate_fn(genre)
+            except Exception as e:
+                print(f"Warm pool generation failed for '{genre}': {e}")
+                piece = None
+                time.sleep(1.0)
+            with self._condition:
+                self._in_flight[genre] -= 1
+                if piece is not None:
+                    self._pools[genre].append(piece)
+                    self.counters["generated"] += 1
+                else:
+                    self.counters["errors"] += 1
+
+    def stats(self):
+        with self._condition:
+            now = time.monotonic()
+            return dict(
+                self.counters,
+                target_size=self.target_size,
+                pool_sizes={genre: len(pool) for genre, pool in self._pools.items()},
+                demand={genre: round(self._decayed_demand(genre, now), 3) for genre in self.genres},
+            )
@@ -1,7 +1,11 @@
 import os
 from collections import defaultdict
+from src.resume_corpus import ResumeCorpus
 
 class LearningPathGenerator:
+    # Learning paths are built from the text resumes only
+    RESUME_PATTERNS = ('*.txt',)
+
     def __init__(self):
         # Enhanced resource database with better organization
         self.resources = {
@@ -99,27 +103,30 @@ class LearningPathGenerator:
         
         return output_path
 
-    def process_resumes(self, resume_dir, required_skills, output_dir):
-        """Process all resumes and generate comprehensive learning paths"""
+    def process_resumes(self, resume_dir, required_skills, output_dir, corpus=None):
+        """Process all resumes and generate comprehensive learning paths
+
+        Pass a shared ResumeCorpus to reuse resumes already loaded by other
+        analyses; only its RESUME_PATTERNS files are used, as without one.
+        """
         required_skills = [skill.lower().strip() for skill in required_skills]
         generated_reports = []
+        if corpus is None:
+            corpus = ResumeCorpus(resume_dir, patterns=self.RESUME_PATTERNS)
+        else:
+            corpus = corpus.view(self.RESUME_PATTERNS)
         
-        for filename in os.listdir(resume_dir):
-            if filename.endswith('.txt'):
-                candidate_name = filename[:-4].replace('_', ' ').title()
-                resume_path = os.path.join(resume_dir, filename)
-                
-                with open(resume_path, 'r', encoding='utf-8') as f:
-                    content = f.read().lower()
-                
-                missing_skills = [
-                    skill for skill in required_skills 
-                    if skill and skill not in content
-                ]
-                
-                if missing_skills:
-                    path = self.generate_learning_path(missing_skills)
-                    report_path = self.create_learning_report(candidate_name, path, output_dir)
-                    generated_reports.append(report_path)
+        for record in corpus:
+            content = record.lower
+            
+            missing_skills = [
+                skill for skill in required_skills 
+                if skill and skill not in content
+            ]
+            
+            if missing_skills:
+                path = self.generate_learning_path(missing_skills)
+                report_path = self.create_learning_report(record.name, path, output_dir)
+                generated_reports.append(report_path)
         
         return generated_reports
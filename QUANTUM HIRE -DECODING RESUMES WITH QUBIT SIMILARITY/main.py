@@ -7,7 +7,8 @@ from datetime import datetime
  from pathlib import Path
  from collections import defaultdict 
 from typing import List
- import PyPDF2
+ from src import pdf_extraction
+ from src.resume_corpus import ResumeCorpus
  from src.team_comparison import TeamAnalyzer 
 from src.skill_gap_analysis import SkillGapAnalyzer
  from src.quantum_similarity import QuantumResumeMatcher 
@@ -18,17 +19,17 @@ from src.resume_ranking import ResumeRanker
  from src.shortlist_justification_generator import ShortlistJustificationGenerator 
 from src.report_generator import ReportGenerator
 def extract_text_from_pdf(pdf_path):
- """Extract text content from PDF resume""" 
-try:
- with open(pdf_path, 'rb') as f: 
-reader = PyPDF2.PdfReader(f) 
-text = ""
- for page in reader.pages: 
-text += page.extract_text()
- return text 
-except Exception as e:
- print(f"Error reading PDF {pdf_path.name}: {str(e)}") 
-return ""
+    """Extract text content from PDF resume (parsed once, then served from the text cache)"""
+    return pdf_extraction.extract_text_from_pdf(pdf_path)
+
+_resume_corpus = None
+
+def get_resume_corpus():
+    """Resumes in data/resumes/pdf, loaded once and shared by every analysis"""
+    global _resume_corpus
+    if _resume_corpus is None:
+        _resume_corpus = ResumeCorpus(Path('data/resumes/pdf'))
+    return _resume_corpus
  def display_menu():
  print("\n=== Resume Analysis Suite ===") 
 print("1. Team Comparison Analysis") 
@@ -71,11 +72,12 @@ return size
  print("\n=== Team Comparison Analysis ===") 
 if not validate_resume_dir():
  return
- analyzer = TeamAnalyzer(Path('data/resumes/pdf')) 
+ # Every analyzer takes the shared corpus and picks the resume files it reads
+ analyzer = TeamAnalyzer(Path('data/resumes/pdf'), corpus=get_resume_corpus()) 
 requirements = get_skills_input()
  try:
  # Count total resumes first
- total_candidates = len(list(Path('data/resumes/pdf').glob('*.pdf'))) 
+ total_candidates = len(get_resume_corpus().view(('*.pdf',))) 
 team_size = get_team_size_input(total_candidates)
  team_result = analyzer.recommend_team(requirements, team_size=team_size)
  # Prepare comprehensive output data 
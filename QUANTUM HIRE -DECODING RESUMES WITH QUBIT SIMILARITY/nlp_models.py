@@ -0,0 +1,159 @@
+import argparse
+import json
+import os
+import sys
+import threading
+from pathlib import Path
+from typing import Iterable, Optional, Union
+
+import numpy as np
+import spacy
+
+MODEL_NAME = "en_core_web_lg"
+# The analyzers only read token texts and vectors
+UNUSED_COMPONENTS = ['tagger', 'parser', 'senter', 'ner', 'attribute_ruler', 'lemmatizer']
+# Directory written by `python -m src.nlp_models export`; when set, the full
+# model is never loaded
+VECTOR_TABLE_ENV = "QUANTUMHIRE_VECTOR_TABLE"
+# nlp.meta key set by load_vector_table when the table holds only a subset of
+# the model's vectors (the default export)
+SUBSET_TABLE_META = "quantumhire_subset_table"
+
+_nlp = None
+_lock = threading.Lock()
+
+
+def load_model(name: str = MODEL_NAME):
+    """The spaCy model with every component the analyzers do not use disabled"""
+    try:
+        nlp = spacy.load(name, disable=UNUSED_COMPONENTS)
+    except OSError:
+        raise ImportError(
+            "Quantum linguistic processor missing! Please install:\n"
+            f"python -m spacy download {name}"
+        )
+    # Static vectors make tok2vec's tensors unused as well
+    if nlp.vocab.vectors.size and 'tok2vec' in nlp.pipe_names:
+        nlp.disable_pipe('tok2vec')
+    return nlp
+
+
+def load_vector_table(table_dir: Union[str, Path]):
+    """Vectors-only pipeline: the model's tokenizer plus a memory-mapped vector table
+
+    Token and document vectors match the full model for every word in the
+    table; other words have no vector, like out-of-vocabulary words (see
+    out_of_table_rate). The table is mapped read-only, so forked workers share
+    its pages.
+    """
+    from spacy.vectors import Vectors
+
+    table_dir = Path(table_dir)
+    with open(table_dir / 'keys.json', 'r', encoding='utf-8') as f:
+        keys = json.load(f)
+    nlp = spacy.blank(keys['lang'])
+    nlp.tokenizer.from_disk(table_dir / 'tokenizer')
+    data = np.load(table_dir / 'vectors.npy', mmap_mode='r')
+    vectors = Vectors(strings=nlp.vocab.strings, data=data)
+    for word, row in zip(keys['words'], keys['rows']):
+        vectors.add(word, row=row)
+    nlp.vocab.vectors = vectors
+    # Tables written before the flag existed were always subsets
+    nlp.meta[SUBSET_TABLE_META] = keys.get('subset', True)
+    return nlp
+
+
+def out_of_table_rate(nlp, token_texts: Iterable[str]) -> Optional[float]:
+    """Share of distinct words without a vector, if `nlp` uses a subset vector table
+
+    Those words would have a vector in the full model but get zero vectors
+    here. None for the full model or a table exported with --all.
+    """
+    if not nlp.meta.get(SUBSET_TABLE_META):
+        return None
+    words = {text for text in token_texts if text.isalpha()}
+    if not words:
+        return 0.0
+    return sum(not nlp.vocab.has_vector(word) for word in words) / len(words)
+
+
+def export_vector_table(nlp, out_dir: Union[str, Path], texts: Optional[Iterable[str]] = None):
+    """Write a vector table for load_vector_table
+
+    With `texts`, only the vectors of their tokens are kept (the skill
+    vocabulary); without, the model's whole vector table is exported.
+    """
+    out_dir = Path(out_dir)
+    out_dir.mkdir(parents=True, exist_ok=True)
+    vectors = nlp.vocab.vectors
+    if texts is None:
+        words, rows = [], []
+        for key, row in vectors.key2row.items():
+            if key in nlp.vocab.strings:
+                words.append(nlp.vocab.strings[key])
+                rows.append(int(row))
+        data = np.asarray(vectors.data, dtype=np.float32)
+    else:
+        words = sorted({token.text for text in texts for token in nlp.make_doc(text)
+                        if nlp.vocab.has_vector(token.text)})
+        rows = list(range(len(words)))
+        data = np.zeros((len(words), vectors.shape[1]), dtype=np.float32)
+        for row, word in enumerate(words):
+            data[row] = nlp.vocab.get_vector(word)
+
+    np.save(out_dir / 'vectors.npy', data)
+    nlp.tokenizer.to_disk(out_dir / 'tokenizer')
+    with open(out_dir / 'keys.json', 'w', encoding='utf-8') as f:
+        json.dump({'lang': nlp.lang, 'model': f"{nlp.meta.get('name')}-{nlp.meta.get('version')}",
+                   'subset': texts is not None, 'words': words, 'rows': rows}, f)
+    return len(words)
+
+
+def get_nlp():
+    """Process-wide pipeline shared by every analyzer, loaded on first use
+
+    Uses the vector table named by $QUANTUMHIRE_VECTOR_TABLE if set, otherwise
+    the full model.
+    """
+    global _nlp
+    if _nlp is None:
+        with _lock:
+            if _nlp is None:
+                table_dir = os.environ.get(VECTOR_TABLE_ENV)
+                _nlp = load_vector_table(table_dir) if table_dir else load_model()
+    return _nlp
+
+
+def main(argv=None):
+    parser = argparse.ArgumentParser(description="Export a vector table for the vectors-only mode")
+    subparsers = parser.add_subparsers(dest='command', required=True)
+    export = subparsers.add_parser('export', help="write a vector table from the full model")
+    export.add_argument('out_dir')
+    export.add_argument('--resume-dir', action='append', default=[],
+                        help="include the vocabulary of the resumes in this directory (repeatable)")
+    export.add_argument('--skill', action='append', default=[],
+                        help="include a required skill (repeatable)")
+    export.add_argument('--all', action='store_true', help="export the model's whole vector table")
+    args = parser.parse_args(argv)
+
+    # Imported here: team_comparison uses this module for its pipeline
+    from src.resume_corpus import ResumeCorpus
+    from src.team_comparison import TeamAnalyzer
+
+    nlp = load_model()
+    texts = None
+    if not args.all:
+        analyzer = TeamAnalyzer(Path('.'), nlp=nlp)
+        texts = analyzer._ontology_strings() + [skill.lower() for skill in args.skill]
+        for resume_dir in args.resume_dir:
+            corpus = ResumeCorpus(resume_dir)
+            analyzer.tokenize_records(corpus.records)
+            texts.extend(token for record in corpus for token in record.tokens)
+    count = export_vector_table(nlp, args.out_dir, texts)
+    print(f"Exported {count} vectors to {args.out_dir}")
+    print(f"Use it with: {VECTOR_TABLE_ENV}={args.out_dir}")
+    return 0
+
+
+if __name__ == "__main__":
+    sys.exit(main())
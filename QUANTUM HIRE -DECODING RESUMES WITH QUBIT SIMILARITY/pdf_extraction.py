@@ -0,0 +1,213 @@
+import hashlib
+import json
+import multiprocessing
+import os
+import time
+from pathlib import Path
+from typing import Dict, Iterable, Iterator, Optional, Tuple, Union
+
+import pdfminer
+import PyPDF2  # Primary PDF text extraction
+from pdfminer.high_level import extract_text  # Fallback when PyPDF2 finds no text
+
+# Bump when the extraction logic changes so cached text is re-extracted
+EXTRACTOR_REVISION = 1
+DEFAULT_CACHE_DIR = Path('data/cache/pdf_text')
+DEFAULT_TIMEOUT = 60.0
+
+
+def extractor_version() -> str:
+    """Cache namespace: our extraction logic plus the library versions it depends on"""
+    return f"r{EXTRACTOR_REVISION}-pypdf2-{PyPDF2.__version__}-pdfminer-{pdfminer.__version__}"
+
+
+def _extract_worker(pdf_path: str) -> Tuple[str, Optional[str]]:
+    """(text, error message) for one PDF; runs in a pool process for batches"""
+    try:
+        with open(pdf_path, 'rb') as file:
+            reader = PyPDF2.PdfReader(file)
+            text = "".join(page.extract_text() or "" for page in reader.pages)  # Handle None returns
+        if not text.strip():
+            text = extract_text(pdf_path) or ""
+        return text, None
+    except Exception as e:
+        return "", str(e)
+
+
+def _file_digest(path: Path) -> str:
+    digest = hashlib.sha256()
+    with open(path, 'rb') as f:
+        for chunk in iter(lambda: f.read(1 << 20), b""):
+            digest.update(chunk)
+    return digest.hexdigest()
+
+
+class PDFTextExtractor:
+    """Parallel PDF text extraction backed by an on-disk text cache
+
+    Text is cached under <cache_dir>/<extractor version>/<sha256 of the PDF>,
+    so renamed or copied resumes are still hits, and an index of file size and
+    modification time avoids re-hashing unchanged files. Files are parsed in
+    a process pool, where a file still unfinished `timeout` seconds after its
+    turn in the pool came up has its worker killed; a single file gets a
+    one-worker pool and the same deadline.
+    """
+
+    def __init__(self, cache_dir: Union[str, Path] = DEFAULT_CACHE_DIR,
+                 workers: Optional[int] = None, timeout: float = DEFAULT_TIMEOUT):
+        self.cache_dir = Path(cache_dir)
+        self.text_dir = self.cache_dir / extractor_version()
+        self.text_dir.mkdir(parents=True, exist_ok=True)
+        self.index_path = self.cache_dir / 'index.json'
+        self.workers = workers or os.cpu_count() or 1
+        self.timeout = timeout
+        self.stats = {'cached': 0, 'parsed': 0, 'failed': 0}
+        try:
+            with open(self.index_path, 'r', encoding='utf-8') as f:
+                self.index = json.load(f)
+        except (OSError, ValueError):
+            self.index = {}
+        self._index_changed = False
+
+    def _digest(self, path: Path) -> str:
+        """Content hash of a PDF, reusing the indexed hash if the file is unchanged"""
+        stat = path.stat()
+        key = str(path.resolve())
+        entry = self.index.get(key)
+        if entry and entry[0] == stat.st_size and entry[1] == stat.st_mtime_ns:
+            return entry[2]
+        digest = _file_digest(path)
+        self.index[key] = [stat.st_size, stat.st_mtime_ns, digest]
+        self._index_changed = True
+        return digest
+
+    def _save_index(self):
+        """Write the index atomically, if any entry changed since the last save"""
+        if not self._index_changed:
+            return
+        tmp_path = self.index_path.with_suffix(f".{os.getpid()}.tmp")
+        try:
+            with open(tmp_path, 'w', encoding='utf-8') as f:
+                json.dump(self.index, f)
+            os.replace(tmp_path, self.index_path)
+            self._index_changed = False
+        except OSError as e:
+            print(f"Could not save PDF cache index: {str(e)}")
+
+    def _read_cache(self, digest: str) -> Optional[Tuple[str, Optional[str]]]:
+        for suffix, is_error in (('.txt', False), ('.err', True)):
+            try:
+                content = (self.text_dir / f"{digest}{suffix}").read_text(encoding='utf-8')
+            except OSError:
+                continue
+            return ("", content) if is_error else (content, None)
+        return None
+
+    def _write_cache(self, digest: str, text: str, error: Optional[str]):
+        path = self.text_dir / f"{digest}{'.err' if error else '.txt'}"
+        tmp_path = path.with_suffix(f".{os.getpid()}.tmp")
+        try:
+            tmp_path.write_text(error or text, encoding='utf-8')
+            os.replace(tmp_path, path)
+        except OSError as e:
+            print(f"Could not cache text for {path.name}: {str(e)}")
+
+    def _parse(self, pdf_paths: Iterable[str]) -> Iterator[Tuple[str, str, Optional[str]]]:
+        """Yield (path, text, error) for every path, parsing in a process pool"""
+        pending = list(pdf_paths)
+        while pending:
+            workers = min(self.workers, len(pending))
+            with multiprocessing.Pool(workers) as pool:
+                submitted = time.monotonic()
+                # Deadlines are fixed at submit time, so waiting on earlier
+                # files does not extend later ones; a file queued behind k
+                # rounds of the pool gets k extra timeouts to start
+                jobs = [(path, pool.apply_async(_extract_worker, (path,)),
+                         submitted + self.timeout * (i // workers + 1))
+                        for i, path in enumerate(pending)]
+                pending = []
+                for i, (path, job, deadline) in enumerate(jobs):
+                    try:
+                        text, error = job.get(max(0.0, deadline - time.monotonic()))
+                    except multiprocessing.TimeoutError:
+                        timed_out = f"timed out after {self.timeout:g}s"
+                        yield path, "", timed_out
+                        # A hung worker cannot be interrupted: keep what has
+                        # finished or is past its deadline and restart the
+                        # pool for the rest
+                        now = time.monotonic()
+                        for later_path, later_job, later_deadline in jobs[i + 1:]:
+                            if later_job.ready():
+                                yield (later_path,) + later_job.get()
+                            elif later_deadline <= now:
+                                yield later_path, "", timed_out
+                            else:
+                                pending.append(later_path)
+                        break
+                    yield path, text, error
+            # Leaving the with block terminates the pool, including hung workers
+
+    def _lookup(self, pdf_path: Union[str, Path]) -> Tuple[Optional[str], Optional[str]]:
+        """(digest, text) of a PDF from the cache; digest None if unreadable, text None on a miss"""
+        path = Path(pdf_path)
+        try:
+            digest = self._digest(path)
+        except OSError as e:
+            print(f"Error reading PDF {path}: {str(e)}")
+            self.stats['failed'] += 1
+            return None, ""
+        cached = self._read_cache(digest)
+        if cached is None:
+            return digest, None
+        text, error = cached
+        self.stats['cached'] += 1
+        if error:
+            print(f"Error reading PDF {path}: {error}")
+        return digest, text
+
+    def _store(self, pdf_path: str, digest: str, text: str, error: Optional[str]) -> str:
+        """Record a parse result in the stats and the cache; returns the text"""
+        if error:
+            print(f"Error reading PDF {pdf_path}: {error}")
+            self.stats['failed'] += 1
+        else:
+            self.stats['parsed'] += 1
+        # Timeouts may be load related, so only real parse results are cached
+        if not error or not error.startswith("timed out"):
+            self._write_cache(digest, text, error)
+        return text
+
+    def extract_many(self, pdf_paths: Iterable[Union[str, Path]]) -> Dict[str, str]:
+        """Text of every PDF, keyed by str(path) in input order; "" for unreadable files"""
+        texts = {}
+        digests = {}
+        for pdf_path in pdf_paths:
+            digest, texts[str(pdf_path)] = self._lookup(pdf_path)
+            if texts[str(pdf_path)] is None:
+                digests[str(pdf_path)] = digest
+
+        for pdf_path, text, error in self._parse(digests):
+            texts[pdf_path] = self._store(pdf_path, digests[pdf_path], text, error)
+
+        self._save_index()
+        return texts
+
+    def extract(self, pdf_path: Union[str, Path]) -> str:
+        """Text of a single PDF, parsed in a one-worker pool on a cache miss"""
+        return self.extract_many([pdf_path])[str(pdf_path)]
+
+
+_default_extractor = None
+
+
+def get_extractor() -> PDFTextExtractor:
+    """Process-wide extractor with the default cache directory"""
+    global _default_extractor
+    if _default_extractor is None:
+        _default_extractor = PDFTextExtractor()
+    return _default_extractor
+
+
+def extract_text_from_pdf(pdf_path: Union[str, Path]) -> str:
+    """Extract text content from a PDF resume, using the shared cache"""
+    return get_extractor().extract(pdf_path)
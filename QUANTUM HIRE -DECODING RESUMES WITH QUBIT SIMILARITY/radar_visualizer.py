@@ -1,12 +1,22 @@
 class EnhancedRadarVisualizer(RadarVisualizer):
-    def __init__(self):
+    def __init__(self, corpus=None):
         super().__init__()
+        # Optional shared ResumeCorpus: skills are then read from its loaded .txt
+        # resumes, the files the charts use without one
+        self.corpus = corpus.view(('*.txt',)) if corpus is not None else None
         self.figsize = (12, 12)
         self.font_size = 14
         self.colors = plt.cm.viridis(np.linspace(0, 1, 8))  # More color options
         self.background_color = '#f5f5f5'
         self.grid_color = '#dddddd'
         
+    def _extract_skills(self, resume_path, skills):
+        """Binary skill presence, from the shared corpus when it holds this resume"""
+        record = self.corpus.get(resume_path) if self.corpus is not None else None
+        if record is None:
+            return super()._extract_skills(resume_path, skills)
+        return np.array([1.0 if skill.lower() in record.lower else 0.0 for skill in skills])
+        
     def create_individual_radar(self, resume_path, skills, output_path, proficiency_levels=None):
         """Generate enhanced single candidate radar chart with proficiency levels"""
         candidate = os.path.basename(resume_path).replace('.txt', '').replace('_', ' ').title()
@@ -71,12 +81,15 @@ class EnhancedRadarVisualizer(RadarVisualizer):
                        linewidth=2.5, label=candidate, marker='o', markersize=7)
                 ax.fill(theta, values, color=self.colors[idx], alpha=0.1)
         else:
-            for idx, filename in enumerate([f for f in os.listdir(resume_dir) if f.endswith('.txt')]):
-                resume_path = os.path.join(resume_dir, filename)
+            if self.corpus is not None:
+                resumes = [(record.name, str(record.path)) for record in self.corpus]
+            else:
+                resumes = [(f.replace('.txt', '').replace('_', ' ').title(), os.path.join(resume_dir, f))
+                           for f in os.listdir(resume_dir) if f.endswith('.txt')]
+            for idx, (candidate, resume_path) in enumerate(resumes):
                 values = self._extract_skills(resume_path, skills)
                 values = np.concatenate((values, [values[0]]))
                 
-                candidate = filename.replace('.txt', '').replace('_', ' ').title()
                 ax.plot(theta, values, color=self.colors[idx], 
                        linewidth=2.5, label=candidate, marker='o', markersize=7)
                 ax.fill(theta, values, color=self.colors[idx], alpha=0.1)
@@ -0,0 +1,94 @@
+from pathlib import Path
+from typing import Callable, Iterator, List, Optional, Sequence, Set, Union
+
+from src.pdf_extraction import PDFTextExtractor, get_extractor
+
+
+class ResumeRecord:
+    """One candidate's resume, read and normalized once"""
+    __slots__ = ('path', 'name', 'text', 'lower', 'tokens', 'skills')
+
+    def __init__(self, path: Path, text: str):
+        self.path = path
+        self.name = path.stem.replace('_', ' ').title()
+        self.text = text
+        self.lower = text.lower()
+        self.tokens = None  # Lowercase token texts, filled by the first NLP pass
+        self.skills = {}    # Skill sets by kind, e.g. 'ontology' (TeamAnalyzer)
+
+    def skill_set(self, kind: str, extract: Callable[['ResumeRecord'], Set[str]]) -> Set[str]:
+        """Skill set of one kind, computed by `extract(record)` on first use"""
+        if kind not in self.skills:
+            self.skills[kind] = extract(self)
+        return self.skills[kind]
+
+
+class ResumeCorpus:
+    """Every resume in a directory, loaded once and shared by all analyses
+
+    PDFs go through the cached PDF text extractor in one parallel batch and
+    text files are read directly. Records are built on first access.
+    """
+
+    def __init__(self, resume_dir: Union[str, Path], patterns: Sequence[str] = ('*.txt', '*.pdf'),
+                 pdf_extractor: Optional[PDFTextExtractor] = None):
+        self.resume_dir = Path(resume_dir)
+        self.patterns = tuple(patterns)
+        self.pdf_extractor = pdf_extractor
+        self._parent = None
+        self._records = None
+        self._by_path = {}
+
+    def _load(self):
+        if self._parent is not None:
+            records = [record for record in self._parent.records
+                       if any(record.path.match(pattern) for pattern in self.patterns)]
+            self._records = records
+            self._by_path = {str(record.path.resolve()): record for record in records}
+            return
+        paths = sorted({path for pattern in self.patterns for path in self.resume_dir.glob(pattern)})
+        pdf_paths = [path for path in paths if path.suffix.lower() == '.pdf']
+        texts = (self.pdf_extractor or get_extractor()).extract_many(pdf_paths) if pdf_paths else {}
+
+        records = []
+        for path in paths:
+            record = ResumeRecord(path, texts[str(path)]) if str(path) in texts else self.read_record(path)
+            if record is not None:
+                records.append(record)
+        self._records = records
+        self._by_path = {str(record.path.resolve()): record for record in records}
+
+    def view(self, patterns: Sequence[str]) -> 'ResumeCorpus':
+        """The records matching `patterns`, shared with this corpus rather than re-read"""
+        view = ResumeCorpus(self.resume_dir, patterns, self.pdf_extractor)
+        view._parent = self
+        return view
+
+    def read_record(self, path: Union[str, Path]) -> Optional[ResumeRecord]:
+        """Record for a single resume file, read on its own; None if unreadable"""
+        path = Path(path)
+        if path.suffix.lower() == '.pdf':
+            return ResumeRecord(path, (self.pdf_extractor or get_extractor()).extract(path))
+        try:
+            return ResumeRecord(path, path.read_text(encoding='utf-8'))
+        except (OSError, UnicodeDecodeError) as e:
+            print(f"Error reading resume {path.name}: {str(e)}")
+            return None
+
+    @property
+    def records(self) -> List[ResumeRecord]:
+        if self._records is None:
+            self._load()
+        return self._records
+
+    def __iter__(self) -> Iterator[ResumeRecord]:
+        return iter(self.records)
+
+    def __len__(self) -> int:
+        return len(self.records)
+
+    def get(self, path: Union[str, Path]) -> Optional[ResumeRecord]:
+        """Record for a resume file, or None if it is not part of the corpus"""
+        if self._records is None:
+            self._load()
+        return self._by_path.get(str(Path(path).resolve()))
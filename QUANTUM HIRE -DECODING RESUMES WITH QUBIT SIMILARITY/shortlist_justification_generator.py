@@ -2,13 +2,15 @@ import os
 import json
 import random
 from pathlib import Path
-from typing import List, Dict, Union
+from typing import List, Dict, Optional, Union
 from datetime import datetime
-import PyPDF2  # For PDF text extraction
-from pdfminer.high_level import extract_text  # Alternative PDF text extraction
+from src.pdf_extraction import PDFTextExtractor, get_extractor  # Cached, parallel PDF text extraction
+from src.resume_corpus import ResumeCorpus
 
 class ShortlistJustificationGenerator:
-    def __init__(self):
+    def __init__(self, pdf_extractor: Optional[PDFTextExtractor] = None):
+        self.pdf_extractor = pdf_extractor or get_extractor()
+
         # Skill importance levels
         self.skill_importance = {
             'python': 'critical',
@@ -80,17 +82,8 @@ class ShortlistJustificationGenerator:
         return self.skill_aliases.get(skill, skill)
 
     def extract_text_from_pdf(self, pdf_path: str) -> str:
-        """Extract text from PDF file using PyPDF2"""
-        try:
-            with open(pdf_path, 'rb') as file:
-                reader = PyPDF2.PdfReader(file)
-                text = ""
-                for page in reader.pages:
-                    text += page.extract_text() or ""  # Handle None returns
-                return text
-        except Exception as e:
-            print(f"Error reading PDF {pdf_path}: {str(e)}")
-            return ""
+        """Extract text from PDF file (PyPDF2, pdfminer fallback, cached on disk)"""
+        return self.pdf_extractor.extract(pdf_path)
 
     def extract_skills_from_pdf(self, pdf_path: str) -> List[str]:
         """Extract skills from a PDF resume"""
@@ -211,15 +204,20 @@ class ShortlistJustificationGenerator:
         else:
             return ", ".join(phrases[:-1]) + f", and {phrases[-1]}"
 
-    def process_pdf_resumes(self, pdf_dir: str, required_skills: List[str]) -> Dict[str, Dict]:
-        """Process all PDF resumes in a directory"""
-        pdf_dir = Path(pdf_dir)
+    def process_pdf_resumes(self, pdf_dir: str, required_skills: List[str],
+                            corpus: Optional[ResumeCorpus] = None) -> Dict[str, Dict]:
+        """Process all PDF resumes in a directory (or the resumes of a shared corpus)"""
         results = {}
         
-        for pdf_file in pdf_dir.glob("*.pdf"):
-            candidate_name = pdf_file.stem.replace('_', ' ').title()
-            skills = self.extract_skills_from_pdf(str(pdf_file))
-            results[candidate_name] = self.generate_justification(candidate_name, skills, required_skills)
+        # The corpus extracts every resume up front, so uncached files are parsed in parallel;
+        # a shared corpus contributes its PDFs only
+        if corpus is None:
+            corpus = ResumeCorpus(pdf_dir, patterns=('*.pdf',), pdf_extractor=self.pdf_extractor)
+        else:
+            corpus = corpus.view(('*.pdf',))
+        for record in corpus:
+            skills = list(record.skill_set('shortlist', lambda r: set(self.extract_skills_from_text(r.lower))))
+            results[record.name] = self.generate_justification(record.name, skills, required_skills)
         
         return results
 
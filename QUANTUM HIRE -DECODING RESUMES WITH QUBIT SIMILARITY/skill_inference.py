@@ -0,0 +1,123 @@
+from typing import List, Set
+
+import numpy as np
+
+# Same cut-off as TeamAnalyzer._infer_skills_from_context
+INFERENCE_THRESHOLD = 0.7
+# Matrix-product scores this close to the threshold are rechecked pairwise
+SIMILARITY_TOLERANCE = 1e-4
+
+
+class SkillInferenceEngine:
+    """Vectorized TeamAnalyzer._infer_skills_from_context
+
+    The original compares every token with every ontology skill through
+    _quantum_entanglement, running the spaCy pipeline twice per pair. Here
+    token vectors come straight from the vocabulary's static vectors
+    (nlp(text).vector without the pipeline) and all token/skill similarities
+    of a document are one product of unit-row matrices, T @ S.T.
+
+    The product can differ from sklearn's per-pair cosine_similarity in the
+    last float32 bits, so only scores within SIMILARITY_TOLERANCE of the
+    threshold are decided by the scalar _quantum_entanglement; the inferred
+    skills are the same as the original's. Matrix scores are not written to
+    the analyzer's entanglement_cache, so every cached value is still exactly
+    what the scalar path computes. Tokens that are ontology skills themselves
+    (where _quantum_entanglement depends on the argument order) go through the
+    scalar path.
+    """
+
+    def __init__(self, analyzer):
+        self.analyzer = analyzer
+        self.skills = list(analyzer.skill_ontology)
+        self._skill_matrix = None
+        self._skill_has_vector = None
+
+    @property
+    def available(self) -> bool:
+        # Without static vectors, nlp(text).vector comes from the pipeline's tensors
+        return self.analyzer.nlp.vocab.vectors.size > 0
+
+    def text_vector(self, text: str) -> np.ndarray:
+        """nlp(text).vector, computed from the tokenizer and the vector table only"""
+        doc = self.analyzer.nlp.make_doc(text)
+        if not len(doc):
+            return np.zeros((self.analyzer.nlp.vocab.vectors_length,), dtype='f')
+        # Same summation as spaCy's Doc.vector
+        return sum(token.vector for token in doc) / len(doc)
+
+    @staticmethod
+    def _unit_rows(vectors: np.ndarray) -> np.ndarray:
+        # Row normalization as in sklearn's cosine_similarity
+        norms = np.sqrt(np.einsum('ij,ij->i', vectors, vectors))
+        norms[norms == 0.0] = 1.0
+        return vectors / norms[:, np.newaxis]
+
+    def _skills(self):
+        """Unit (skills, n) matrix S, and which skills have a vector at all"""
+        if self._skill_matrix is None:
+            vectors = np.array([self.analyzer._text_vector(skill) for skill in self.skills])
+            self._skill_has_vector = vectors.any(axis=1)
+            self._skill_matrix = self._unit_rows(vectors)
+        return self._skill_matrix, self._skill_has_vector
+
+    def infer(self, text: str, tokens: List[str]) -> Set[str]:
+        """Skills inferred from a resume's original text and its lowercase token texts"""
+        analyzer = self.analyzer
+        ontology = analyzer.skill_ontology
+        cache = analyzer.entanglement_cache
+
+        # Direct skill matches
+        inferred = {token_text for token_text in tokens if token_text in ontology}
+
+        # Context words decide which skills can be inferred at all
+        present = [index for index, skill in enumerate(self.skills)
+                   if any(ctx_word in text for ctx_word in ontology[skill]['contexts'])]
+        if not present:
+            return inferred
+
+        unique_tokens = list(dict.fromkeys(tokens))
+        for token_text in unique_tokens:
+            if token_text in ontology:
+                for index in present:
+                    if analyzer._quantum_entanglement(token_text, self.skills[index]) > INFERENCE_THRESHOLD:
+                        inferred.add(self.skills[index])
+
+        others = [token_text for token_text in unique_tokens if token_text not in ontology]
+        if not others:
+            return inferred
+
+        # One matrix for the document's tokens, one product for every pair
+        token_vectors = np.array([self.text_vector(token_text) for token_text in others])
+        skill_matrix, skill_has_vector = self._skills()
+        scores = self._unit_rows(token_vectors) @ skill_matrix[present].T
+        # Zero vectors score 0.0 in the scalar path
+        scores[~token_vectors.any(axis=1)] = 0.0
+        scores[:, ~skill_has_vector[present]] = 0.0
+
+        for column, index in enumerate(present):
+            skill = self.skills[index]
+            if skill in inferred:
+                continue
+            # Scores already in the cache (entanglement table, boosted or pattern
+            # scores) take precedence over the cosine, as in _quantum_entanglement
+            patterns = ontology[skill].get('patterns', [])
+            exact = {}
+            for row, token_text in enumerate(others):
+                cache_key = frozenset({token_text, skill})
+                if cache_key in cache:
+                    exact[row] = cache[cache_key]
+                elif any(p in token_text for p in patterns):
+                    exact[row] = cache[cache_key] = 0.9
+            if any(score > INFERENCE_THRESHOLD for score in exact.values()):
+                inferred.add(skill)
+                continue
+            for row in np.flatnonzero(scores[:, column] > INFERENCE_THRESHOLD - SIMILARITY_TOLERANCE):
+                if row in exact:
+                    continue
+                # Too close to call from the product: the exact scalar score decides
+                if (scores[row, column] > INFERENCE_THRESHOLD + SIMILARITY_TOLERANCE
+                        or analyzer._quantum_entanglement(others[row], skill) > INFERENCE_THRESHOLD):
+                    inferred.add(skill)
+                    break
+        return inferred
@@ -1,21 +1,28 @@
 import json
 from collections import defaultdict
 from pathlib import Path
-import spacy
 from sklearn.metrics.pairwise import cosine_similarity
 import numpy as np
-from typing import Dict, List, Set, Tuple, Optional
+from typing import Dict, Iterable, List, Set, Tuple, Optional
+from src.resume_corpus import ResumeCorpus, ResumeRecord
+from src.nlp_models import get_nlp, out_of_table_rate
+from src.skill_inference import SkillInferenceEngine
 
 class TeamAnalyzer:
-    def __init__(self, resume_dir: str):
+    def __init__(self, resume_dir: str, corpus: Optional[ResumeCorpus] = None,
+                 batch_size: int = 64, n_process: int = 1, nlp=None):
         self.resume_dir = Path(resume_dir)
-        try:
-            self.nlp = spacy.load("en_core_web_lg")
-        except OSError:
-            raise ImportError(
-                "Quantum linguistic processor missing! Please install:\n"
-                "python -m spacy download en_core_web_lg"
-            )
+        # Pass a shared corpus so resumes are read once across all analyses;
+        # either way only the .txt resumes are analyzed
+        if corpus is None:
+            self.corpus = ResumeCorpus(self.resume_dir, patterns=('*.txt',))
+        else:
+            self.corpus = corpus.view(('*.txt',))
+        # nlp.pipe settings for corpus tokenization; n_process > 1 forks workers
+        self.batch_size = batch_size
+        self.n_process = n_process
+        # The shared pipeline is loaded on first use, see nlp_models.get_nlp
+        self._nlp = nlp
         
         # Enhanced quantum-inspired skill ontology
         self.skill_ontology = {
@@ -47,6 +54,28 @@ class TeamAnalyzer:
         self.context_amplifier = 1.2
         self.skill_weights = defaultdict(lambda: 1.0)
         self.entanglement_cache = {}
+        self.inference = SkillInferenceEngine(self)
+        # Vectors of the skill vocabulary, filled in batches
+        self.text_vectors = {}
+        self._ontology_primed = False
+
+    @property
+    def nlp(self):
+        if self._nlp is None:
+            self._nlp = get_nlp()
+        return self._nlp
+
+    def prime_vectors(self, skills: Iterable[str] = ()):
+        """Vectors for the skill ontology and `skills` in one nlp.pipe call
+
+        The ontology is only added on the first call; later calls pipe just
+        the skills not seen yet.
+        """
+        texts = [s.lower() for s in skills]
+        if not self._ontology_primed:
+            self._ontology_primed = True
+            texts = self._ontology_strings() + texts
+        self._prime_text_vectors(texts)
 
     def _quantum_entanglement(self, skill1: str, skill2: str) -> float:
         """Calculate quantum-inspired entanglement between skills"""
@@ -69,8 +98,8 @@ class TeamAnalyzer:
             return 0.9
             
         # Calculate semantic similarity with quantum boost
-        vec1 = self.nlp(skill1).vector
-        vec2 = self.nlp(skill2).vector
+        vec1 = self._text_vector(skill1)
+        vec2 = self._text_vector(skill2)
         
         if not vec1.any() or not vec2.any():
             return 0.0
@@ -86,15 +115,49 @@ class TeamAnalyzer:
         self.entanglement_cache[cache_key] = base_sim
         return base_sim
 
+    def _ontology_strings(self) -> List[str]:
+        strings = []
+        for skill, data in self.skill_ontology.items():
+            strings.append(skill)
+            strings.extend(data['related'])
+            strings.extend(data['contexts'])
+            strings.extend(data['patterns'])
+            strings.extend(data['entanglement'])
+        return strings
+
+    def _prime_text_vectors(self, texts: List[str]):
+        """Run the texts not seen yet through one nlp.pipe call and keep their vectors"""
+        pending = [text for text in dict.fromkeys(texts) if text not in self.text_vectors]
+        if not pending:
+            return
+        for text, doc in zip(pending, self.nlp.pipe(pending, batch_size=self.batch_size)):
+            self.text_vectors[text] = doc.vector
+
+    def _text_vector(self, text: str) -> np.ndarray:
+        """nlp(text).vector, precomputed for skill strings"""
+        vector = self.text_vectors.get(text)
+        if vector is None:
+            # Token texts are not kept: resume vocabularies are unbounded
+            vector = self.nlp(text).vector
+        return vector
+
     def analyze_candidate(self, resume_path: Path, required_skills: List[str]) -> Dict:
         """Analyze a candidate with quantum-inspired matching"""
+        resume_path = Path(resume_path)
+        record = self.corpus.get(resume_path) or self.corpus.read_record(resume_path)
+        if record is None:
+            return self._failed_analysis(resume_path.stem.replace('_', ' ').title(), required_skills)
+        return self.analyze_record(record, required_skills)
+
+    def analyze_record(self, record: ResumeRecord, required_skills: List[str]) -> Dict:
+        """analyze_candidate for an already loaded resume"""
         try:
-            with open(resume_path, 'r', encoding='utf-8') as f:
-                content = f.read()
+            content = record.text
+            self.prime_vectors(required_skills)
                 
             # Extract and infer skills
             explicit_skills = {s.lower() for s in required_skills if s.lower() in content}
-            inferred_skills = self._infer_skills_from_context(content)
+            inferred_skills = record.skill_set('ontology', self._infer_record_skills)
             all_skills = explicit_skills.union(inferred_skills)
             
             # Quantum-enhanced matching
@@ -120,7 +183,7 @@ class TeamAnalyzer:
             final_score = min(base_score + context_boost, 1.0) * 100
             
             return {
-                'name': resume_path.stem.replace('_', ' ').title(),
+                'name': record.name,
                 'matched': matched,
                 'missing': missing,
                 'score': round(final_score, 1),
@@ -128,29 +191,64 @@ class TeamAnalyzer:
             }
             
         except Exception as e:
-            print(f"Quantum analysis error for {resume_path.name}: {str(e)}")
-            return {
-                'name': resume_path.stem.replace('_', ' ').title(),
-                'matched': [],
-                'missing': required_skills,
-                'score': 0,
-                'recommendation': "Analysis failed"
-            }
+            print(f"Quantum analysis error for {record.path.name}: {str(e)}")
+            return self._failed_analysis(record.name, required_skills)
+
+    def _failed_analysis(self, name: str, required_skills: List[str]) -> Dict:
+        return {
+            'name': name,
+            'matched': [],
+            'missing': required_skills,
+            'score': 0,
+            'recommendation': "Analysis failed"
+        }
+
+    def _record_tokens(self, record: ResumeRecord) -> List[str]:
+        """Lowercase token texts of a resume, tokenized once per corpus"""
+        if record.tokens is None:
+            record.tokens = [token.text for token in self.nlp(record.lower)]
+        return record.tokens
 
-    def _infer_skills_from_context(self, text: str) -> Set[str]:
+    def tokenize_records(self, records: List[ResumeRecord]):
+        """Fill record.tokens for every record, streaming the texts through nlp.pipe"""
+        pending = [record for record in records if record.tokens is None]
+        if not pending:
+            return
+        docs = self.nlp.pipe((record.lower for record in pending),
+                             batch_size=self.batch_size, n_process=self.n_process)
+        for record, doc in zip(pending, docs):
+            record.tokens = [token.text for token in doc]
+        self._check_vector_table(token for record in pending for token in record.tokens)
+
+    def _check_vector_table(self, tokens):
+        """Warn when a subset vector table is missing words of the resumes"""
+        rate = out_of_table_rate(self.nlp, tokens)
+        if rate:
+            print(f"Warning: {rate:.1%} of resume words are not in the vector table and get "
+                  f"zero vectors; re-export it with --resume-dir for these resumes or with --all")
+
+    def _infer_record_skills(self, record: ResumeRecord) -> Set[str]:
+        return self._infer_skills_from_context(record.text, self._record_tokens(record))
+
+    def _infer_skills_from_context(self, text: str, tokens: Optional[List[str]] = None) -> Set[str]:
         """Extract skills using NLP + quantum-inspired context analysis"""
-        doc = self.nlp(text.lower())
+        if tokens is None:
+            tokens = [token.text for token in self.nlp(text.lower())]
+        if self.inference.available:
+            return self.inference.infer(text, tokens)
+
+        # Models without static vectors: pairwise scalar path
         inferred_skills = set()
         
-        for token in doc:
+        for token_text in tokens:
             # Direct skill matches
-            if token.text in self.skill_ontology:
-                inferred_skills.add(token.text)
+            if token_text in self.skill_ontology:
+                inferred_skills.add(token_text)
                 
             # Contextual inference (quantum-inspired fuzzy matching)
             for skill, data in self.skill_ontology.items():
                 for ctx_word in data['contexts']:
-                    if ctx_word in text and self._quantum_entanglement(token.text, skill) > 0.7:
+                    if ctx_word in text and self._quantum_entanglement(token_text, skill) > 0.7:
                         inferred_skills.add(skill)
                         
         return inferred_skills
@@ -168,8 +266,10 @@ class TeamAnalyzer:
     def recommend_team(self, required_skills: List[str], team_size: int = 3) -> Dict:
         """Recommend a quantum-optimized team"""
         candidates = []
-        for resume in self.resume_dir.glob('*.txt'):
-            analysis = self.analyze_candidate(resume, required_skills)
+        self.prime_vectors(required_skills)
+        self.tokenize_records(self.corpus.records)
+        for record in self.corpus:
+            analysis = self.analyze_record(record, required_skills)
             candidates.append(analysis)
         
         # Quantum-inspired team composition
@@ -0,0 +1,12 @@
+import os
+import sys
+import types
+
+PROJECT_DIR = os.path.dirname(os.path.dirname(os.path.abspath(__file__)))
+
+# The modules import each other as `src.<module>`, the layout they are
+# deployed in; expose this directory under that package name
+if 'src' not in sys.modules:
+    src = types.ModuleType('src')
+    src.__path__ = [PROJECT_DIR]
+    sys.modules['src'] = src
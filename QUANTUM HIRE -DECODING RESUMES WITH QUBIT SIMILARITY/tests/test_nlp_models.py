@@ -0,0 +1,40 @@
+import numpy as np
+import pytest
+
+spacy = pytest.importorskip("spacy")
+
+from src.nlp_models import export_vector_table, load_vector_table, out_of_table_rate
+
+WORDS = ['python', 'react', 'django', 'automation']
+
+
+@pytest.fixture
+def nlp():
+    nlp = spacy.blank('en')
+    rng = np.random.default_rng(0)
+    for word in WORDS:
+        nlp.vocab.set_vector(word, rng.standard_normal(8).astype(np.float32))
+    return nlp
+
+
+def test_vector_table_is_memory_mapped(nlp, tmp_path):
+    export_vector_table(nlp, tmp_path, ['python and react'])
+    table = load_vector_table(tmp_path)
+
+    data = table.vocab.vectors.data
+    # A copy would own its (writeable) memory; the mapping is read-only
+    assert not data.flags.owndata
+    assert not data.flags.writeable
+    for word in ('python', 'react'):
+        np.testing.assert_array_equal(table.vocab.get_vector(word), nlp.vocab.get_vector(word))
+    assert not table.vocab.has_vector('django')
+
+
+def test_out_of_table_rate(nlp, tmp_path):
+    export_vector_table(nlp, tmp_path / 'subset', ['python'])
+    export_vector_table(nlp, tmp_path / 'all')
+
+    subset = load_vector_table(tmp_path / 'subset')
+    assert out_of_table_rate(subset, ['python', 'django', 'python', '3.8', ',']) == 0.5
+    assert out_of_table_rate(load_vector_table(tmp_path / 'all'), ['python', 'django']) is None
+    assert out_of_table_rate(nlp, ['python', 'django']) is None
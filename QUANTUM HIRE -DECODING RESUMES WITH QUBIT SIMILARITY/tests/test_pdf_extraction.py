@@ -0,0 +1,80 @@
+import multiprocessing
+
+import pytest
+
+pytest.importorskip("PyPDF2")
+pytest.importorskip("pdfminer")
+
+from src import pdf_extraction
+from src.pdf_extraction import PDFTextExtractor
+
+
+def fake_text(pdf_path):
+    # Module level, so pool workers can unpickle it
+    return f"text of {pdf_path}", None
+
+
+@pytest.fixture
+def fake_worker(monkeypatch):
+    monkeypatch.setattr(pdf_extraction, '_extract_worker', fake_text)
+
+
+def test_single_file_is_parsed_in_a_one_worker_pool_and_cached(tmp_path, monkeypatch, fake_worker):
+    pools = []
+    pool = multiprocessing.Pool
+
+    def counting_pool(processes, *args, **kwargs):
+        pools.append(processes)
+        return pool(processes, *args, **kwargs)
+
+    monkeypatch.setattr(multiprocessing, 'Pool', counting_pool)
+    pdf = tmp_path / 'resume.pdf'
+    pdf.write_bytes(b'%PDF-1.4 resume')
+    extractor = PDFTextExtractor(cache_dir=tmp_path / 'cache', workers=4)
+
+    assert extractor.extract(pdf) == f"text of {pdf}"
+    assert extractor.extract(pdf) == f"text of {pdf}"
+    assert pools == [1]
+    assert extractor.stats == {'cached': 1, 'parsed': 1, 'failed': 0}
+
+
+def test_index_is_only_written_when_it_changes(tmp_path, fake_worker):
+    pdf = tmp_path / 'resume.pdf'
+    pdf.write_bytes(b'%PDF-1.4 resume')
+    extractor = PDFTextExtractor(cache_dir=tmp_path / 'cache')
+    extractor.extract(pdf)
+    assert str(pdf.resolve()) in PDFTextExtractor(cache_dir=tmp_path / 'cache').index
+
+    extractor.index_path.unlink()
+    extractor.extract(pdf)
+    extractor.extract_many([pdf])
+    assert not extractor.index_path.exists()
+
+
+def hang(pdf_path):
+    pdf_extraction.time.sleep(60)
+
+
+def test_timeouts_are_measured_from_submission(tmp_path, monkeypatch):
+    # Files hung in the same round of the pool share one timeout instead of
+    # waiting one timeout each
+    monkeypatch.setattr(pdf_extraction, '_extract_worker', hang)
+    paths = [str(tmp_path / f'{name}.pdf') for name in 'abc']
+    extractor = PDFTextExtractor(cache_dir=tmp_path / 'cache', workers=3, timeout=1.0)
+
+    started = pdf_extraction.time.monotonic()
+    results = list(extractor._parse(paths))
+    assert [error for _, _, error in results] == ["timed out after 1s"] * 3
+    assert pdf_extraction.time.monotonic() - started < 2.5
+
+
+def test_single_file_times_out(tmp_path, monkeypatch):
+    monkeypatch.setattr(pdf_extraction, '_extract_worker', hang)
+    pdf = tmp_path / 'resume.pdf'
+    pdf.write_bytes(b'%PDF-1.4 resume')
+    extractor = PDFTextExtractor(cache_dir=tmp_path / 'cache', timeout=1.0)
+
+    started = pdf_extraction.time.monotonic()
+    assert extractor.extract(pdf) == ""
+    assert pdf_extraction.time.monotonic() - started < 2.5
+    assert extractor.stats == {'cached': 0, 'parsed': 0, 'failed': 1}
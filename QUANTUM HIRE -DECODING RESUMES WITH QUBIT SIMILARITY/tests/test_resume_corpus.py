@@ -0,0 +1,57 @@
+import os
+
+import pytest
+
+pytest.importorskip("PyPDF2")
+pytest.importorskip("pdfminer")
+
+from src.resume_corpus import ResumeCorpus
+
+
+class FakeExtractor:
+    def __init__(self):
+        self.batches = []
+
+    def extract_many(self, pdf_paths):
+        self.batches.append(list(pdf_paths))
+        return {str(path): f"pdf text of {path.stem}" for path in pdf_paths}
+
+
+@pytest.fixture
+def corpus(tmp_path):
+    (tmp_path / 'alice_smith.txt').write_text("python developer", encoding='utf-8')
+    (tmp_path / 'bob_jones.pdf').write_bytes(b'%PDF-1.4')
+    (tmp_path / 'carol_white.pdf').write_bytes(b'%PDF-1.4')
+    return ResumeCorpus(tmp_path, pdf_extractor=FakeExtractor())
+
+
+def test_view_filters_and_shares_records(corpus):
+    text_view = corpus.view(('*.txt',))
+    pdf_view = corpus.view(('*.pdf',))
+
+    assert [record.name for record in text_view] == ["Alice Smith"]
+    assert [record.name for record in pdf_view] == ["Bob Jones", "Carol White"]
+    assert all(record in corpus.records for record in list(text_view) + list(pdf_view))
+    assert len(corpus.pdf_extractor.batches) == 1
+
+
+def test_view_get_only_finds_its_own_records(corpus, tmp_path):
+    text_view = corpus.view(('*.txt',))
+    assert text_view.get(tmp_path / 'alice_smith.txt') is corpus.get(tmp_path / 'alice_smith.txt')
+    assert text_view.get(tmp_path / 'bob_jones.pdf') is None
+
+
+def test_analyzers_read_their_own_files_from_a_shared_corpus(corpus, tmp_path):
+    from src.learning_path_generator import LearningPathGenerator
+    from src.shortlist_justification_generator import ShortlistJustificationGenerator
+    from src.team_comparison import TeamAnalyzer
+
+    reports = LearningPathGenerator().process_resumes(tmp_path, ['docker'], tmp_path / 'paths', corpus=corpus)
+    assert [os.path.basename(path) for path in reports] == ['Alice_Smith_learning_path.txt']
+
+    shortlist = ShortlistJustificationGenerator(pdf_extractor=corpus.pdf_extractor)
+    assert sorted(shortlist.process_pdf_resumes(tmp_path, ['python'], corpus=corpus)) == ["Bob Jones", "Carol White"]
+
+    team = TeamAnalyzer(tmp_path, corpus=corpus)
+    assert [record.name for record in team.corpus] == ["Alice Smith"]
+    assert len(corpus.pdf_extractor.batches) == 1
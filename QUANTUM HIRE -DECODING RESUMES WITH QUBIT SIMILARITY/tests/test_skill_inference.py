@@ -0,0 +1,69 @@
+import types
+
+import numpy as np
+import spacy
+
+from src import skill_inference
+from src.team_comparison import TeamAnalyzer
+
+RESUME = """Jane Doe - Python developer
+Built a web app (SPA) in React.js with Redux hooks and JSX, plus data science
+tooling in pandas, numpy and flask. Scripting and automation for machine
+learning pipelines; some Vue and Angular. Reactjs, python3, kubernetes."""
+
+
+def make_nlp():
+    nlp = spacy.blank('en')
+    rng = np.random.default_rng(7)
+    bases = {word: rng.standard_normal(32).astype(np.float32) for word in ('python', 'react')}
+    words = {'developer', 'built', 'web', 'app', 'spa', 'data', 'science', 'scripting', 'automation',
+             'machine', 'learning', 'pipelines', 'vue', 'angular', 'javascript', 'frontend'}
+    for word in sorted(words):
+        nlp.vocab.set_vector(word, rng.standard_normal(32).astype(np.float32))
+    # Neighbours at increasing distance, so similarities fall on both sides of the thresholds
+    neighbours = {'python': ['pandas', 'numpy', 'flask', 'django', 'python3'],
+                  'react': ['redux', 'hooks', 'jsx', 'reactjs', 'js']}
+    for base, vector in bases.items():
+        nlp.vocab.set_vector(base, vector)
+        for k, word in enumerate(neighbours[base]):
+            noise = rng.standard_normal(32).astype(np.float32) * (0.3 + 0.25 * k)
+            nlp.vocab.set_vector(word, vector + noise)
+    return nlp
+
+
+def test_infer_matches_scalar_inference():
+    nlp = make_nlp()
+    fast = TeamAnalyzer('.', nlp=nlp)
+    scalar = TeamAnalyzer('.', nlp=nlp)
+    # The pairwise loop _infer_skills_from_context uses without static vectors
+    scalar.inference = types.SimpleNamespace(available=False)
+    assert fast.inference.available
+
+    for text in (RESUME, RESUME.lower(), RESUME.replace('machine\nlearning', 'ml')):
+        assert fast._infer_skills_from_context(text) == scalar._infer_skills_from_context(text)
+    # Only exact scalar scores are cached
+    for key, value in fast.entanglement_cache.items():
+        assert scalar.entanglement_cache[key] == value, sorted(key)
+
+
+def test_scores_at_the_threshold_are_decided_exactly(monkeypatch):
+    nlp = make_nlp()
+    probe = TeamAnalyzer('.', nlp=nlp)
+    monkeypatch.setattr(skill_inference, 'INFERENCE_THRESHOLD', probe._quantum_entanglement('pandas', 'python'))
+    fast = TeamAnalyzer('.', nlp=nlp)
+    # Exactly at the threshold is not above it; the matrix product alone could say either
+    assert fast.inference.infer('scripting', ['pandas']) == set()
+    assert frozenset({'pandas', 'python'}) in fast.entanglement_cache
+
+    fast.entanglement_cache[frozenset({'pandas', 'python'})] = 1.0
+    assert fast.inference.infer('scripting', ['pandas']) == {'python'}
+
+
+def test_entanglement_table_scores_override_the_cosine():
+    nlp = make_nlp()
+    analyzer = TeamAnalyzer('.', nlp=nlp)
+    # 'vue' is in react's entanglement table at 0.7, which is not above the threshold
+    nlp.vocab.set_vector('vue', nlp.vocab.get_vector('react'))
+    analyzer._quantum_entanglement('react', 'vue')
+    assert analyzer.inference.infer('web app', ['vue']) == set()
+    assert TeamAnalyzer('.', nlp=nlp).inference.infer('web app', ['vue']) == {'react'}
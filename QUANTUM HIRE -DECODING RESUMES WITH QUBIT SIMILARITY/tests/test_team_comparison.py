@@ -0,0 +1,60 @@
+import numpy as np
+import spacy
+
+from src.resume_corpus import ResumeCorpus
+from src.team_comparison import TeamAnalyzer
+
+
+def make_nlp(calls):
+    nlp = spacy.blank('en')
+    rng = np.random.default_rng(3)
+    for word in ('python', 'react', 'docker', 'developer', 'scripting', 'automation'):
+        nlp.vocab.set_vector(word, rng.standard_normal(16).astype(np.float32))
+    pipe = nlp.pipe
+
+    def counting_pipe(texts, **kwargs):
+        texts = list(texts)
+        calls.append((texts, kwargs))
+        return pipe(texts, **kwargs)
+
+    nlp.pipe = counting_pipe
+    return nlp
+
+
+def test_ontology_is_primed_once_in_one_pipe_call(tmp_path):
+    calls = []
+    analyzer = TeamAnalyzer(str(tmp_path), nlp=make_nlp(calls), batch_size=16)
+    assert analyzer.nlp is not None and calls == []
+
+    analyzer.prime_vectors(['Python', 'Docker'])
+    (texts, kwargs), = calls
+    assert texts == list(dict.fromkeys(analyzer._ontology_strings() + ['docker']))
+    assert kwargs == {'batch_size': 16}
+    np.testing.assert_array_equal(analyzer.text_vectors['docker'], analyzer.nlp('docker').vector)
+
+    analyzer.prime_vectors(['docker', 'Kubernetes'])
+    assert calls[1][0] == ['kubernetes']
+
+
+def test_recommend_team_tokenizes_the_corpus_in_one_batch(tmp_path):
+    for name, text in (('alice_smith', "Python developer, scripting and automation"),
+                       ('bob_jones', "React developer for a web app"),
+                       ('carol_white', "Docker")):
+        (tmp_path / f'{name}.txt').write_text(text, encoding='utf-8')
+    calls = []
+    nlp = make_nlp(calls)
+    corpus = ResumeCorpus(tmp_path, patterns=('*.txt',))
+    analyzer = TeamAnalyzer(str(tmp_path), corpus=corpus, nlp=nlp, batch_size=2)
+
+    result = analyzer.recommend_team(['Python', 'React'], team_size=2)
+    # One call for the skill vectors, one for every resume
+    assert len(calls) == 2
+    texts, kwargs = calls[1]
+    assert texts == [record.lower for record in corpus.records]
+    assert kwargs == {'batch_size': 2, 'n_process': 1}
+    for record in corpus.records:
+        assert record.tokens == [token.text for token in nlp(record.lower)]
+    assert [member['name'] for member in result['team']] == ['Alice Smith', 'Bob Jones']
+
+    analyzer.recommend_team(['Python'])
+    assert len(calls) == 2